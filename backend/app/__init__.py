@@ -1,17 +1,32 @@
+import json
 import os
 from flask import Flask, jsonify
 from dotenv import load_dotenv
 from flask_cors import CORS
 from sqlalchemy import text
 
-from app.extensions import db, migrate, login_manager
+from app.extensions import db, login_manager, init_migrate
 from app.routes import register_routes
 from app.models import User
-
-load_dotenv()
+from app.middlewares.compression import init_compression
+from app.middlewares.idempotency import init_idempotency
+from app.middlewares.query_budget import init_query_budget
+from app.middlewares.profiler import init_profiler
+from app.services.catalog_events import init_catalog_events, subscribe
+from app.services import catalog_snapshot, search_index, product_snapshot, product_facets, recommendations
+from app.services.change_feed import init_change_feed
+from app.services.order_events import init_order_events
+from app.services.invalidation_bus import init_invalidation_bus
+from app.services.jobs import init_jobs
+from app.services.cart_store import init_cart_store
+from app.services.order_sweeper import init_order_sweeper
+from app.services.db_routing import init_db_routing, replica_health
+from app.services import db_health, single_flight, stale_catalog
 
 
 def create_app():
+    load_dotenv()
+
     app = Flask(__name__)
 
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret")
@@ -26,7 +41,42 @@ def create_app():
     CORS(app, supports_credentials=True, origins=[o.strip() for o in cors_origins.split(",")])
 
     db.init_app(app)
-    migrate.init_app(app, db)
+
+    app.config["DATABASE_REPLICA_URLS"] = os.getenv("DATABASE_REPLICA_URLS", "")
+    app.config["REPLICA_MAX_LAG_SECONDS"] = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+    app.config["REPLICA_READ_YOUR_WRITES_SECONDS"] = int(os.getenv("REPLICA_READ_YOUR_WRITES_SECONDS", "5"))
+    init_db_routing(app)
+
+    app.config["DB_PROBE_INTERVAL_SECONDS"] = float(os.getenv("DB_PROBE_INTERVAL_SECONDS", "5"))
+    app.config["DB_LATENCY_THRESHOLD_MS"] = int(os.getenv("DB_LATENCY_THRESHOLD_MS", "1000"))
+    app.config["DB_BREAKER_FAILURES"] = int(os.getenv("DB_BREAKER_FAILURES", "3"))
+    app.config["DB_BREAKER_COOLDOWN_SECONDS"] = float(os.getenv("DB_BREAKER_COOLDOWN_SECONDS", "10"))
+    db_health.init_db_health(app)
+
+    app.config["STALE_CATALOG_MAX_BYTES"] = int(os.getenv("STALE_CATALOG_MAX_BYTES", str(32 * 1024 * 1024)))
+    stale_catalog.init_stale_catalog(app)
+
+    app.config["SINGLE_FLIGHT_ENABLED"] = os.getenv("SINGLE_FLIGHT_ENABLED", "1") == "1"
+    app.config["SINGLE_FLIGHT_WAIT_SECONDS"] = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", "10"))
+    single_flight.init_single_flight(app)
+    app.config["ENABLE_MIGRATE"] = os.getenv("ENABLE_MIGRATE", "0") == "1"
+    init_migrate(app)
+
+    app.config["QUERY_BUDGET_ENABLED"] = os.getenv("QUERY_BUDGET_ENABLED", "1") == "1"
+    app.config["QUERY_BUDGET_DEFAULT"] = {
+        "max_queries": int(os.getenv("QUERY_BUDGET_MAX_QUERIES", "200")),
+        "max_sql_ms": int(os.getenv("QUERY_BUDGET_MAX_SQL_MS", "5000")),
+        "statement_timeout_ms": int(os.getenv("QUERY_BUDGET_STATEMENT_TIMEOUT_MS", "5000")),
+        "max_rows": int(os.getenv("QUERY_BUDGET_MAX_ROWS", "10000")),
+    }
+    # npr. {"orders": {"max_rows": 2000}, "changes": {"max_sql_ms": 10000}}; katalog se vraca
+    # bez paginacije, pa products i recipes podrazumevano nemaju ogranicenje broja redova
+    app.config["QUERY_BUDGETS"] = {
+        "products": {"max_rows": None},
+        "recipes": {"max_rows": None},
+        **json.loads(os.getenv("QUERY_BUDGETS", "{}")),
+    }
+    init_query_budget(app)
 
     login_manager.init_app(app)
 
@@ -36,16 +86,85 @@ def create_app():
 
     register_routes(app)
 
+    app.config["COMPRESS_MIN_SIZE"] = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+    init_compression(app)
+
+    app.config["IDEMPOTENCY_BACKEND"] = os.getenv("IDEMPOTENCY_BACKEND", "database")
+    app.config["IDEMPOTENCY_TTL_SECONDS"] = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    init_idempotency(app)
+
+    app.config["PROFILER_ENABLED"] = os.getenv("PROFILER_ENABLED", "0") == "1"
+    app.config["PROFILER_OUTPUT_DIR"] = os.getenv("PROFILER_OUTPUT_DIR", "")
+    app.config["PROFILER_TOP"] = int(os.getenv("PROFILER_TOP", "25"))
+    init_profiler(app)
+
+    app.config["CATALOG_SNAPSHOT_MAX_BYTES"] = int(os.getenv("CATALOG_SNAPSHOT_MAX_BYTES", str(16 * 1024 * 1024)))
+    catalog_snapshot.init_catalog_snapshot(app)
+
+    init_catalog_events(app)
+    app.config["CHANGE_FEED_SAFETY_LAG_SECONDS"] = int(os.getenv("CHANGE_FEED_SAFETY_LAG_SECONDS", "60"))
+    init_change_feed(app)
+    subscribe(catalog_snapshot.on_catalog_change)
+    subscribe(search_index.on_catalog_change)
+    subscribe(product_snapshot.on_catalog_change)
+    subscribe(product_facets.on_catalog_change)
+
+    app.config["INVALIDATION_BUS"] = os.getenv("INVALIDATION_BUS", "auto")
+    init_invalidation_bus(app)
+
+    app.config["ORDER_EVENTS_BACKEND"] = os.getenv("ORDER_EVENTS_BACKEND", "memory")
+    init_order_events(app)
+
+    app.config["CART_BACKEND"] = os.getenv("CART_BACKEND", "database")
+    app.config["CART_TTL_SECONDS"] = int(os.getenv("CART_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+    init_cart_store(app)
+
+    init_jobs(app)
+
+    app.config["ORDER_PENDING_TTL_MINUTES"] = int(os.getenv("ORDER_PENDING_TTL_MINUTES", str(24 * 60)))
+    app.config["ORDER_SWEEP_BATCH"] = int(os.getenv("ORDER_SWEEP_BATCH", "500"))
+    app.config["ORDER_SWEEP_INTERVAL_SECONDS"] = int(os.getenv("ORDER_SWEEP_INTERVAL_SECONDS", "0"))
+    init_order_sweeper(app)
+
+    app.config["RECOMMENDATIONS_TTL_SECONDS"] = int(os.getenv("RECOMMENDATIONS_TTL_SECONDS", "3600"))
+    app.config["RECOMMENDATIONS_REFRESH_SECONDS"] = int(os.getenv("RECOMMENDATIONS_REFRESH_SECONDS", "60"))
+    app.config["RECOMMENDATIONS_SCHEDULER"] = os.getenv("RECOMMENDATIONS_SCHEDULER", "1") == "1"
+    recommendations.init_recommendations(app)
+    subscribe(recommendations.on_catalog_change)
+
+    app.config["SEARCH_INDEX_WARM"] = os.getenv("SEARCH_INDEX_WARM", "1") == "1"
+    search_index.init_search_index(app)
+
     @app.get("/health")
     def health():
         return jsonify({"status": "ok", "service": "backend"}), 200
 
+    @app.get("/health/single-flight")
+    def health_single_flight():
+        return jsonify({"service": "single-flight", **single_flight.flights.snapshot_stats()}), 200
+
     @app.get("/health/db")
     def health_db():
+        # sa pozadinskom probom se vraca njen poslednji rezultat, bez upita po zahtevu
+        if db_health.probe_running() and db_health.last_probe is not None:
+            probe = db_health.last_probe
+            body = {"service": "db", "circuit": db_health.breaker.state, **probe}
+            if probe["status"] == "error":
+                return jsonify(body), 500
+            degraded = probe["status"] != "ok" or any(r["status"] != "ok" for r in probe.get("replicas") or ())
+            body["status"] = "degraded" if degraded else "ok"
+            return jsonify(body), 200
+
         try:
             with db.engine.connect() as conn:
                 result = conn.execute(text("SELECT 1;")).scalar()
-            return jsonify({"status": "ok", "service": "db", "result": result}), 200
+            body = {"status": "ok", "service": "db", "result": result}
+            replicas = replica_health(app)
+            if replicas is not None:
+                body["replicas"] = replicas
+                if any(r["status"] != "ok" for r in replicas):
+                    body["status"] = "degraded"
+            return jsonify(body), 200
         except Exception as e:
             return jsonify({"status": "error", "service": "db", "message": str(e)}), 500
 
@@ -5,6 +5,7 @@ from flask_login import login_user, logout_user, current_user
 
 from app.extensions import db
 from app.models import User
+from app.services.jobs import enqueue
 
 
 def register():
@@ -38,6 +39,8 @@ def register():
     )
 
     db.session.add(user)
+    db.session.flush()
+    enqueue("user.registered", {"user_id": user.id})
     db.session.commit()
 
     login_user(user)
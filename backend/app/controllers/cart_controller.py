@@ -0,0 +1,135 @@
+from flask import request, jsonify
+from flask_login import current_user
+
+from app.controllers.order_controller import place_order
+from app.services import cart_store
+from app.services.product_snapshot import snapshot as product_snapshot
+from app.money import format_cents, line_total_cents
+
+
+def _parse_quantity(value, allow_zero=False):
+    try:
+        qty = int(value)
+    except (TypeError, ValueError):
+        return None, "quantity must be an integer."
+    if qty < 0 or (qty == 0 and not allow_zero):
+        return None, "quantity must be > 0."
+    return qty, None
+
+
+def _check_product(product_id, quantity):
+    entry = product_snapshot.get_many({product_id}).get(product_id)
+    if entry is None:
+        return jsonify({"error": "Product not found."}), 404
+    if entry.stock < quantity:
+        return jsonify({"error": f"Not enough stock for product '{entry.name}'.", "available": entry.stock}), 400
+    return None
+
+
+def _cart_body(lines):
+    """
+    Cena i stanje se citaju iz product snapshot-a; stavke ciji je proizvod obrisan se preskacu.
+    """
+    entries = product_snapshot.get_many(lines.keys()) if lines else {}
+    items = []
+    total = 0
+    for pid, qty in lines.items():
+        e = entries.get(pid)
+        if e is None:
+            continue
+        line_total = line_total_cents(e.price_cents, qty)
+        total += line_total
+        items.append({
+            "product_id": pid,
+            "product_name": e.name,
+            "quantity": qty,
+            "price": format_cents(e.price_cents),
+            "line_total": format_cents(line_total),
+            "in_stock": e.stock >= qty,
+        })
+    return {"cart": {"items": items, "count": len(items), "total_price": format_cents(total)}}
+
+
+def view_cart():
+    return jsonify(_cart_body(cart_store.store.get(current_user.id))), 200
+
+
+def add_item():
+    """
+    Body: { product_id, quantity }. Kolicina se dodaje na postojecu stavku.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        pid = int(data.get("product_id"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "product_id must be an integer."}), 400
+    qty, error = _parse_quantity(data.get("quantity", 1))
+    if error:
+        return jsonify({"error": error}), 400
+
+    current = cart_store.store.get(current_user.id).get(pid, 0)
+    problem = _check_product(pid, current + qty)
+    if problem:
+        return problem
+
+    try:
+        cart_store.store.add(current_user.id, pid, qty)
+    except cart_store.CartFull as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(_cart_body(cart_store.store.get(current_user.id))), 200
+
+
+def update_item(product_id: int):
+    """
+    Body: { quantity }. quantity = 0 uklanja stavku.
+    """
+    data = request.get_json(silent=True) or {}
+    qty, error = _parse_quantity(data.get("quantity"), allow_zero=True)
+    if error:
+        return jsonify({"error": error}), 400
+
+    if qty == 0:
+        cart_store.store.remove(current_user.id, product_id)
+    else:
+        problem = _check_product(product_id, qty)
+        if problem:
+            return problem
+        try:
+            cart_store.store.set(current_user.id, product_id, qty)
+        except cart_store.CartFull as e:
+            return jsonify({"error": str(e)}), 400
+    return jsonify(_cart_body(cart_store.store.get(current_user.id))), 200
+
+
+def remove_item(product_id: int):
+    if not cart_store.store.remove(current_user.id, product_id):
+        return jsonify({"error": "Product is not in the cart."}), 404
+    return jsonify(_cart_body(cart_store.store.get(current_user.id))), 200
+
+
+def clear_cart():
+    cart_store.store.clear(current_user.id)
+    return jsonify({"message": "Cart cleared."}), 200
+
+
+def checkout():
+    """
+    Korpa -> Order kroz isti put kao create_order (snapshot + rezervacija, jedna transakcija).
+    Iz korpe se oduzimaju samo porucene kolicine (stavke dodate u medjuvremenu ostaju); sa korpom
+    u bazi u istoj transakciji kao porudzbina, inace posle njenog commita.
+    """
+    lines = cart_store.store.get(current_user.id)
+    if not lines:
+        return jsonify({"error": "Cart is empty."}), 400
+
+    store = cart_store.store
+    user_id = current_user.id
+    items = [{"product_id": pid, "quantity": qty} for pid, qty in lines.items()]
+    if getattr(store, "transactional", False):
+        # korpa u bazi: porudzbina i oduzimanje iz korpe su jedan commit
+        return place_order(items, before_commit=lambda: store.subtract(user_id, lines, commit=False))
+
+    rv = place_order(items)
+    if rv[1] == 201:
+        store.subtract(user_id, lines)
+    return rv
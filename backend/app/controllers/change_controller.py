@@ -0,0 +1,76 @@
+from flask import request, jsonify, current_app
+
+from app.money import format_cents
+from app.services.change_feed import (
+    decode_token, encode_token, fetch_changes, InvalidToken, DEFAULT_SAFETY_LAG_SECONDS,
+)
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+
+
+def _serialize(feed, obj):
+    if feed == "products":
+        return {
+            "id": obj.id,
+            "name": obj.name,
+            "unit": obj.unit,
+            "price": format_cents(obj.price_cents),
+            "stock": obj.stock,
+        }
+    if feed == "recipes":
+        return {
+            "id": obj.id,
+            "name": obj.name,
+            "description": obj.description,
+            "creator_id": obj.creator_id,
+        }
+    return {
+        "id": obj.id,
+        "recipe_id": obj.recipe_id,
+        "product_id": obj.product_id,
+        "product_name": obj.product.name,
+        "quantity": obj.quantity,
+        "unit": obj.unit,
+    }
+
+
+def list_changes():
+    """
+    Inkrementalna sinhronizacija kataloga: GET /api/changes?since=<token>&limit=
+    Bez since -> sve od pocetka. Klijent ponavlja sa "next" dok je has_more true.
+    limit je ukupan broj redova po strani; promene mladje od CHANGE_FEED_SAFETY_LAG_SECONDS
+    stizu na nekoj od sledecih sinhronizacija.
+    """
+    try:
+        cursor = decode_token((request.args.get("since") or "").strip())
+    except InvalidToken as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    lag = current_app.config.get("CHANGE_FEED_SAFETY_LAG_SECONDS", DEFAULT_SAFETY_LAG_SECONDS)
+    rows_by_feed, deleted_by_feed, next_cursor, has_more = fetch_changes(cursor, limit, lag)
+
+    changes = {}
+    for feed, rows in rows_by_feed.items():
+        since = cursor.get(feed)
+        created, updated = [], []
+        for obj in rows:
+            is_new = since is None or obj.created_at > since[0]
+            (created if is_new else updated).append(_serialize(feed, obj))
+        changes[feed] = {
+            "created": created,
+            "updated": updated,
+            "deleted": deleted_by_feed[feed],
+        }
+
+    return jsonify({
+        "changes": changes,
+        "next": encode_token(next_cursor),
+        "has_more": has_more,
+    }), 200
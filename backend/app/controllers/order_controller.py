@@ -1,23 +1,59 @@
-from decimal import Decimal
-from flask import request, jsonify
-from sqlalchemy import asc, desc
+import json
+from datetime import datetime
+from flask import request, jsonify, Response
+from sqlalchemy import asc, desc, bindparam, select
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from flask_login import current_user
 
 from app.extensions import db
-from app.models import Order, OrderItem, Product
+from app.models import Order, OrderItem
 from app.middlewares.order_rules import FINAL_STATUSES, is_final_status
+from app.middlewares.concurrency import check_if_match, precondition_failed, version_headers
+from app.middlewares.fieldsets import parse_fields, load_only_for, serialize
+from app.services import order_events
+from app.services.order_transitions import transition_orders, publish_transitions
+from app.services.jobs import enqueue
+from app.services.statement_cache import cached_statement
+from app.services.product_snapshot import snapshot as product_snapshot, reserve_stock, release_stock
+from app.money import format_cents, sum_line_totals
 
 ALLOWED_SORT = {"total_price", "created_at"}
 ALLOWED_DIR = {"asc", "desc"}
 ALLOWED_STATUS = {"PENDING", "PROCESSING", "PAID", "COMPLETED", "CANCELLED"}
+MAX_BULK_ORDERS = 1000
+LIST_FIELDS = {
+    "id": Order.id,
+    "user_id": Order.user_id,
+    "status": Order.status,
+    "total_price": Order.total_price_cents,
+    "created_at": Order.created_at,
+}
+FIELD_FORMATTERS = {
+    "total_price": lambda o: format_cents(o.total_price_cents),
+    "created_at": lambda o: o.created_at.isoformat() if o.created_at else None,
+}
 
 
-def _calc_total(order: Order) -> Decimal:
-    total = Decimal("0.00")
+def _calc_total(order: Order) -> int:
+    return sum_line_totals((it.price_at_purchase_cents, it.quantity) for it in order.items)
+
+
+def _reserve_items(parsed, entries):
+    """
+    Rezervise stanje za sve stavke u tekucoj transakciji.
+    Vraca product_id prve stavke koja nije prosla (nema stanja ili je verzija zastarela) ili None.
+    """
+    for it in parsed:
+        pid = it["product_id"]
+        if reserve_stock(pid, it["quantity"], entries[pid].version) is None:
+            return pid
+    return None
+
+
+def release_order_stock(order: Order):
     for it in order.items:
-        total += Decimal(str(it.price_at_purchase)) * it.quantity
-    return total
+        release_stock(it.product_id, it.quantity)
 
 
 def create_order():
@@ -54,32 +90,66 @@ def create_order():
 
         parsed.append({"product_id": pid, "quantity": qty})
 
+    return place_order(parsed)
+
+
+def place_order(parsed, before_commit=None):
+    """
+    parsed: [{product_id, quantity}, ...] (vec validirano). Rezervacija stanja, porudzbina
+    i order.created posao idu u jednu transakciju; koriste je create_order i checkout korpe.
+    before_commit se poziva u istoj transakciji, neposredno pre commita.
+    """
+    # cena i stanje se citaju iz snapshot-a; baza se dira samo za atomicnu rezervaciju stanja
     product_ids = {p["product_id"] for p in parsed}
-    products = Product.query.filter(Product.id.in_(product_ids)).all()
-    if len(products) != len(product_ids):
+    entries = product_snapshot.get_many(product_ids)
+    if len(entries) != len(product_ids):
         return jsonify({"error": "One or more products not found."}), 400
 
-    prod_map = {p.id: p for p in products}
-
-    order = Order(user_id=current_user.id, status="PENDING")
+    short = {it["product_id"] for it in parsed if entries[it["product_id"]].stock < it["quantity"]}
+    if short:
+        # snapshot moze da kasni (npr. dopuna stanja na drugom worker-u)
+        entries.update(product_snapshot.refresh(short))
 
     for it in parsed:
-        p = prod_map[it["product_id"]]
-        if p.stock < it["quantity"]:
-            return jsonify({"error": f"Not enough stock for product '{p.name}'."}), 400
+        e = entries[it["product_id"]]
+        if e.stock < it["quantity"]:
+            return jsonify({"error": f"Not enough stock for product '{e.name}'."}), 400
+
+    user_id = current_user.id
 
+    for attempt in range(2):
+        failed_pid = _reserve_items(parsed, entries)
+        if failed_pid is None:
+            break
+        db.session.rollback()
+        used_version = entries[failed_pid].version
+        entries.update(product_snapshot.refresh(product_ids))
+        e = entries.get(failed_pid)
+        if e is None:
+            return jsonify({"error": "One or more products not found."}), 400
+        if e.version == used_version or attempt == 1:
+            return jsonify({"error": f"Not enough stock for product '{e.name}'."}), 400
+
+    order = Order(user_id=user_id, status="PENDING")
+
+    for it in parsed:
+        e = entries[it["product_id"]]
         order.items.append(
             OrderItem(
-                product_id=p.id,
+                product_id=it["product_id"],
                 quantity=it["quantity"],
-                price_at_purchase=p.price, 
+                price_at_purchase_cents=e.price_cents,
             )
         )
 
-    order.total_price = _calc_total(order)
+    order.total_price_cents = _calc_total(order)
 
     db.session.add(order)
     try:
+        db.session.flush()
+        enqueue("order.created", {"order_id": order.id})
+        if before_commit is not None:
+            before_commit()
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
@@ -91,7 +161,7 @@ def create_order():
             "id": order.id,
             "user_id": order.user_id,
             "status": order.status,
-            "total_price": str(order.total_price),
+            "total_price": format_cents(order.total_price_cents),
             "created_at": order.created_at.isoformat() if order.created_at else None,
             "items": [
                 {
@@ -99,7 +169,7 @@ def create_order():
                     "product_id": oi.product_id,
                     "product_name": oi.product.name,
                     "quantity": oi.quantity,
-                    "price_at_purchase": str(oi.price_at_purchase),
+                    "price_at_purchase": format_cents(oi.price_at_purchase_cents),
                 }
                 for oi in order.items
             ]
@@ -107,6 +177,16 @@ def create_order():
     }), 201
 
 
+def _list_orders_stmt(fields, params, sort, direction):
+    stmt = select(Order).options(load_only_for(fields, LIST_FIELDS))
+    if "user_id" in params:
+        stmt = stmt.where(Order.user_id == bindparam("user_id"))
+    if "status" in params:
+        stmt = stmt.where(Order.status == bindparam("status"))
+    sort_col = getattr(Order, sort)
+    return stmt.order_by(asc(sort_col) if direction == "asc" else desc(sort_col))
+
+
 def list_orders():
     """
     Auth required.
@@ -122,43 +202,35 @@ def list_orders():
     if direction not in ALLOWED_DIR:
         direction = "desc"
 
-    q = Order.query
+    fields, error = parse_fields(LIST_FIELDS)
+    if error:
+        return jsonify({"error": error}), 400
 
+    params = {}
     role = (current_user.role or "").lower()
     if role == "user":
-        q = q.filter(Order.user_id == current_user.id)
+        params["user_id"] = current_user.id
     else:
         user_id = request.args.get("userId")
         status = (request.args.get("status") or "").strip().upper()
 
         if user_id:
             try:
-                uid = int(user_id)
+                params["user_id"] = int(user_id)
             except ValueError:
                 return jsonify({"error": "userId must be an integer"}), 400
-            q = q.filter(Order.user_id == uid)
 
         if status:
             if status not in ALLOWED_STATUS:
                 return jsonify({"error": f"Invalid status. Allowed: {sorted(ALLOWED_STATUS)}"}), 400
-            q = q.filter(Order.status == status)
-
-    sort_col = getattr(Order, sort)
-    q = q.order_by(asc(sort_col) if direction == "asc" else desc(sort_col))
+            params["status"] = status
 
-    orders = q.all()
+    key = ("orders.list", tuple(fields), "user_id" in params, "status" in params, sort, direction)
+    stmt = cached_statement(key, lambda: _list_orders_stmt(fields, params, sort, direction))
+    orders = db.session.execute(stmt, params).scalars().all()
 
     return jsonify({
-        "items": [
-            {
-                "id": o.id,
-                "user_id": o.user_id,
-                "status": o.status,
-                "total_price": str(o.total_price),
-                "created_at": o.created_at.isoformat() if o.created_at else None,
-            }
-            for o in orders
-        ],
+        "items": [serialize(o, fields, FIELD_FORMATTERS) for o in orders],
         "count": len(orders),
         "sort": sort,
         "dir": direction,
@@ -184,7 +256,7 @@ def get_order(order_id: int):
             "id": order.id,
             "user_id": order.user_id,
             "status": order.status,
-            "total_price": str(order.total_price),
+            "total_price": format_cents(order.total_price_cents),
             "created_at": order.created_at.isoformat() if order.created_at else None,
             "items": [
                 {
@@ -192,12 +264,12 @@ def get_order(order_id: int):
                     "product_id": oi.product_id,
                     "product_name": oi.product.name,
                     "quantity": oi.quantity,
-                    "price_at_purchase": str(oi.price_at_purchase),
+                    "price_at_purchase": format_cents(oi.price_at_purchase_cents),
                 }
                 for oi in order.items
             ]
         }
-    }), 200
+    }), 200, version_headers(order.version)
 
 
 def cancel_order(order_id: int):
@@ -214,8 +286,18 @@ def cancel_order(order_id: int):
     if (order.status or "").upper() != "PENDING":
         return jsonify({"error": "Only PENDING orders can be cancelled by user."}), 400
 
+    previous_status = order.status
     order.status = "CANCELLED"
-    db.session.commit()
+    enqueue("order.status_changed", {"order_id": order.id, "status": order.status, "previous_status": previous_status})
+    try:
+        release_order_stock(order)
+        db.session.commit()
+    except StaleDataError:
+        # admin, bulk prelaz ili sweeper je u medjuvremenu promenio porudzbinu
+        db.session.rollback()
+        return precondition_failed()
+
+    order_events.publish_status_change(order, previous_status)
 
     return jsonify({"message": "Order cancelled.", "status": order.status}), 200
 
@@ -228,6 +310,10 @@ def admin_update_status(order_id: int):
     if not order:
         return jsonify({"error": "Order not found."}), 404
 
+    conflict = check_if_match(order.version)
+    if conflict:
+        return conflict
+
     data = request.get_json(silent=True) or {}
     status = (data.get("status") or "").strip().upper()
 
@@ -237,7 +323,142 @@ def admin_update_status(order_id: int):
     if is_final_status(order.status) and status != order.status:
         return jsonify({"error": "Cannot change status after it is final."}), 400
 
+    previous_status = order.status
     order.status = status
+    if status == "CANCELLED" and previous_status != status:
+        release_order_stock(order)
+    if previous_status != status:
+        enqueue("order.status_changed", {"order_id": order.id, "status": status, "previous_status": previous_status})
+    try:
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return precondition_failed()
+
+    if previous_status != status:
+        order_events.publish_status_change(order, previous_status)
+
+    return jsonify({"message": "Status updated.", "status": order.status}), 200, version_headers(order.version)
+
+
+def _bulk_criteria(data):
+    """
+    Vraca (criteria, requested_ids, error). Prihvata "ids" ili "filter" {status, userId, createdBefore}.
+    """
+    ids = data.get("ids")
+    flt = data.get("filter")
+
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            return None, None, "ids must be a non-empty array."
+        try:
+            ids = sorted({int(i) for i in ids})
+        except (TypeError, ValueError):
+            return None, None, "ids must be integers."
+        if len(ids) > MAX_BULK_ORDERS:
+            return None, None, f"At most {MAX_BULK_ORDERS} ids per request."
+        return [Order.id.in_(ids)], ids, None
+
+    if not isinstance(flt, dict) or not flt:
+        return None, None, "Provide ids or a non-empty filter."
+
+    criteria = []
+    if flt.get("status"):
+        from_status = str(flt["status"]).strip().upper()
+        if from_status not in ALLOWED_STATUS:
+            return None, None, f"Invalid filter status. Allowed: {sorted(ALLOWED_STATUS)}"
+        criteria.append(Order.status == from_status)
+    if flt.get("userId") is not None:
+        try:
+            criteria.append(Order.user_id == int(flt["userId"]))
+        except (TypeError, ValueError):
+            return None, None, "userId must be an integer"
+    if flt.get("createdBefore"):
+        try:
+            criteria.append(Order.created_at < datetime.fromisoformat(str(flt["createdBefore"])))
+        except ValueError:
+            return None, None, "createdBefore must be an ISO datetime."
+    if not criteria:
+        return None, None, "Filter must contain status, userId or createdBefore."
+    return criteria, None, None
+
+
+def bulk_update_status():
+    """
+    Admin-only: PUT /api/orders/status
+    Body: { status, ids: [...] } ili { status, filter: {status, userId, createdBefore} }.
+    Jedan UPDATE za sve porudzbine; finalne (i one koje vec imaju taj status) se preskacu.
+    """
+    data = request.get_json(silent=True) or {}
+    status = (data.get("status") or "").strip().upper()
+    if status not in ALLOWED_STATUS:
+        return jsonify({"error": f"Invalid status. Allowed: {sorted(ALLOWED_STATUS)}"}), 400
+
+    criteria, requested_ids, error = _bulk_criteria(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    rows = transition_orders(status, criteria, limit=MAX_BULK_ORDERS)
     db.session.commit()
+    publish_transitions(rows)
+
+    body = {
+        "message": "Statuses updated.",
+        "status": status,
+        "updated": [r.id for r in rows],
+        "count": len(rows),
+    }
+    if requested_ids is not None:
+        updated = {r.id for r in rows}
+        skipped = [i for i in requested_ids if i not in updated]
+        found = dict(
+            db.session.query(Order.id, Order.status).filter(Order.id.in_(skipped)).all()
+        ) if skipped else {}
+        body["skipped"] = [
+            {
+                "id": i,
+                "reason": "not_found" if i not in found
+                else "unchanged" if found[i] == status
+                else "final",
+                "status": found.get(i),
+            }
+            for i in skipped
+        ]
+    else:
+        body["has_more"] = len(rows) == MAX_BULK_ORDERS
+    return jsonify(body), 200
+
 
-    return jsonify({"message": "Status updated.", "status": order.status}), 200
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def stream_order_status():
+    """
+    Auth required. SSE: GET /api/orders/stream
+    - User: promene statusa svojih porudzbina.
+    - Admin: promene statusa svih porudzbina.
+    """
+    role = (current_user.role or "").lower()
+    key = current_user.id if role == "user" else order_events.ALL_ORDERS
+    sub = order_events.broker.subscribe(key)
+
+    # stream moze da traje satima: konekcija ka bazi se vraca u pool pre nego sto pocne
+    db.session.close()
+
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                event = sub.get(timeout=SSE_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {event['event_id']}\nevent: order_status\ndata: {json.dumps(event)}\n\n"
+        finally:
+            order_events.broker.unsubscribe(sub)
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,10 +1,14 @@
 from flask import request, jsonify
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from flask_login import current_user
 
 from app.extensions import db
-from app.models import Order, OrderItem, Product
+from app.models import Order, OrderItem
+from app.middlewares.concurrency import precondition_failed
 from app.middlewares.order_rules import is_final_status
+from app.money import format_cents, sum_line_totals
+from app.services.product_snapshot import snapshot as product_snapshot, reserve_stock, release_stock
 
 
 def list_order_items():
@@ -40,7 +44,7 @@ def list_order_items():
                 "product_id": it.product_id,
                 "product_name": it.product.name,
                 "quantity": it.quantity,
-                "price_at_purchase": str(it.price_at_purchase),
+                "price_at_purchase": format_cents(it.price_at_purchase_cents),
             }
             for it in items
         ],
@@ -84,17 +88,26 @@ def update_order_item(item_id: int):
     if qty <= 0:
         return jsonify({"error": "quantity must be > 0."}), 400
 
-    product = Product.query.get(item.product_id)
-    if product and product.stock < qty:
-        return jsonify({"error": f"Not enough stock for product '{product.name}'."}), 400
+    # stanje je vec rezervisano za trenutnu kolicinu, rezervise se/oslobadja samo razlika
+    delta = qty - item.quantity
+    if delta > 0:
+        entry = product_snapshot.get_many([item.product_id]).get(item.product_id)
+        if entry and entry.stock < delta:
+            entry = product_snapshot.refresh([item.product_id]).get(item.product_id)
+        if entry and (entry.stock < delta or reserve_stock(item.product_id, delta) is None):
+            db.session.rollback()
+            return jsonify({"error": f"Not enough stock for product '{entry.name}'."}), 400
+    elif delta < 0:
+        release_stock(item.product_id, -delta)
 
     item.quantity = qty
 
-    total = 0
-    for it in order.items:
-        total += float(it.price_at_purchase) * it.quantity
-    order.total_price = total
+    order.total_price_cents = sum_line_totals((it.price_at_purchase_cents, it.quantity) for it in order.items)
 
-    db.session.commit()
+    try:
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return precondition_failed()
 
     return jsonify({"message": "Order item updated."}), 200
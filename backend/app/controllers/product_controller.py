@@ -1,13 +1,28 @@
 from decimal import Decimal, InvalidOperation
 from flask import request, jsonify
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 from sqlalchemy import asc, desc
 
 from app.extensions import db
 from app.models import Product
+from app.money import to_cents, format_cents
+from app.middlewares.concurrency import check_if_match, precondition_failed, version_headers
+from app.middlewares.fieldsets import parse_fields, load_only_for, serialize
+from app.services import product_facets
 
 ALLOWED_SORT_FIELDS = {"name", "unit", "price", "stock", "created_at"}
 ALLOWED_SORT_DIR = {"asc", "desc"}
+FACET_PARAMS = ("unit", "min_price", "max_price", "in_stock", "facets")
+SORT_KEYS = {"price": "price_cents"}
+LIST_FIELDS = {
+    "id": Product.id,
+    "name": Product.name,
+    "unit": Product.unit,
+    "price": Product.price_cents,
+    "stock": Product.stock,
+}
+FIELD_FORMATTERS = {"price": lambda p: format_cents(p.price_cents)}
 
 
 def _parse_price(value):
@@ -15,6 +30,8 @@ def _parse_price(value):
         d = Decimal(str(value))
     except (InvalidOperation, TypeError):
         return None
+    if not d.is_finite():
+        return None
     return d
 
 
@@ -44,7 +61,7 @@ def create_product():
     if stock < 0:
         return jsonify({"error": "Stock must be >= 0."}), 400
 
-    product = Product(name=name, unit=unit, price=price, stock=stock)
+    product = Product(name=name, unit=unit, price_cents=to_cents(price), stock=stock)
 
     db.session.add(product)
     try:
@@ -59,7 +76,7 @@ def create_product():
             "id": product.id,
             "name": product.name,
             "unit": product.unit,
-            "price": str(product.price),
+            "price": format_cents(product.price_cents),
             "stock": product.stock,
         }
     }), 201
@@ -70,6 +87,10 @@ def update_product(product_id: int):
     if not product:
         return jsonify({"error": "Product not found."}), 404
 
+    conflict = check_if_match(product.version)
+    if conflict:
+        return conflict
+
     data = request.get_json(silent=True) or {}
 
     if "name" in data:
@@ -88,7 +109,7 @@ def update_product(product_id: int):
         price = _parse_price(data.get("price"))
         if price is None or price <= 0:
             return jsonify({"error": "Price must be a number > 0."}), 400
-        product.price = price
+        product.price_cents = to_cents(price)
 
     if "stock" in data:
         try:
@@ -104,6 +125,9 @@ def update_product(product_id: int):
     except IntegrityError:
         db.session.rollback()
         return jsonify({"error": "Product name must be unique."}), 409
+    except StaleDataError:
+        db.session.rollback()
+        return precondition_failed()
 
     return jsonify({
         "message": "Product updated.",
@@ -111,10 +135,10 @@ def update_product(product_id: int):
             "id": product.id,
             "name": product.name,
             "unit": product.unit,
-            "price": str(product.price),
+            "price": format_cents(product.price_cents),
             "stock": product.stock,
         }
-    }), 200
+    }), 200, version_headers(product.version)
 
 
 def delete_product(product_id: int):
@@ -138,7 +162,14 @@ def list_products():
     if direction not in ALLOWED_SORT_DIR:
         direction = "desc"
 
-    q = Product.query
+    fields, error = parse_fields(LIST_FIELDS)
+    if error:
+        return jsonify({"error": error}), 400
+
+    if any(p in request.args for p in FACET_PARAMS):
+        return _list_products_faceted(search, sort, direction, fields)
+
+    q = Product.query.options(load_only_for(fields, LIST_FIELDS))
 
     if search:
         q = q.filter(Product.name.ilike(f"%{search}%"))
@@ -149,16 +180,7 @@ def list_products():
     products = q.all()
 
     return jsonify({
-        "items": [
-            {
-                "id": p.id,
-                "name": p.name,
-                "unit": p.unit,
-                "price": str(p.price),
-                "stock": p.stock,
-            }
-            for p in products
-        ],
+        "items": [serialize(p, fields, FIELD_FORMATTERS) for p in products],
         "count": len(products),
         "search": search,
         "sort": sort,
@@ -166,6 +188,61 @@ def list_products():
     }), 200
 
 
+def _parse_price_filter(name):
+    raw = (request.args.get(name) or "").strip()
+    if not raw:
+        return None, None
+    price = _parse_price(raw)
+    if price is None or price < 0:
+        return None, f"{name} must be a number >= 0."
+    return to_cents(price), None
+
+
+def _list_products_faceted(search, sort, direction, fields):
+    """
+    Filtriranje po jedinici, cenovnom opsegu i stanju iz memorijskih indeksa (product_facets),
+    uz brojace po facetu; ?search se primenjuje na rezultat kao i ilike.
+    """
+    units = [u.strip() for u in (request.args.get("unit") or "").split(",") if u.strip()]
+    in_stock = (request.args.get("in_stock") or "").strip().lower() in {"1", "true", "yes"}
+
+    min_cents, error = _parse_price_filter("min_price")
+    if error:
+        return jsonify({"error": error}), 400
+    max_cents, error = _parse_price_filter("max_price")
+    if error:
+        return jsonify({"error": error}), 400
+    if min_cents is not None and max_cents is not None and min_cents > max_cents:
+        return jsonify({"error": "min_price must be <= max_price."}), 400
+
+    product_facets.ensure_current()
+    rows, facets = product_facets.index.query(units, min_cents, max_cents, in_stock)
+
+    if search:
+        needle = search.casefold()
+        rows = [r for r in rows if needle in r.name.casefold()]
+
+    key = SORT_KEYS.get(sort, sort)
+    rows.sort(key=lambda r: r.id, reverse=direction == "desc")
+    rows.sort(key=lambda r: (getattr(r, key) is None, getattr(r, key) if getattr(r, key) is not None else ""),
+              reverse=direction == "desc")
+
+    return jsonify({
+        "items": [serialize(r, fields, FIELD_FORMATTERS) for r in rows],
+        "count": len(rows),
+        "facets": facets,
+        "filters": {
+            "unit": units,
+            "minPrice": format_cents(min_cents),
+            "maxPrice": format_cents(max_cents),
+            "inStock": in_stock,
+        },
+        "search": search,
+        "sort": sort,
+        "dir": direction,
+    }), 200
+
+
 def get_product(product_id: int):
     p = Product.query.get(product_id)
     if not p:
@@ -176,7 +253,7 @@ def get_product(product_id: int):
             "id": p.id,
             "name": p.name,
             "unit": p.unit,
-            "price": str(p.price),
+            "price": format_cents(p.price_cents),
             "stock": p.stock,
         }
-    }), 200
+    }), 200, version_headers(p.version)
@@ -1,13 +1,29 @@
 from flask import request, jsonify
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import asc, desc
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy import asc, desc, select, func, literal_column, insert, update, delete, bindparam
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from flask_login import current_user
 
 from app.extensions import db
-from app.models import Recipe, RecipeIngredient, Product
+from app.models import Recipe, RecipeIngredient, Product, User
+from app.money import format_cents
+from app.middlewares.concurrency import check_if_match, precondition_failed, version_headers
+from app.middlewares.fieldsets import parse_fields, load_only_for, serialize
+from app.services.catalog_events import record_change
+from app.services.change_feed import write_tombstones
+from app.services.statement_cache import cached_statement
 
 ALLOWED_SORT = {"name"}
 ALLOWED_DIR = {"asc", "desc"}
+LIST_FIELDS = {
+    "id": Recipe.id,
+    "name": Recipe.name,
+    "description": Recipe.description,
+    "creator_id": Recipe.creator_id,
+}
+DEFAULT_LIST_FIELDS = ("id", "name", "description")
+COUNT_PRODUCTS_STMT = select(func.count(Product.id)).where(Product.id.in_(bindparam("ids", expanding=True)))
 
 
 def _validate_ingredient_obj(obj):
@@ -58,8 +74,8 @@ def create_recipe():
         parsed.append(v)
 
     product_ids = {p["product_id"] for p in parsed}
-    products = Product.query.filter(Product.id.in_(product_ids)).all()
-    if len(products) != len(product_ids):
+    found = db.session.execute(COUNT_PRODUCTS_STMT, {"ids": list(product_ids)}).scalar()
+    if found != len(product_ids):
         return jsonify({"error": "One or more products not found."}), 400
 
     recipe = Recipe(
@@ -105,11 +121,78 @@ def create_recipe():
     }), 201
 
 
+def _apply_ingredient_diff(recipe_id: int, parsed):
+    """
+    Poredi nove sastojke sa postojecim redovima po product_id i salje samo
+    bulk DELETE / UPDATE / INSERT za promenjene proizvode; nepromenjeni redovi zadrzavaju id.
+    Vraca {"created": [...], "updated": [...], "deleted": [...]}.
+    """
+    existing = {
+        r.product_id: r
+        for r in db.session.execute(
+            select(RecipeIngredient.id, RecipeIngredient.product_id, RecipeIngredient.quantity, RecipeIngredient.unit)
+            .where(RecipeIngredient.recipe_id == recipe_id)
+        )
+    }
+    wanted = {ing["product_id"]: ing for ing in parsed}
+
+    to_delete = [r for pid, r in existing.items() if pid not in wanted]
+    to_update = [
+        {"id": existing[pid].id, "quantity": ing["quantity"], "unit": ing["unit"]}
+        for pid, ing in wanted.items()
+        if pid in existing and (existing[pid].quantity, existing[pid].unit) != (ing["quantity"], ing["unit"])
+    ]
+    to_insert = [
+        {"recipe_id": recipe_id, "product_id": pid, "quantity": ing["quantity"], "unit": ing["unit"]}
+        for pid, ing in wanted.items()
+        if pid not in existing
+    ]
+
+    session = db.session()
+    diff = {"created": [], "updated": [], "deleted": []}
+
+    if to_delete:
+        ids = [r.id for r in to_delete]
+        db.session.execute(
+            delete(RecipeIngredient).where(RecipeIngredient.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        write_tombstones(session, "recipe_ingredient", ids)
+        for r in to_delete:
+            record_change(session, "recipe_ingredient", r.id, "deleted", {"recipe_id": recipe_id, "product_id": r.product_id})
+            diff["deleted"].append({"id": r.id, "product_id": r.product_id})
+
+    if to_update:
+        db.session.execute(update(RecipeIngredient), to_update)
+        pid_by_id = {r.id: pid for pid, r in existing.items()}
+        for row in to_update:
+            pid = pid_by_id[row["id"]]
+            values = {"recipe_id": recipe_id, "product_id": pid, "quantity": row["quantity"], "unit": row["unit"]}
+            record_change(session, "recipe_ingredient", row["id"], "updated", values)
+            diff["updated"].append({"id": row["id"], "product_id": pid, "quantity": row["quantity"], "unit": row["unit"]})
+
+    if to_insert:
+        inserted = db.session.execute(
+            insert(RecipeIngredient).returning(RecipeIngredient.id, RecipeIngredient.product_id),
+            to_insert,
+        ).all()
+        for row_id, pid in inserted:
+            ing = wanted[pid]
+            values = {"recipe_id": recipe_id, "product_id": pid, "quantity": ing["quantity"], "unit": ing["unit"]}
+            record_change(session, "recipe_ingredient", row_id, "created", values)
+            diff["created"].append({"id": row_id, "product_id": pid, "quantity": ing["quantity"], "unit": ing["unit"]})
+
+    return diff
+
+
 def update_recipe(recipe_id: int):
     recipe = Recipe.query.get(recipe_id)
     if not recipe:
         return jsonify({"error": "Recipe not found."}), 404
 
+    conflict = check_if_match(recipe.version)
+    if conflict:
+        return conflict
+
     data = request.get_json(silent=True) or {}
 
     if "name" in data:
@@ -136,34 +219,38 @@ def update_recipe(recipe_id: int):
             parsed.append(v)
 
         product_ids = {p["product_id"] for p in parsed}
-        products = Product.query.filter(Product.id.in_(product_ids)).all()
-        if len(products) != len(product_ids):
+        if len(product_ids) != len(parsed):
+            return jsonify({"error": "Duplicate product in ingredients."}), 409
+        found = db.session.execute(COUNT_PRODUCTS_STMT, {"ids": list(product_ids)}).scalar()
+        if found != len(product_ids):
             return jsonify({"error": "One or more products not found."}), 400
 
-        recipe.ingredients.clear()
-        for ing in parsed:
-            recipe.ingredients.append(
-                RecipeIngredient(
-                    product_id=ing["product_id"],
-                    quantity=ing["quantity"],
-                    unit=ing["unit"],
-                )
-            )
-
+    diff = None
     try:
+        if "ingredients" in data:
+            diff = _apply_ingredient_diff(recipe.id, parsed)
+            if any(diff.values()):
+                recipe.updated_at = db.func.now()
+                record_change(db.session(), "recipe", recipe.id, "updated")
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
         return jsonify({"error": "Recipe name must be unique OR duplicate product in ingredients."}), 409
+    except StaleDataError:
+        db.session.rollback()
+        return precondition_failed()
 
-    return jsonify({
+    body = {
         "message": "Recipe updated.",
         "recipe": {
             "id": recipe.id,
             "name": recipe.name,
             "description": recipe.description,
         }
-    }), 200
+    }
+    if diff is not None:
+        body["ingredients"] = diff
+    return jsonify(body), 200, version_headers(recipe.version)
 
 
 def delete_recipe(recipe_id: int):
@@ -198,7 +285,167 @@ def get_recipe(recipe_id: int):
                 for ri in recipe.ingredients
             ],
         }
-    }), 200
+    }), 200, version_headers(recipe.version)
+
+
+def _recipe_full_pg_stmt():
+    ingredient = func.json_build_object(
+        "id", RecipeIngredient.id,
+        "product_id", Product.id,
+        "product_name", Product.name,
+        "quantity", RecipeIngredient.quantity,
+        "unit", RecipeIngredient.unit,
+        "product_unit", Product.unit,
+        "price_cents", Product.price_cents,
+        "stock", Product.stock,
+    )
+    ingredients = func.coalesce(
+        func.json_agg(aggregate_order_by(ingredient, RecipeIngredient.id)).filter(RecipeIngredient.id.isnot(None)),
+        literal_column("'[]'::json"),
+    )
+    total_cost = func.coalesce(func.sum(Product.price_cents * RecipeIngredient.quantity), 0)
+
+    return (
+        select(
+            Recipe.id, Recipe.name, Recipe.description, Recipe.creator_id, Recipe.version,
+            User.name.label("creator_name"),
+            ingredients.label("ingredients"),
+            total_cost.label("total_cost"),
+        )
+        .join(User, User.id == Recipe.creator_id)
+        .outerjoin(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id)
+        .outerjoin(Product, Product.id == RecipeIngredient.product_id)
+        .where(Recipe.id == bindparam("recipe_id"))
+        .group_by(Recipe.id, User.id)
+    )
+
+
+RECIPE_FULL_PG_STMT = _recipe_full_pg_stmt()
+
+
+def _recipe_full_pg(recipe_id: int):
+    """
+    Postgres: jedan upit, sastojci se agregiraju u JSON niz na strani baze.
+    """
+    row = db.session.execute(RECIPE_FULL_PG_STMT, {"recipe_id": recipe_id}).one_or_none()
+    if row is None:
+        return None
+
+    ingredients = row.ingredients
+    for ing in ingredients:
+        ing["price"] = format_cents(ing.pop("price_cents"))
+
+    return {
+        "id": row.id,
+        "name": row.name,
+        "description": row.description,
+        "creator_id": row.creator_id,
+        "creator_name": row.creator_name,
+        "version": row.version,
+        "ingredients": ingredients,
+        "total_cost": int(row.total_cost),
+    }
+
+
+RECIPE_FULL_JOINED_STMT = (
+    select(
+        Recipe.id, Recipe.name, Recipe.description, Recipe.creator_id, Recipe.version,
+        User.name.label("creator_name"),
+        RecipeIngredient.id.label("ri_id"),
+        RecipeIngredient.quantity,
+        RecipeIngredient.unit,
+        Product.id.label("product_id"),
+        Product.name.label("product_name"),
+        Product.unit.label("product_unit"),
+        Product.price_cents,
+        Product.stock,
+    )
+    .join(User, User.id == Recipe.creator_id)
+    .outerjoin(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id)
+    .outerjoin(Product, Product.id == RecipeIngredient.product_id)
+    .where(Recipe.id == bindparam("recipe_id"))
+    .order_by(RecipeIngredient.id)
+)
+
+
+def _recipe_full_joined(recipe_id: int):
+    """
+    Ostale baze (SQLite): jedan join upit, redovi se spajaju u Python-u.
+    """
+    rows = db.session.execute(RECIPE_FULL_JOINED_STMT, {"recipe_id": recipe_id}).all()
+    if not rows:
+        return None
+
+    first = rows[0]
+    total_cost = 0
+    ingredients = []
+    for r in rows:
+        if r.ri_id is None:
+            continue
+        total_cost += r.price_cents * r.quantity
+        ingredients.append({
+            "id": r.ri_id,
+            "product_id": r.product_id,
+            "product_name": r.product_name,
+            "quantity": r.quantity,
+            "unit": r.unit,
+            "product_unit": r.product_unit,
+            "price": format_cents(r.price_cents),
+            "stock": r.stock,
+        })
+
+    return {
+        "id": first.id,
+        "name": first.name,
+        "description": first.description,
+        "creator_id": first.creator_id,
+        "creator_name": first.creator_name,
+        "version": first.version,
+        "ingredients": ingredients,
+        "total_cost": total_cost,
+    }
+
+
+def get_recipe_full(recipe_id: int):
+    """
+    Recept + sastojci + cena/stanje/jedinica proizvoda + ime autora + ukupna cena, iz jednog SQL upita.
+    """
+    if db.session.get_bind().dialect.name == "postgresql":
+        recipe = _recipe_full_pg(recipe_id)
+    else:
+        recipe = _recipe_full_joined(recipe_id)
+
+    if recipe is None:
+        return jsonify({"error": "Recipe not found."}), 404
+
+    version = recipe.pop("version")
+    recipe["total_cost"] = format_cents(recipe["total_cost"])
+
+    return jsonify({"recipe": recipe}), 200, version_headers(version)
+
+
+def _list_recipes_stmt(fields, params, sort, direction):
+    sort_col = getattr(Recipe, sort)
+    stmt = select(Recipe).options(load_only_for(fields, LIST_FIELDS, sort_col))
+
+    if "product_id" in params:
+        stmt = stmt.join(RecipeIngredient).where(RecipeIngredient.product_id == bindparam("product_id"))
+
+    if "pattern" in params:
+        pattern = bindparam("pattern")
+        stmt = (
+            stmt.outerjoin(RecipeIngredient)
+                .outerjoin(Product, Product.id == RecipeIngredient.product_id)
+                .where(
+                    db.or_(
+                        Recipe.name.ilike(pattern),
+                        Recipe.description.ilike(pattern),
+                        Product.name.ilike(pattern),
+                    )
+                )
+        )
+
+    return stmt.distinct().order_by(asc(sort_col) if direction == "asc" else desc(sort_col))
 
 
 def list_recipes():
@@ -212,44 +459,26 @@ def list_recipes():
     if direction not in ALLOWED_DIR:
         direction = "asc"
 
-    q = Recipe.query
+    fields, error = parse_fields(LIST_FIELDS, DEFAULT_LIST_FIELDS)
+    if error:
+        return jsonify({"error": error}), 400
 
+    params = {}
     if product_id:
         try:
-            pid = int(product_id)
+            params["product_id"] = int(product_id)
         except ValueError:
             return jsonify({"error": "productId must be an integer"}), 400
-        q = q.join(RecipeIngredient).filter(RecipeIngredient.product_id == pid)
 
     if search:
-        q = (
-            q.outerjoin(RecipeIngredient)
-             .outerjoin(Product, Product.id == RecipeIngredient.product_id)
-             .filter(
-                 db.or_(
-                     Recipe.name.ilike(f"%{search}%"),
-                     Recipe.description.ilike(f"%{search}%"),
-                     Product.name.ilike(f"%{search}%"),
-                 )
-             )
-        )
-
-    q = q.distinct()
-
-    sort_col = getattr(Recipe, sort)
-    q = q.order_by(asc(sort_col) if direction == "asc" else desc(sort_col))
+        params["pattern"] = f"%{search}%"
 
-    items = q.all()
+    key = ("recipes.list", tuple(fields), "product_id" in params, bool(search), sort, direction)
+    stmt = cached_statement(key, lambda: _list_recipes_stmt(fields, params, sort, direction))
+    items = db.session.execute(stmt, params).scalars().all()
 
     return jsonify({
-        "items": [
-            {
-                "id": r.id,
-                "name": r.name,
-                "description": r.description,
-            }
-            for r in items
-        ],
+        "items": [serialize(r, fields) for r in items],
         "count": len(items),
         "search": search,
         "sort": sort,
@@ -1,8 +1,10 @@
 from flask import request, jsonify
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.extensions import db
 from app.models import RecipeIngredient, Product, Recipe
+from app.middlewares.concurrency import check_if_match, precondition_failed, version_headers
 
 
 def list_recipe_ingredients():
@@ -49,7 +51,7 @@ def get_recipe_ingredient(ri_id: int):
             "quantity": ri.quantity,
             "unit": ri.unit,
         }
-    }), 200
+    }), 200, version_headers(ri.recipe.version)
 
 
 def update_recipe_ingredient(ri_id: int):
@@ -57,6 +59,12 @@ def update_recipe_ingredient(ri_id: int):
     if not ri:
         return jsonify({"error": "RecipeIngredient not found."}), 404
 
+    # sastojci nemaju svoju verziju, verzionise se ceo recept
+    recipe = ri.recipe
+    conflict = check_if_match(recipe.version)
+    if conflict:
+        return conflict
+
     data = request.get_json(silent=True) or {}
 
     if "product_id" in data:
@@ -83,13 +91,18 @@ def update_recipe_ingredient(ri_id: int):
             return jsonify({"error": "unit must be at most 50 characters"}), 400
         ri.unit = unit
 
+    recipe.updated_at = db.func.now()
+
     try:
         db.session.commit()
     except IntegrityError:
         db.session.rollback()
         return jsonify({"error": "Duplicate product in same recipe is not allowed."}), 409
+    except StaleDataError:
+        db.session.rollback()
+        return precondition_failed()
 
-    return jsonify({"message": "RecipeIngredient updated."}), 200
+    return jsonify({"message": "RecipeIngredient updated."}), 200, version_headers(recipe.version)
 
 
 def delete_recipe_ingredient(ri_id: int):
@@ -0,0 +1,48 @@
+from flask import request, jsonify
+
+from app.services import recommendations
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 20
+
+
+def _parse_limit():
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        return None
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def related_recipes(recipe_id: int):
+    """
+    "Ko je kupovao ove proizvode, kuvao je i...": GET /api/recipes/<id>/related
+    """
+    limit = _parse_limit()
+    if limit is None:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    # recept koji jos nije u modelu (tek dodat) dobija praznu listu do sledeceg rebuild-a
+    items = recommendations.related_recipes(recipe_id, limit)
+    return jsonify({"items": items, "count": len(items), "recipeId": recipe_id}), 200
+
+
+def cart_recommendations():
+    """
+    GET /api/recommendations?cart=1,2,3  (product id-jevi iz korpe)
+    """
+    limit = _parse_limit()
+    if limit is None:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    raw = (request.args.get("cart") or "").strip()
+    try:
+        product_ids = {int(p) for p in raw.split(",") if p.strip()}
+    except ValueError:
+        return jsonify({"error": "cart must be a comma separated list of product ids"}), 400
+
+    if not product_ids:
+        return jsonify({"error": "cart query param is required."}), 400
+
+    items = recommendations.for_cart(product_ids, limit)
+    return jsonify({"items": items, "count": len(items), "cart": sorted(product_ids)}), 200
@@ -0,0 +1,34 @@
+from flask import request, jsonify
+
+from app.services.search_index import ensure_built, index
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+ALLOWED_TYPES = {"product", "recipe"}
+
+
+def suggest():
+    """
+    Typeahead: GET /api/search/suggest?q=&limit=&type=
+    Odgovara iz memorijskog prefiks indeksa, bez upita ka bazi.
+    """
+    q = (request.args.get("q") or "").strip()
+    kind = (request.args.get("type") or "").strip().lower()
+
+    try:
+        limit = int(request.args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    if kind and kind not in ALLOWED_TYPES:
+        return jsonify({"error": f"Invalid type. Allowed: {sorted(ALLOWED_TYPES)}"}), 400
+
+    ensure_built()
+    items = index.suggest(q, limit=limit, kinds={kind} if kind else None) if q else []
+
+    return jsonify({
+        "items": items,
+        "count": len(items),
+        "q": q,
+    }), 200
@@ -1,7 +1,26 @@
+import os
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 
-db = SQLAlchemy()
-migrate = Migrate()
+from app.services.db_routing import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 login_manager = LoginManager()
+migrate = None
+
+
+def init_migrate(app):
+    """
+    Flask-Migrate povlaci alembic (~200ms importa), a treba samo za `flask db ...` komande.
+    Zato se ucitava samo kad app pokrece flask CLI ili kad je ENABLE_MIGRATE=1.
+    """
+    global migrate
+    from_cli = os.getenv("FLASK_RUN_FROM_CLI") == "true"
+    if not (from_cli or app.config.get("ENABLE_MIGRATE")):
+        return
+
+    from flask_migrate import Migrate
+
+    if migrate is None:
+        migrate = Migrate()
+    migrate.init_app(app, db)
@@ -0,0 +1,77 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_COMPRESS_SIZE = 500
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/plain", "text/html", "text/csv"}
+
+
+def supported_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str):
+    """
+    Bira najbolji encoding iz Accept-Encoding headera (br > gzip).
+    Vraca None ako klijent ne prihvata nista sto podrzavamo.
+    """
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+
+    for enc in supported_encodings():
+        q = accepted.get(enc, accepted.get("*", 0.0))
+        if q > 0:
+            return enc
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    return data
+
+
+def init_compression(app):
+    min_size = int(app.config.get("COMPRESS_MIN_SIZE", MIN_COMPRESS_SIZE))
+
+    @app.after_request
+    def compress_response(response):
+        if response.direct_passthrough or response.is_streamed:
+            return response
+        if response.status_code != 200 or "Content-Encoding" in response.headers:
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+
+        response.vary.add("Accept-Encoding")
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+        if not encoding:
+            return response
+
+        response.set_data(compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,46 @@
+from flask import request, jsonify
+
+
+def etag_for(version) -> str:
+    return f'"{version}"'
+
+
+def version_headers(version) -> dict:
+    return {"ETag": etag_for(version)}
+
+
+def _parse_if_match(value: str):
+    tags = []
+    for part in (value or "").split(","):
+        tag = part.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag:
+            tags.append(tag)
+    return tags
+
+
+def check_if_match(current_version):
+    """
+    Optimisticka kontrola: ako klijent posalje If-Match, verzija mora da se poklapa.
+    Bez headera zahtev prolazi (kompatibilnost sa starim klijentima).
+    Vraca (response, status) za 412 ili None.
+    """
+    header = request.headers.get("If-Match")
+    if header is None:
+        return None
+
+    tags = _parse_if_match(header)
+    if "*" in tags or str(current_version) in tags:
+        return None
+
+    return precondition_failed(current_version)
+
+
+def precondition_failed(current_version=None):
+    body = {"error": "Resource was modified by another request. Reload and try again."}
+    if current_version is not None:
+        body["version"] = current_version
+        return jsonify(body), 412, version_headers(current_version)
+    return jsonify(body), 412
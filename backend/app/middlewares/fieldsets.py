@@ -0,0 +1,41 @@
+from flask import request
+from sqlalchemy.orm import load_only
+
+
+def parse_fields(allowed, default=None):
+    """
+    ?fields=name,price -> ["id", "name", "price"] (id je uvek ukljucen, redosled iz allow-liste).
+    allowed: ime polja u API-ju -> kolona (ili torka kolona) koja mu treba.
+    Vraca (fields, error); bez parametra vraca default (ili sva polja).
+    """
+    raw = (request.args.get("fields") or "").strip()
+    if not raw:
+        return list(default or allowed), None
+
+    requested = {f.strip() for f in raw.split(",") if f.strip()}
+    unknown = requested - allowed.keys()
+    if unknown:
+        return None, f"Unknown fields: {sorted(unknown)}. Allowed: {sorted(allowed)}"
+    requested.add("id")
+    return [f for f in allowed if f in requested], None
+
+
+def load_only_for(fields, allowed, *extra):
+    """
+    load_only opcija za izabrana polja, pa ostale kolone (npr. Recipe.description) ne izlaze iz baze.
+    extra: kolone koje upit mora da ima i kad nisu trazene (npr. ORDER BY uz DISTINCT).
+    """
+    columns = list(extra)
+    for f in fields:
+        cols = allowed[f]
+        columns.extend(cols if isinstance(cols, tuple) else (cols,))
+    return load_only(*columns)
+
+
+def serialize(obj, fields, formatters=None):
+    """
+    Cita samo izabrana polja (neucitana kolona bi okinula dodatni upit);
+    formatters: polje -> fn(obj) za izvedena polja (npr. price iz price_cents).
+    """
+    formatters = formatters or {}
+    return {f: formatters[f](obj) if f in formatters else getattr(obj, f) for f in fields}
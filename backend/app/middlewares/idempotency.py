@@ -0,0 +1,265 @@
+import hashlib
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from functools import wraps
+
+import click
+from flask import request, jsonify, current_app, make_response, Response
+from flask.cli import AppGroup
+from flask_login import current_user
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.extensions import db
+from app.models import IdempotencyKey
+from app.services.jobs import utcnow
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_MAX_KEYS = 50_000
+# kljuc u obradi ciji worker je pao preuzima se posle ovoliko sekundi
+DEFAULT_IN_FLIGHT_SECONDS = 60
+MAX_KEY_LENGTH = 255
+REPLAY_HEADERS = ("Content-Type", "ETag", "Location")
+
+_IN_FLIGHT = object()
+
+
+idempotency_cli = AppGroup("idempotency", help="Idempotency-Key store.")
+
+
+class IdempotencyStore:
+    """
+    IDEMPOTENCY_BACKEND=memory, samo za jedan proces: ponovljen zahtev koji stigne
+    na drugi worker bi se ponovo izvrsio. Kompaktan kljuc -> sacuvan odgovor sa TTL-om.
+    Kljucevi se cuvaju po redosledu isteka (TTL je isti za sve), pa se istekli
+    brisu sa pocetka OrderedDict-a bez skeniranja celog store-a.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS, max_keys=DEFAULT_MAX_KEYS):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._entries:
+            key, (expires_at, _, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_keys:
+                break
+            self._entries.popitem(last=False)
+
+    def begin(self, key, fingerprint):
+        """
+        Vraca ("new", None), ("replay", saved), ("in_flight", None) ili ("mismatch", None).
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = (now + self.ttl, fingerprint, _IN_FLIGHT)
+                return "new", None
+
+            _, saved_fingerprint, saved = entry
+            if saved_fingerprint != fingerprint:
+                return "mismatch", None
+            if saved is _IN_FLIGHT:
+                return "in_flight", None
+            return "replay", saved
+
+    def finish(self, key, fingerprint, saved):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, fingerprint, saved)
+
+    def abort(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_INSERT = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+
+class DatabaseIdempotencyStore:
+    """
+    Podrazumevani, deljeni backend: red po kljucu u idempotency_keys sa UNIQUE
+    (user_id, method, path, key), pa ponovljen zahtev vidi isti kljuc na svakom worker-u.
+    Oznaka "u obradi" se upisuje i commituje pre handlera (INSERT ... ON CONFLICT DO NOTHING);
+    istekao red (TTL, ili oznaka ciji worker nije zavrsio) preuzima sledeci zahtev.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS, in_flight_seconds=DEFAULT_IN_FLIGHT_SECONDS):
+        self.ttl = ttl
+        self.in_flight_seconds = in_flight_seconds
+
+    @staticmethod
+    def _where(key):
+        user_id, method, path, raw_key = key
+        return (
+            IdempotencyKey.user_id == int(user_id or 0),
+            IdempotencyKey.method == method,
+            IdempotencyKey.path == path,
+            IdempotencyKey.key == raw_key,
+        )
+
+    def begin(self, key, fingerprint):
+        user_id, method, path, raw_key = key
+        now = utcnow()
+        lease = now + timedelta(seconds=self.in_flight_seconds)
+        table = IdempotencyKey.__table__
+        insert = _INSERT[db.session.get_bind().dialect.name]
+        stmt = insert(table).values(
+            user_id=int(user_id or 0), method=method, path=path, key=raw_key,
+            fingerprint=fingerprint, expires_at=lease,
+        ).on_conflict_do_nothing(
+            index_elements=[table.c.user_id, table.c.method, table.c.path, table.c.key],
+        ).returning(table.c.id)
+        if db.session.execute(stmt).scalar() is not None:
+            db.session.commit()
+            return "new", None
+
+        row = db.session.execute(
+            select(table.c.id, table.c.fingerprint, table.c.status, table.c.body,
+                   table.c.headers, table.c.expires_at)
+            .where(*self._where(key))
+        ).first()
+        if row is None or row.expires_at <= now:
+            # istekao (ili upravo obrisan) kljuc: preuzima ga samo jedan zahtev
+            taken = row is not None and db.session.execute(
+                update(table)
+                .where(table.c.id == row.id, table.c.expires_at == row.expires_at)
+                .values(fingerprint=fingerprint, status=None, body=None, headers=None, expires_at=lease)
+            ).rowcount == 1
+            db.session.commit()
+            return ("new", None) if taken else ("in_flight", None)
+        db.session.commit()
+
+        if row.fingerprint != fingerprint:
+            return "mismatch", None
+        if row.status is None:
+            return "in_flight", None
+        return "replay", (row.status, row.body, [tuple(h) for h in row.headers or ()])
+
+    def finish(self, key, fingerprint, saved):
+        status, body, headers = saved
+        # handler je vec commitovao svoje izmene; ono sto nije commitovao ne sme da prodje ovde
+        db.session.rollback()
+        db.session.execute(
+            update(IdempotencyKey)
+            .where(*self._where(key), IdempotencyKey.fingerprint == fingerprint)
+            .values(status=status, body=body, headers=[list(h) for h in headers],
+                    expires_at=utcnow() + timedelta(seconds=self.ttl))
+        )
+        db.session.commit()
+
+    def abort(self, key):
+        db.session.rollback()
+        db.session.execute(delete(IdempotencyKey).where(*self._where(key), IdempotencyKey.status.is_(None)))
+        db.session.commit()
+
+    def purge_expired(self):
+        deleted = db.session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at <= utcnow())
+        ).rowcount
+        db.session.commit()
+        return deleted
+
+    def clear(self):
+        db.session.execute(delete(IdempotencyKey))
+        db.session.commit()
+
+
+def _load_backend(app):
+    path = app.config.get("IDEMPOTENCY_BACKEND")
+    ttl = int(app.config.get("IDEMPOTENCY_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    if not path or path == "database":
+        return DatabaseIdempotencyStore(ttl=ttl)
+    if path == "memory":
+        return IdempotencyStore(ttl=ttl, max_keys=int(app.config.get("IDEMPOTENCY_MAX_KEYS", DEFAULT_MAX_KEYS)))
+    module_name, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+@idempotency_cli.command("purge")
+def purge_command():
+    """Delete expired Idempotency-Key entries."""
+    store = current_app.extensions["idempotency_store"]
+    if not hasattr(store, "purge_expired"):
+        click.echo("Store keeps no persistent keys.")
+        return
+    click.echo(f"Deleted {store.purge_expired()} key(s).")
+
+
+def init_idempotency(app):
+    """
+    IDEMPOTENCY_BACKEND=database (podrazumevano), memory (jedan proces) ili "modul:Klasa"
+    sa istim metodama (begin/finish/abort/clear).
+    """
+    app.extensions["idempotency_store"] = _load_backend(app)
+    app.cli.add_command(idempotency_cli)
+
+
+def _store():
+    store = current_app.extensions.get("idempotency_store")
+    if store is None:
+        init_idempotency(current_app)
+        store = current_app.extensions["idempotency_store"]
+    return store
+
+
+def idempotent(fn):
+    """
+    Ako klijent posalje Idempotency-Key header, ponovljeni zahtev sa istim kljucem
+    vraca sacuvan odgovor bez ponovnog izvrsavanja handlera.
+    Kljuc je vezan za korisnika, metodu i putanju; isti kljuc sa drugacijim telom -> 422.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        raw_key = (request.headers.get("Idempotency-Key") or "").strip()
+        if not raw_key:
+            return fn(*args, **kwargs)
+
+        if len(raw_key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters."}), 400
+
+        user_id = current_user.get_id() if current_user.is_authenticated else None
+        key = (user_id, request.method, request.path, raw_key)
+        fingerprint = hashlib.sha256(request.get_data()).digest()
+
+        store = _store()
+        state, saved = store.begin(key, fingerprint)
+
+        if state == "mismatch":
+            return jsonify({"error": "Idempotency-Key was already used with a different request body."}), 422
+        if state == "in_flight":
+            return jsonify({"error": "A request with this Idempotency-Key is still being processed."}), 409
+        if state == "replay":
+            status, body, headers = saved
+            resp = Response(body, status=status, headers=headers)
+            resp.headers["Idempotent-Replayed"] = "true"
+            return resp
+
+        try:
+            response = make_response(fn(*args, **kwargs))
+        except Exception:
+            store.abort(key)
+            raise
+
+        # 5xx se ne pamti, klijent moze bezbedno da pokusa ponovo
+        if response.status_code >= 500:
+            store.abort(key)
+            return response
+
+        headers = [(h, response.headers[h]) for h in REPLAY_HEADERS if h in response.headers]
+        store.finish(key, fingerprint, (response.status_code, response.get_data(), headers))
+        return response
+
+    return wrapper
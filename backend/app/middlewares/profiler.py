@@ -0,0 +1,198 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import g, has_request_context, jsonify, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROFILE_PARAM = "__profile"
+PROFILE_HEADER = "X-Profile"
+DEFAULT_TOP = 25
+SAMPLE_INTERVAL_SECONDS = 0.001
+MAX_SQL_STATEMENTS = 200
+
+_installed = False
+
+
+class StackSampler(threading.Thread):
+    """
+    Sampling profiler za jednu nit: periodicno cita njen stek iz sys._current_frames()
+    i broji stekove u "folded" formatu (flamegraph.pl, speedscope, inferno).
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL_SECONDS):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def hot_functions(self, top):
+        total = sum(self.stacks.values()) or 1
+        leaf = Counter()
+        for stack, count in self.stacks.items():
+            leaf[stack.rsplit(";", 1)[-1]] += count
+        return [
+            {"function": fn, "samples": count, "percent": round(100 * count / total, 1)}
+            for fn, count in leaf.most_common(top)
+        ]
+
+
+class DeterministicProfile:
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def hot_functions(self, top):
+        stats = pstats.Stats(self.profile, stream=io.StringIO())
+        rows = []
+        for (filename, line, name), (cc, nc, tottime, cumtime, _) in stats.stats.items():
+            rows.append({
+                "function": f"{name} ({os.path.basename(filename)}:{line})",
+                "calls": nc,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3),
+            })
+        rows.sort(key=lambda r: r["tottime_ms"], reverse=True)
+        return rows[:top]
+
+
+def _requested_mode():
+    value = request.args.get(PROFILE_PARAM) or request.headers.get(PROFILE_HEADER)
+    if not value or value == "0":
+        return None
+    return "sample" if value == "sample" else "cprofile"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and g.get("profile") is not None:
+        conn.info["profile_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    prof = g.get("profile")
+    started = conn.info.pop("profile_started", None)
+    if prof is None or started is None or len(prof["sql"]) >= MAX_SQL_STATEMENTS:
+        return
+    prof["sql"].append({
+        "statement": " ".join(statement.split()),
+        "ms": round((time.perf_counter() - started) * 1000, 3),
+    })
+
+
+def _output_name(mode):
+    path = re.sub(r"[^A-Za-z0-9]+", "_", request.path).strip("_") or "root"
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method}-{path}-{mode}"
+
+
+def _write_output(app, prof):
+    out_dir = app.config.get("PROFILER_OUTPUT_DIR")
+    if not out_dir:
+        return None
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, _output_name(prof["mode"]))
+    if prof["mode"] == "sample":
+        path = base + ".folded"
+        with open(path, "w") as f:
+            f.write(prof["profiler"].folded())
+    else:
+        # .prof (pstats) otvaraju snakeviz / flameprof
+        path = base + ".prof"
+        prof["profiler"].profile.dump_stats(path)
+    return path
+
+
+def init_profiler(app):
+    """
+    ?__profile=1 (cProfile) ili ?__profile=sample (sampling), odnosno X-Profile header, samo za admina.
+    Umesto tela odgovora vraca najtoplije funkcije i izvrsene SQL upite.
+    Kad PROFILER_ENABLED nije ukljucen, nijedan hook se ne registruje.
+    """
+    global _installed
+    if not app.config.get("PROFILER_ENABLED"):
+        return
+
+    if not _installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _installed = True
+
+    @app.before_request
+    def start_profile():
+        mode = _requested_mode()
+        if mode is None:
+            return None
+        if not current_user.is_authenticated or (current_user.role or "").lower() != "admin":
+            return None
+        if mode == "sample":
+            profiler = StackSampler(threading.get_ident())
+            profiler.start()
+        else:
+            try:
+                profiler = DeterministicProfile()
+            except ValueError:
+                # cProfile je jedan po interpreteru: drugi istovremeni zahtev ne moze da ga ukljuci
+                return jsonify({"error": "Another profiled request is in progress."}), 409
+        g.profile = {"mode": mode, "profiler": profiler, "sql": [], "started": time.perf_counter()}
+        return None
+
+    @app.after_request
+    def finish_profile(response):
+        prof = g.pop("profile", None)
+        if prof is None:
+            return response
+        prof["profiler"].stop()
+        elapsed_ms = (time.perf_counter() - prof["started"]) * 1000
+
+        top = int(app.config.get("PROFILER_TOP", DEFAULT_TOP))
+        report = {
+            "path": request.full_path.rstrip("?"),
+            "method": request.method,
+            "status": response.status_code,
+            "mode": prof["mode"],
+            "elapsedMs": round(elapsed_ms, 3),
+            "functions": prof["profiler"].hot_functions(top),
+            "sql": prof["sql"],
+            "sqlCount": len(prof["sql"]),
+            "sqlMs": round(sum(s["ms"] for s in prof["sql"]), 3),
+            "output": _write_output(app, prof),
+        }
+        return jsonify(report)
+
+    @app.teardown_request
+    def abandon_profile(exc):
+        # neobradjen izuzetak preskace after_request; profiler se ne sme ostaviti ukljucen
+        prof = g.pop("profile", None)
+        if prof is not None:
+            prof["profiler"].stop()
@@ -0,0 +1,170 @@
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+
+DEFAULT_BUDGET = {
+    "max_queries": 200,
+    "max_sql_ms": 5000,
+    "statement_timeout_ms": 5000,
+    "max_rows": 10_000,
+}
+PG_QUERY_CANCELED = "57014"
+
+_installed = False
+
+
+class QueryBudgetExceeded(Exception):
+    def __init__(self, message, status=503):
+        super().__init__(message)
+        self.status = status
+
+
+class RequestBudget:
+    __slots__ = ("limits", "queries", "sql_ms", "rows")
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.rows = 0
+
+    def check_time(self):
+        max_ms = self.limits.get("max_sql_ms")
+        if max_ms and self.sql_ms > max_ms:
+            raise QueryBudgetExceeded(f"Query budget exceeded: more than {max_ms} ms of SQL time.")
+
+
+def budget_for(app, blueprint):
+    """
+    QUERY_BUDGETS = {"<blueprint>": {...}} prepisuje samo navedena polja podrazumevanog budzeta;
+    None za blueprint (ili za polje) iskljucuje ogranicenje.
+    """
+    overrides = app.config.get("QUERY_BUDGETS") or {}
+    if blueprint in overrides and overrides[blueprint] is None:
+        return None
+    return {**app.config.get("QUERY_BUDGET_DEFAULT", DEFAULT_BUDGET), **(overrides.get(blueprint) or {})}
+
+
+def _current():
+    if not has_request_context():
+        return None
+    return g.get("query_budget")
+
+
+@contextmanager
+def unbudgeted():
+    """
+    Upiti unutar bloka se ne racunaju u budzet zahteva: gradnja indeksa po procesu (pretraga,
+    faseti, preporuke) desi se u nekom zahtevu, ali ne pripada njegovom odgovoru.
+    """
+    if not has_request_context():
+        yield
+        return
+    budget = g.pop("query_budget", None)
+    try:
+        yield
+    finally:
+        g.query_budget = budget
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    budget = _current()
+    if budget is None:
+        return
+    budget.queries += 1
+    max_queries = budget.limits.get("max_queries")
+    if max_queries and budget.queries > max_queries:
+        raise QueryBudgetExceeded(f"Query budget exceeded: more than {max_queries} queries.")
+    budget.check_time()
+    conn.info["query_budget_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    budget = _current()
+    if budget is None:
+        return
+    started = conn.info.pop("query_budget_started", None)
+    if started is not None:
+        budget.sql_ms += (time.perf_counter() - started) * 1000
+
+    # psycopg2 baferuje ceo rezultat, pa rowcount za SELECT vec zna broj redova
+    # (drajveri bez te informacije, npr. sqlite, vracaju -1 i ne broje se)
+    if cursor.description is not None and cursor.rowcount > 0:
+        budget.rows += cursor.rowcount
+        max_rows = budget.limits.get("max_rows")
+        if max_rows and budget.rows > max_rows:
+            raise QueryBudgetExceeded(
+                f"Result too large: more than {max_rows} rows. Narrow the query or paginate.", 413
+            )
+    budget.check_time()
+
+
+def _on_begin(conn):
+    budget = _current()
+    if budget is None or conn.dialect.name != "postgresql":
+        return
+    timeout_ms = budget.limits.get("statement_timeout_ms")
+    if not timeout_ms:
+        return
+    # SET LOCAL vazi do kraja transakcije; ide mimo event-a da se ne racuna u budzet
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+    finally:
+        cursor.close()
+
+
+def _install_listeners():
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "begin", _on_begin)
+    _installed = True
+
+
+def init_query_budget(app):
+    """
+    Budzet po zahtevu: broj upita, ukupno SQL vreme, broj redova i statement_timeout na Postgres-u.
+    Zahtevi van request konteksta (CLI, worker, pozadinske niti) nisu ograniceni.
+    """
+    if not app.config.get("QUERY_BUDGET_ENABLED", True):
+        return
+    _install_listeners()
+
+    @app.before_request
+    def start_budget():
+        limits = budget_for(app, request.blueprint)
+        g.query_budget = RequestBudget(limits) if limits else None
+
+    @app.after_request
+    def budget_headers(response):
+        budget = g.get("query_budget")
+        if budget is not None and app.debug:
+            response.headers["X-Query-Count"] = str(budget.queries)
+            response.headers["X-Query-Time-Ms"] = f"{budget.sql_ms:.1f}"
+        return response
+
+    @app.errorhandler(QueryBudgetExceeded)
+    def budget_exceeded(e):
+        g.query_budget = None
+        db.session.rollback()
+        app.logger.warning("%s %s: %s", request.method, request.path, e)
+        headers = {"Retry-After": "5"} if e.status == 503 else {}
+        return jsonify({"error": str(e)}), e.status, headers
+
+    @app.errorhandler(OperationalError)
+    def statement_timeout(e):
+        if getattr(e.orig, "pgcode", None) != PG_QUERY_CANCELED:
+            raise e
+        g.query_budget = None
+        db.session.rollback()
+        app.logger.warning("%s %s: statement timeout", request.method, request.path)
+        return jsonify({"error": "Query budget exceeded: statement timeout."}), 503, {"Retry-After": "5"}
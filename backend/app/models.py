@@ -1,5 +1,8 @@
 from flask_login import UserMixin
+from sqlalchemy.orm import validates
+
 from app.extensions import db
+from app.money import from_cents
 
 class User(db.Model, UserMixin):
     __tablename__ = "users"
@@ -26,7 +29,9 @@ class Product(db.Model):
     name = db.Column(db.String(180), unique=True, nullable=False, index=True)
     unit = db.Column(db.String(50), nullable=True, default="piece")
     price = db.Column(db.Numeric(10, 2), nullable=False)  
+    price_cents = db.Column(db.BigInteger, nullable=False, server_default="0")
     stock = db.Column(db.Integer, nullable=False, default=0)
+    version = db.Column(db.Integer, nullable=False, server_default="1")
 
     created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
     updated_at = db.Column(
@@ -36,6 +41,18 @@ class Product(db.Model):
         nullable=False,
     )
 
+    __table_args__ = (
+        db.Index("ix_products_updated_at_id", "updated_at", "id"),
+    )
+
+    __mapper_args__ = {"version_id_col": version}
+
+    # price_cents je izvor istine, Numeric kolona se odrzava zbog postojecih citaoca
+    @validates("price_cents")
+    def _sync_price(self, key, value):
+        self.price = from_cents(value)
+        return value
+
 class Recipe(db.Model):
     __tablename__ = "recipes"
 
@@ -54,6 +71,8 @@ class Recipe(db.Model):
         lazy="select",
     )
 
+    version = db.Column(db.Integer, nullable=False, server_default="1")
+
     created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
     updated_at = db.Column(
         db.DateTime,
@@ -62,6 +81,12 @@ class Recipe(db.Model):
         nullable=False,
     )
 
+    __table_args__ = (
+        db.Index("ix_recipes_updated_at_id", "updated_at", "id"),
+    )
+
+    __mapper_args__ = {"version_id_col": version}
+
 class RecipeIngredient(db.Model):
     __tablename__ = "recipe_ingredients"
 
@@ -76,8 +101,31 @@ class RecipeIngredient(db.Model):
     recipe = db.relationship("Recipe", back_populates="ingredients")
     product = db.relationship("Product", lazy="joined")
 
+    created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    updated_at = db.Column(
+        db.DateTime,
+        server_default=db.func.now(),
+        onupdate=db.func.now(),
+        nullable=False,
+    )
+
     __table_args__ = (
         db.UniqueConstraint("recipe_id", "product_id", name="uq_recipe_product"),
+        db.Index("ix_recipe_ingredients_updated_at_id", "updated_at", "id"),
+    )
+
+class CatalogTombstone(db.Model):
+    __tablename__ = "catalog_tombstones"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    entity = db.Column(db.String(30), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+
+    deleted_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_catalog_tombstones_deleted_at_id", "deleted_at", "id"),
     )
 
 class Order(db.Model):
@@ -88,8 +136,10 @@ class Order(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="RESTRICT"), nullable=False, index=True)
 
     total_price = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    total_price_cents = db.Column(db.BigInteger, nullable=False, default=0, server_default="0")
 
     status = db.Column(db.String(20), nullable=False, default="PENDING", index=True)
+    version = db.Column(db.Integer, nullable=False, server_default="1")
 
     user = db.relationship("User", backref=db.backref("orders", lazy=True))
     items = db.relationship(
@@ -107,6 +157,13 @@ class Order(db.Model):
         nullable=False,
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
+    @validates("total_price_cents")
+    def _sync_total_price(self, key, value):
+        self.total_price = from_cents(value)
+        return value
+
 class OrderItem(db.Model):
     __tablename__ = "order_items"
 
@@ -118,6 +175,7 @@ class OrderItem(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
 
     price_at_purchase = db.Column(db.Numeric(10, 2), nullable=False)
+    price_at_purchase_cents = db.Column(db.BigInteger, nullable=False, server_default="0")
 
     order = db.relationship("Order", back_populates="items")
     product = db.relationship("Product", lazy="joined")
@@ -125,3 +183,82 @@ class OrderItem(db.Model):
     __table_args__ = (
         db.UniqueConstraint("order_id", "product_id", name="uq_order_product"),
     )
+
+    @validates("price_at_purchase_cents")
+    def _sync_price_at_purchase(self, key, value):
+        self.price_at_purchase = from_cents(value)
+        return value
+
+class Job(db.Model):
+    __tablename__ = "jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+
+    status = db.Column(db.String(20), nullable=False, default="QUEUED")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    last_error = db.Column(db.Text, nullable=True)
+
+    run_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    locked_at = db.Column(db.DateTime, nullable=True)
+
+    created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    updated_at = db.Column(
+        db.DateTime,
+        server_default=db.func.now(),
+        onupdate=db.func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        db.Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+class RecommendationList(db.Model):
+    __tablename__ = "recommendation_lists"
+
+    # "recipe": slicni recepti za recept key_id; "product": recepti za proizvod key_id
+    kind = db.Column(db.String(20), primary_key=True)
+    key_id = db.Column(db.Integer, primary_key=True)
+
+    # [[recipe_id, score], ...] sortirano po score opadajuce
+    items = db.Column(db.JSON, nullable=False)
+    built_at = db.Column(db.DateTime, nullable=False)
+
+class CartLine(db.Model):
+    __tablename__ = "cart_lines"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False)
+
+    added_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+class IdempotencyKey(db.Model):
+    __tablename__ = "idempotency_keys"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # anonimni zahtevi imaju user_id 0
+    user_id = db.Column(db.Integer, nullable=False)
+    method = db.Column(db.String(10), nullable=False)
+    path = db.Column(db.String(255), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    fingerprint = db.Column(db.LargeBinary(32), nullable=False)
+
+    # status NULL: zahtev se jos obradjuje (expires_at je tada rok za preuzimanje)
+    status = db.Column(db.Integer, nullable=True)
+    body = db.Column(db.LargeBinary, nullable=True)
+    headers = db.Column(db.JSON, nullable=True)
+
+    created_at = db.Column(db.DateTime, server_default=db.func.now(), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "method", "path", "key", name="uq_idempotency_keys_request"),
+        db.Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
@@ -0,0 +1,44 @@
+"""
+Novac se u memoriji i u *_cents kolonama drzi kao ceo broj centi.
+Decimal se koristi samo na ulazu (parsiranje) i za legacy Numeric kolone;
+API i dalje vraca string sa dve decimale ("12.50").
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Optional
+
+CENT = Decimal("0.01")
+
+
+def to_cents(value) -> int:
+    """
+    "12.5" / 12.5 / Decimal("12.50") -> 1250. Baca decimal.InvalidOperation za neispravan unos.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value * 100
+    return int((Decimal(str(value)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2).quantize(CENT)
+
+
+def format_cents(cents: Optional[int]) -> Optional[str]:
+    """
+    1250 -> "12.50", isti format kao str(Numeric(…, 2)); None (npr. polje nije ucitano) ostaje None.
+    """
+    if cents is None:
+        return None
+    sign = "-" if cents < 0 else ""
+    major, minor = divmod(abs(int(cents)), 100)
+    return f"{sign}{major}.{minor:02d}"
+
+
+def line_total_cents(price_cents: int, quantity: int) -> int:
+    return price_cents * quantity
+
+
+def sum_line_totals(lines) -> int:
+    """
+    lines: iterabla (price_cents, quantity).
+    """
+    return sum(p * q for p, q in lines)
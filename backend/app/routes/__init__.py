@@ -4,6 +4,10 @@ from app.routes.recipe_routes import recipes_bp
 from app.routes.recipe_ingredient_routes import recipe_ingredients_bp
 from app.routes.order_routes import orders_bp
 from app.routes.order_item_routes import order_items_bp
+from app.routes.search_routes import search_bp
+from app.routes.change_routes import changes_bp
+from app.routes.recommendation_routes import recommendations_bp
+from app.routes.cart_routes import cart_bp
 
 def register_routes(app):
     app.register_blueprint(auth_bp)
@@ -11,4 +15,8 @@ def register_routes(app):
     app.register_blueprint(recipes_bp)
     app.register_blueprint(recipe_ingredients_bp)
     app.register_blueprint(orders_bp)
-    app.register_blueprint(order_items_bp)
\ No newline at end of file
+    app.register_blueprint(order_items_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(changes_bp)
+    app.register_blueprint(recommendations_bp)
+    app.register_blueprint(cart_bp)
\ No newline at end of file
@@ -1,5 +1,13 @@
 from flask import Blueprint
-from app.controllers.auth_controller import register, login, logout, me
+from app.routes.lazy import lazy_views
+
+register, login, logout, me = lazy_views(
+    "app.controllers.auth_controller",
+    "register",
+    "login",
+    "logout",
+    "me",
+)
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
@@ -0,0 +1,23 @@
+from flask import Blueprint
+from app.middlewares.auth import require_role
+from app.middlewares.idempotency import idempotent
+from app.routes.lazy import lazy_views
+
+view_cart, add_item, update_item, remove_item, clear_cart, checkout = lazy_views(
+    "app.controllers.cart_controller",
+    "view_cart",
+    "add_item",
+    "update_item",
+    "remove_item",
+    "clear_cart",
+    "checkout",
+)
+
+cart_bp = Blueprint("cart", __name__, url_prefix="/api/cart")
+
+cart_bp.get("")(require_role("user")(view_cart))
+cart_bp.delete("")(require_role("user")(clear_cart))
+cart_bp.post("/items")(require_role("user")(add_item))
+cart_bp.put("/items/<int:product_id>")(require_role("user")(update_item))
+cart_bp.delete("/items/<int:product_id>")(require_role("user")(remove_item))
+cart_bp.post("/checkout")(require_role("user")(idempotent(checkout)))
@@ -0,0 +1,11 @@
+from flask import Blueprint
+from app.routes.lazy import lazy_views
+
+list_changes, = lazy_views(
+    "app.controllers.change_controller",
+    "list_changes",
+)
+
+changes_bp = Blueprint("changes", __name__, url_prefix="/api/changes")
+
+changes_bp.get("")(list_changes)
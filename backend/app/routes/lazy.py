@@ -0,0 +1,24 @@
+import importlib
+
+
+def lazy_view(module_name: str, func_name: str):
+    """
+    View koji uvozi kontroler tek na prvi zahtev.
+    Ime funkcije se zadrzava, pa endpoint ostaje isti (npr. "products.list_products").
+    """
+    target = None
+
+    def view(*args, **kwargs):
+        nonlocal target
+        if target is None:
+            target = getattr(importlib.import_module(module_name), func_name)
+        return target(*args, **kwargs)
+
+    view.__name__ = func_name
+    view.__qualname__ = func_name
+    view.__module__ = module_name
+    return view
+
+
+def lazy_views(module_name: str, *func_names):
+    return tuple(lazy_view(module_name, name) for name in func_names)
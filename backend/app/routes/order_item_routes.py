@@ -1,7 +1,11 @@
 from flask import Blueprint
 from app.middlewares.auth import require_auth
-from app.controllers.order_item_controller import (
-    list_order_items, update_order_item
+from app.routes.lazy import lazy_views
+
+list_order_items, update_order_item = lazy_views(
+    "app.controllers.order_item_controller",
+    "list_order_items",
+    "update_order_item",
 )
 
 order_items_bp = Blueprint("order_items", __name__, url_prefix="/api/order-items")
@@ -1,17 +1,25 @@
 from flask import Blueprint
-from app.controllers.product_controller import (
-    create_product,
-    update_product,
-    delete_product,
-    list_products,
-    get_product,
-)
 from app.middlewares.auth import require_role
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.stale_catalog import stale_if_error
+from app.services.single_flight import single_flight
+from app.routes.lazy import lazy_views
+from app.services.db_routing import prefer_replica
+
+create_product, update_product, delete_product, list_products, get_product = lazy_views(
+    "app.controllers.product_controller",
+    "create_product",
+    "update_product",
+    "delete_product",
+    "list_products",
+    "get_product",
+)
 
 products_bp = Blueprint("products", __name__, url_prefix="/api/products")
+products_bp.before_request(prefer_replica)
 
-products_bp.get("")(list_products)
-products_bp.get("/<int:product_id>")(get_product)
+products_bp.get("")(catalog_snapshot("products")(single_flight("products")(stale_if_error("products")(list_products))))
+products_bp.get("/<int:product_id>")(single_flight("products")(stale_if_error("products")(get_product)))
 
 products_bp.post("")(require_role("admin")(create_product))
 products_bp.put("/<int:product_id>")(require_role("admin")(update_product))
@@ -1,13 +1,18 @@
 from flask import Blueprint
-from app.controllers.recipe_ingredient_controller import (
-    list_recipe_ingredients,
-    get_recipe_ingredient,
-    update_recipe_ingredient,
-    delete_recipe_ingredient,
-)
 from app.middlewares.auth import require_role
+from app.routes.lazy import lazy_views
+from app.services.db_routing import prefer_replica
+
+list_recipe_ingredients, get_recipe_ingredient, update_recipe_ingredient, delete_recipe_ingredient = lazy_views(
+    "app.controllers.recipe_ingredient_controller",
+    "list_recipe_ingredients",
+    "get_recipe_ingredient",
+    "update_recipe_ingredient",
+    "delete_recipe_ingredient",
+)
 
 recipe_ingredients_bp = Blueprint("recipe_ingredients", __name__, url_prefix="/api/recipe-ingredients")
+recipe_ingredients_bp.before_request(prefer_replica)
 
 recipe_ingredients_bp.get("")(list_recipe_ingredients)
 recipe_ingredients_bp.get("/<int:ri_id>")(get_recipe_ingredient)
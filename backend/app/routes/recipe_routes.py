@@ -1,13 +1,32 @@
 from flask import Blueprint
-from app.controllers.recipe_controller import (
-    create_recipe, update_recipe, delete_recipe, get_recipe, list_recipes
-)
 from app.middlewares.auth import require_role
+from app.services.catalog_snapshot import catalog_snapshot
+from app.services.stale_catalog import stale_if_error
+from app.services.single_flight import single_flight
+from app.routes.lazy import lazy_views
+from app.services.db_routing import prefer_replica
+
+create_recipe, update_recipe, delete_recipe, get_recipe, list_recipes, get_recipe_full = lazy_views(
+    "app.controllers.recipe_controller",
+    "create_recipe",
+    "update_recipe",
+    "delete_recipe",
+    "get_recipe",
+    "list_recipes",
+    "get_recipe_full",
+)
+related_recipes, = lazy_views(
+    "app.controllers.recommendation_controller",
+    "related_recipes",
+)
 
 recipes_bp = Blueprint("recipes", __name__, url_prefix="/api/recipes")
+recipes_bp.before_request(prefer_replica)
 
-recipes_bp.get("")(list_recipes)
-recipes_bp.get("/<int:recipe_id>")(get_recipe)
+recipes_bp.get("")(catalog_snapshot("recipes")(single_flight("recipes")(stale_if_error("recipes")(list_recipes))))
+recipes_bp.get("/<int:recipe_id>")(single_flight("recipes")(stale_if_error("recipes")(get_recipe)))
+recipes_bp.get("/<int:recipe_id>/full")(single_flight("recipes")(stale_if_error("recipes")(get_recipe_full)))
+recipes_bp.get("/<int:recipe_id>/related")(related_recipes)
 
 recipes_bp.post("")(require_role("admin")(create_recipe))
 recipes_bp.put("/<int:recipe_id>")(require_role("admin")(update_recipe))
@@ -0,0 +1,11 @@
+from flask import Blueprint
+from app.routes.lazy import lazy_views
+
+cart_recommendations, = lazy_views(
+    "app.controllers.recommendation_controller",
+    "cart_recommendations",
+)
+
+recommendations_bp = Blueprint("recommendations", __name__, url_prefix="/api/recommendations")
+
+recommendations_bp.get("")(cart_recommendations)
@@ -0,0 +1,11 @@
+from flask import Blueprint
+from app.routes.lazy import lazy_views
+
+suggest, = lazy_views(
+    "app.controllers.search_controller",
+    "suggest",
+)
+
+search_bp = Blueprint("search", __name__, url_prefix="/api/search")
+
+search_bp.get("/suggest")(suggest)
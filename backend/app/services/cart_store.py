@@ -0,0 +1,211 @@
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.extensions import db
+from app.models import CartLine
+from app.services.jobs import utcnow
+
+DEFAULT_MAX_CARTS = 100_000
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+MAX_LINES = 100
+
+
+class CartFull(ValueError):
+    pass
+
+
+class InProcessCartStore:
+    """
+    CART_BACKEND=memory, samo za jedan proces (razvoj, testovi): sa vise worker-a korpa
+    ostaje u worker-u koji je primio zahtev. user_id -> {product_id: quantity}, LRU po
+    poslednjoj izmeni; korpe neaktivne duze od TTL-a (ili preko max_carts) se izbacuju.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS, max_carts=DEFAULT_MAX_CARTS):
+        self.ttl = ttl
+        self.max_carts = max_carts
+        self._carts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now):
+        while self._carts:
+            user_id, (touched_at, _) = next(iter(self._carts.items()))
+            if touched_at + self.ttl > now and len(self._carts) <= self.max_carts:
+                break
+            self._carts.popitem(last=False)
+
+    def _lines(self, user_id, now, create=False):
+        entry = self._carts.get(user_id)
+        if entry is None or entry[0] + self.ttl <= now:
+            if not create:
+                return None
+            entry = (now, {})
+        self._carts[user_id] = (now, entry[1])
+        self._carts.move_to_end(user_id)
+        return entry[1]
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._carts.get(user_id)
+            if entry is None or entry[0] + self.ttl <= time.time():
+                return {}
+            return dict(entry[1])
+
+    def add(self, user_id, product_id, quantity):
+        now = time.time()
+        with self._lock:
+            lines = self._lines(user_id, now, create=True)
+            if product_id not in lines and len(lines) >= MAX_LINES:
+                raise CartFull(f"Cart can hold at most {MAX_LINES} products.")
+            lines[product_id] = lines.get(product_id, 0) + quantity
+            self._evict(now)
+            return lines[product_id]
+
+    def set(self, user_id, product_id, quantity):
+        now = time.time()
+        with self._lock:
+            lines = self._lines(user_id, now, create=True)
+            if product_id not in lines and len(lines) >= MAX_LINES:
+                raise CartFull(f"Cart can hold at most {MAX_LINES} products.")
+            lines[product_id] = quantity
+            self._evict(now)
+            return quantity
+
+    def remove(self, user_id, product_id):
+        with self._lock:
+            lines = self._lines(user_id, time.time())
+            if lines is None:
+                return False
+            return lines.pop(product_id, None) is not None
+
+    def subtract(self, user_id, ordered):
+        with self._lock:
+            lines = self._lines(user_id, time.time())
+            if lines is None:
+                return
+            for pid, qty in ordered.items():
+                left = lines.get(pid, 0) - qty
+                if left > 0:
+                    lines[pid] = left
+                else:
+                    lines.pop(pid, None)
+
+    def clear(self, user_id):
+        with self._lock:
+            self._carts.pop(user_id, None)
+
+
+_UPSERT = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+
+class DatabaseCartStore:
+    """
+    Podrazumevani, deljeni backend: red po stavci u cart_lines sa PK (user_id, product_id),
+    pa je svaka izmena jedan upsert ili DELETE po kljucu i ne dira orders. Korpa istice
+    kad joj nijedna stavka nije menjana TTL sekundi.
+    """
+
+    # izmene idu kroz db.session, pa mogu u transakciju porudzbine (checkout)
+    transactional = True
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS):
+        self.ttl = ttl
+
+    def get(self, user_id):
+        rows = db.session.execute(
+            select(CartLine.product_id, CartLine.quantity, CartLine.updated_at)
+            .where(CartLine.user_id == user_id)
+            .order_by(CartLine.added_at, CartLine.product_id)
+        ).all()
+        if not rows:
+            return {}
+        if max(r.updated_at for r in rows) <= utcnow() - timedelta(seconds=self.ttl):
+            self.clear(user_id)
+            return {}
+        return {r.product_id: r.quantity for r in rows}
+
+    def _check_room(self, user_id, product_id):
+        exists = db.session.get(CartLine, (user_id, product_id)) is not None
+        if not exists:
+            count = db.session.execute(
+                select(func.count()).select_from(CartLine).where(CartLine.user_id == user_id)
+            ).scalar()
+            if count >= MAX_LINES:
+                raise CartFull(f"Cart can hold at most {MAX_LINES} products.")
+
+    def _upsert(self, user_id, product_id, quantity, increment):
+        self._check_room(user_id, product_id)
+        now = utcnow()
+        table = CartLine.__table__
+        insert = _UPSERT[db.session.get_bind().dialect.name]
+        stmt = insert(table).values(
+            user_id=user_id, product_id=product_id, quantity=quantity, added_at=now, updated_at=now,
+        )
+        new_quantity = table.c.quantity + stmt.excluded.quantity if increment else stmt.excluded.quantity
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.product_id],
+            set_={"quantity": new_quantity, "updated_at": now},
+        ).returning(table.c.quantity)
+        result = db.session.execute(stmt).scalar()
+        db.session.commit()
+        return result
+
+    def add(self, user_id, product_id, quantity):
+        return self._upsert(user_id, product_id, quantity, increment=True)
+
+    def set(self, user_id, product_id, quantity):
+        return self._upsert(user_id, product_id, quantity, increment=False)
+
+    def remove(self, user_id, product_id):
+        deleted = db.session.execute(
+            delete(CartLine).where(CartLine.user_id == user_id, CartLine.product_id == product_id)
+        ).rowcount
+        db.session.commit()
+        return deleted > 0
+
+    def subtract(self, user_id, ordered, commit=True):
+        now = utcnow()
+        for pid, qty in ordered.items():
+            db.session.execute(
+                update(CartLine)
+                .where(CartLine.user_id == user_id, CartLine.product_id == pid)
+                .values(quantity=CartLine.quantity - qty, updated_at=now)
+            )
+        db.session.execute(delete(CartLine).where(CartLine.user_id == user_id, CartLine.quantity <= 0))
+        if commit:
+            db.session.commit()
+
+    def clear(self, user_id):
+        db.session.execute(delete(CartLine).where(CartLine.user_id == user_id))
+        db.session.commit()
+
+
+store = None
+
+
+def _load_backend(path, ttl):
+    if not path or path == "database":
+        return DatabaseCartStore(ttl=ttl)
+    if path == "memory":
+        return InProcessCartStore(ttl=ttl)
+    module_name, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+def init_cart_store(app):
+    """
+    CART_BACKEND=database (podrazumevano), memory (jedan proces) ili "modul:Klasa"
+    za drugi deljeni backend sa istim metodama.
+    """
+    global store
+    store = _load_backend(
+        app.config.get("CART_BACKEND"),
+        int(app.config.get("CART_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+    )
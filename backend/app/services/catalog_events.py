@@ -0,0 +1,92 @@
+from collections import namedtuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import Product, Recipe, RecipeIngredient
+
+ENTITY_NAMES = {
+    Product: "product",
+    Recipe: "recipe",
+    RecipeIngredient: "recipe_ingredient",
+}
+
+# values: kolone koje su bile ucitane u trenutku flush-a (npr. name), da listeneri ne bi citali iz baze
+CatalogChange = namedtuple("CatalogChange", ["entity", "id", "op", "values"])
+
+_listeners = []
+_installed = False
+
+
+def subscribe(fn):
+    """
+    Registruje listener koji se poziva posle svakog commita koji je menjao katalog.
+    Listener dobija listu CatalogChange(entity, id, op, values) gde je op "created" / "updated" / "deleted".
+    """
+    if fn not in _listeners:
+        _listeners.append(fn)
+    return fn
+
+
+def publish(changes):
+    if not changes:
+        return
+    for fn in list(_listeners):
+        fn(changes)
+
+
+def _loaded_values(obj):
+    state = inspect(obj)
+    columns = state.mapper.column_attrs.keys()
+    return {k: state.dict[k] for k in columns if k in state.dict}
+
+
+def _collect(session, objects, op, pending):
+    for obj in objects:
+        entity = ENTITY_NAMES.get(type(obj))
+        if not entity or obj.id is None:
+            continue
+        key = (entity, obj.id)
+        prev_op, values = pending.get(key, (op, {}))
+        values.update(_loaded_values(obj))
+        pending[key] = (prev_op if op == "updated" else op, values)
+
+
+def record_change(session, entity, obj_id, op, values=None):
+    """
+    Za izmene koje ne prolaze kroz ORM (Core UPDATE), da listeneri ipak dobiju dogadjaj posle commita.
+    """
+    pending = session.info.setdefault("catalog_changes", {})
+    prev_op, prev_values = pending.get((entity, obj_id), (op, {}))
+    prev_values.update(values or {})
+    pending[(entity, obj_id)] = (prev_op if op == "updated" else op, prev_values)
+
+
+def _after_flush(session, flush_context):
+    pending = session.info.setdefault("catalog_changes", {})
+    _collect(session, session.new, "created", pending)
+    _collect(session, [o for o in session.dirty if session.is_modified(o)], "updated", pending)
+    _collect(session, session.deleted, "deleted", pending)
+
+
+def _after_commit(session):
+    pending = session.info.pop("catalog_changes", None)
+    if pending:
+        publish([
+            CatalogChange(entity, obj_id, op, values)
+            for (entity, obj_id), (op, values) in pending.items()
+        ])
+
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop("catalog_changes", None)
+
+
+def init_catalog_events(app):
+    global _installed
+    if _installed:
+        return
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_soft_rollback", _after_rollback)
+    _installed = True
@@ -0,0 +1,18 @@
+from flask import request
+
+# query parametri koje kataloski endpoint-i stvarno citaju; ostali ne ulaze u kljuc kesa,
+# pa ?x=1, ?x=2, ... ne prave nove unose
+KNOWN_PARAMS = {
+    "products": ("search", "sort", "dir", "fields", "unit", "min_price", "max_price", "in_stock", "facets"),
+    "recipes": ("search", "sort", "dir", "fields", "productId"),
+}
+
+
+def request_key(namespace):
+    """
+    (putanja, poznati parametri) za kes kataloskih odgovora. Uzima se prva vrednost kao i u
+    kontrolerima (request.args.get); prisustvo praznog parametra se cuva jer menja odgovor (facets).
+    """
+    allowed = KNOWN_PARAMS.get(namespace, ())
+    args = tuple((k, request.args.get(k).strip()) for k in allowed if k in request.args)
+    return (request.path, args)
@@ -0,0 +1,243 @@
+import json
+import threading
+from collections import OrderedDict, deque
+from functools import wraps
+
+from flask import current_app, make_response, request, Response, g
+
+from app.middlewares.compression import choose_encoding, compress, supported_encodings
+from app.services.catalog_keys import request_key
+from app.services.stale_catalog import STALE_HEADER
+
+# zbir svih tela (identity + gzip + br) po namespace-u
+DEFAULT_MAX_BYTES_PER_NAMESPACE = 16 * 1024 * 1024
+max_bytes_per_namespace = DEFAULT_MAX_BYTES_PER_NAMESPACE
+
+# koje promene u katalogu ponistavaju koje snapshot-e
+# (list_recipes?search= pretrazuje i po imenu proizvoda)
+INVALIDATES = {
+    "product": ("products", "recipes"),
+    "recipe": ("recipes",),
+    "recipe_ingredient": ("recipes",),
+}
+# liste proizvoda ciji sastav ili redosled zavisi od stanja; njih promena stanja brise
+STOCK_DEPENDENT_PARAMS = ("unit", "min_price", "max_price", "in_stock", "facets")
+# poslednje promene stanja (redni broj, {id: stanje}) za snapshot-e koji su se gradili dok su stizale
+STOCK_LOG_SIZE = 1024
+
+_lock = threading.Lock()
+_snapshots = {}
+_sizes = {}
+_generations = {}
+_stock_seq = 0
+_stock_log = deque(maxlen=STOCK_LOG_SIZE)
+
+
+class Snapshot:
+    """
+    stock_slots: product id -> indeks u "items" za redove koji prikazuju stanje ({} ako stanje
+    nije u odgovoru), ili None ako odgovor zavisi od stanja (faceti, sort=stock).
+    pending_stock: stanja koja jos nisu upisana u tela; upisuju se na sledeci pogodak.
+    """
+    __slots__ = ("status", "mimetype", "bodies", "size", "stock_slots", "pending_stock")
+
+    def __init__(self, status, mimetype, bodies, stock_slots=None):
+        self.status = status
+        self.mimetype = mimetype
+        self.bodies = bodies
+        self.size = sum(len(b) for b in bodies.values())
+        self.stock_slots = stock_slots
+        self.pending_stock = {}
+
+
+def _stock_slots(namespace, raw):
+    if namespace != "products":
+        return {}
+    if request.args.get("sort", "").strip().lower() == "stock" or any(p in request.args for p in STOCK_DEPENDENT_PARAMS):
+        return None
+    items = json.loads(raw).get("items") or []
+    return {item["id"]: i for i, item in enumerate(items) if "stock" in item}
+
+
+def _build_snapshot(response, stock_slots=None):
+    raw = response.get_data()
+    bodies = {None: raw}
+    for enc in supported_encodings():
+        bodies[enc] = compress(raw, enc)
+    return Snapshot(response.status_code, response.mimetype, bodies, stock_slots)
+
+
+def _serve(snap):
+    encoding = choose_encoding(request.headers.get("Accept-Encoding", ""))
+    resp = Response(snap.bodies[encoding], status=snap.status, mimetype=snap.mimetype)
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    resp.vary.add("Accept-Encoding")
+    resp.headers["X-Catalog-Snapshot"] = "hit"
+    return resp
+
+
+def get(namespace, key):
+    with _lock:
+        entries = _snapshots.get(namespace)
+        if not entries or key not in entries:
+            return None
+        entries.move_to_end(key)
+        return entries[key]
+
+
+def _catch_up_stock(snap, stock_seq):
+    """
+    Promene stanja stigle dok se snapshot gradio (posle stock_seq) idu u pending_stock, jer
+    telo mozda vec ima starije stanje. False ako snapshot ne moze da se dopuni: zavisi od
+    stanja ili je log u medjuvremenu prepisan.
+    """
+    missed = _stock_seq - stock_seq
+    if not missed:
+        return True
+    if snap.stock_slots is None or missed > len(_stock_log):
+        return False
+    for _, stock_by_id in list(_stock_log)[-missed:]:
+        for pid in stock_by_id.keys() & snap.stock_slots.keys():
+            snap.pending_stock[pid] = stock_by_id[pid]
+    return True
+
+
+def put(namespace, key, snap, generation, stock_seq=None):
+    """
+    LRU ograniceno ukupnom velicinom tela po namespace-u; snapshot veci od celog budzeta se ne cuva.
+    generation/stock_seq su procitani pre gradnje: snapshot izgradjen pre invalidacije se odbacuje,
+    a promene stanja iz tog perioda se primenjuju na sledeci pogodak.
+    """
+    if snap.size > max_bytes_per_namespace:
+        return
+    with _lock:
+        if _generations.get(namespace, 0) != generation:
+            return
+        if stock_seq is not None and not _catch_up_stock(snap, stock_seq):
+            return
+        entries = _snapshots.setdefault(namespace, OrderedDict())
+        old = entries.pop(key, None)
+        size = _sizes.get(namespace, 0) - (old.size if old else 0) + snap.size
+        entries[key] = snap
+        while size > max_bytes_per_namespace:
+            _, evicted = entries.popitem(last=False)
+            size -= evicted.size
+        _sizes[namespace] = size
+
+
+def _drop(namespace, key):
+    entries = _snapshots.get(namespace)
+    snap = entries.pop(key, None) if entries else None
+    if snap is not None:
+        _sizes[namespace] = _sizes.get(namespace, 0) - snap.size
+
+
+def apply_stock(stock_by_id):
+    """
+    Promena samo stanja (rezervacija pri porudzbini) ne brise namespace-ove: liste recepata
+    ne prikazuju stanje, a liste proizvoda dobijaju novo stanje na sledeci pogodak.
+    """
+    global _stock_seq
+    ids = stock_by_id.keys()
+    with _lock:
+        _stock_seq += 1
+        _stock_log.append((_stock_seq, dict(stock_by_id)))
+        for namespace, entries in _snapshots.items():
+            for key, snap in list(entries.items()):
+                if snap.stock_slots is None:
+                    _drop(namespace, key)
+                    continue
+                touched = ids & snap.stock_slots.keys()
+                if touched:
+                    snap.pending_stock.update((pid, stock_by_id[pid]) for pid in touched)
+
+
+def _patch_stock(namespace, key, snap):
+    with _lock:
+        pending = dict(snap.pending_stock)
+    data = json.loads(snap.bodies[None])
+    for pid, stock in pending.items():
+        data["items"][snap.stock_slots[pid]]["stock"] = stock
+    patched = _build_snapshot(current_app.json.response(data), snap.stock_slots)
+
+    with _lock:
+        entries = _snapshots.get(namespace)
+        if entries is not None and entries.get(key) is snap:
+            # stanja koja su stigla dok se telo pravilo ostaju za sledeci pogodak
+            patched.pending_stock = {
+                pid: stock for pid, stock in snap.pending_stock.items() if pending.get(pid) != stock
+            }
+            entries[key] = patched
+            _sizes[namespace] = _sizes.get(namespace, 0) - snap.size + patched.size
+    return patched
+
+
+def invalidate(*namespaces):
+    with _lock:
+        for ns in namespaces:
+            _generations[ns] = _generations.get(ns, 0) + 1
+            _snapshots.pop(ns, None)
+            _sizes.pop(ns, None)
+
+
+def cached_bytes(namespace):
+    with _lock:
+        return _sizes.get(namespace, 0)
+
+
+def on_catalog_change(changes):
+    namespaces = set()
+    stock = {}
+    for change in changes:
+        if change.entity == "product" and change.op == "updated" and set(change.values) == {"stock"}:
+            stock[change.id] = change.values["stock"]
+        else:
+            namespaces.update(INVALIDATES.get(change.entity, ()))
+    if namespaces:
+        invalidate(*namespaces)
+    if stock:
+        apply_stock(stock)
+
+
+def catalog_snapshot(namespace):
+    """
+    Dekorator za anonimne kataloske GET endpoint-e.
+    Cuva vec serijalizovan i kompresovan odgovor (identity/gzip/br) po putanji i poznatim query
+    parametrima (catalog_keys); snapshot se ponistava tek kad se katalog promeni.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (request_key(namespace), tuple(sorted(kwargs.items())))
+            snap = get(namespace, key)
+            if snap is not None:
+                if snap.pending_stock:
+                    snap = _patch_stock(namespace, key, snap)
+                return _serve(snap)
+
+            with _lock:
+                generation = _generations.get(namespace, 0)
+                stock_seq = _stock_seq
+
+            # snapshot traje do sledece promene, pa se ne sme graditi sa replike koja kasni
+            g.db_route = None
+            # unutrasnji dekoratori (stale_if_error, single_flight) vracaju gotov Response
+            response = make_response(fn(*args, **kwargs))
+            if response.status_code != 200 or STALE_HEADER in response.headers:
+                return response
+
+            snap = _build_snapshot(response, _stock_slots(namespace, response.get_data()))
+            put(namespace, key, snap, generation, stock_seq)
+
+            resp = _serve(snap)
+            resp.headers["X-Catalog-Snapshot"] = "miss"
+            return resp
+        return wrapper
+
+    return decorator
+
+
+def init_catalog_snapshot(app):
+    global max_bytes_per_namespace
+    max_bytes_per_namespace = int(app.config.get("CATALOG_SNAPSHOT_MAX_BYTES", DEFAULT_MAX_BYTES_PER_NAMESPACE))
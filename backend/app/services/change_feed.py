@@ -0,0 +1,168 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, tuple_
+from sqlalchemy.orm import Session, joinedload
+
+from app.extensions import db
+from app.models import Product, Recipe, RecipeIngredient, CatalogTombstone
+from app.services.catalog_events import ENTITY_NAMES
+
+FEED_ENTITIES = {
+    "products": Product,
+    "recipes": Recipe,
+    "recipe_ingredients": RecipeIngredient,
+}
+TOMBSTONE_FEED = {ENTITY_NAMES[model]: feed for feed, model in FEED_ENTITIES.items()}
+FEED_OPTIONS = {"recipe_ingredients": (joinedload(RecipeIngredient.product),)}
+# updated_at/deleted_at su vreme pocetka transakcije, a ne commita: kursor ne sme da prodje
+# now() - lag, inace bi transakcija duza od toga commitovala "iza" klijenta i bila preskocena
+DEFAULT_SAFETY_LAG_SECONDS = 60
+
+_installed = False
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def _write_tombstones(session, flush_context):
+    """
+    Brisanja iz kataloga (i kaskadna, npr. sastojci obrisanog recepta) upisuju tombstone
+    u istoj transakciji, pa ih change feed vidi tek posle commita.
+    """
+    rows = []
+    for obj in session.deleted:
+        entity = ENTITY_NAMES.get(type(obj))
+        if entity and obj.id is not None:
+            rows.append({"entity": entity, "entity_id": obj.id})
+    if rows:
+        session.connection().execute(CatalogTombstone.__table__.insert(), rows)
+
+
+def write_tombstones(session, entity, ids):
+    """
+    Za brisanja mimo ORM-a (Core DELETE), koja after_flush ne vidi.
+    """
+    rows = [{"entity": entity, "entity_id": i} for i in ids]
+    if rows:
+        session.connection().execute(CatalogTombstone.__table__.insert(), rows)
+
+
+def init_change_feed(app):
+    global _installed
+    if _installed:
+        return
+    event.listen(Session, "after_flush", _write_tombstones)
+    _installed = True
+
+
+def encode_token(cursor: dict) -> str:
+    raw = json.dumps(cursor, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token(token: str) -> dict:
+    """
+    Token je neprovidan za klijenta: {"<feed>": [updated_at, id], "tombstone": [deleted_at, id]}.
+    Stari tokeni sa "tombstone": id se i dalje prihvataju.
+    """
+    if not token:
+        return {}
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        cursor = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidToken("Invalid since token.")
+    if not isinstance(cursor, dict):
+        raise InvalidToken("Invalid since token.")
+
+    parsed = {}
+    try:
+        for feed in FEED_ENTITIES:
+            if cursor.get(feed):
+                ts, last_id = cursor[feed]
+                parsed[feed] = (datetime.fromisoformat(ts), int(last_id))
+        tombstone = cursor.get("tombstone") or 0
+        if isinstance(tombstone, list):
+            ts, last_id = tombstone
+            parsed["tombstone"] = (datetime.fromisoformat(ts), int(last_id))
+        else:
+            parsed["tombstone"] = int(tombstone)
+    except (ValueError, TypeError):
+        raise InvalidToken("Invalid since token.")
+    return parsed
+
+
+def _cursor_out(cursor: dict) -> dict:
+    out = {}
+    for feed in (*FEED_ENTITIES, "tombstone"):
+        value = cursor.get(feed)
+        if isinstance(value, tuple):
+            out[feed] = [value[0].isoformat(), value[1]]
+        elif value is not None:
+            out[feed] = value
+    out.setdefault("tombstone", 0)
+    return out
+
+
+def _horizon(lag_seconds):
+    return db.session.query(func.now()).scalar() - timedelta(seconds=lag_seconds)
+
+
+def fetch_changes(cursor: dict, limit: int, lag_seconds=DEFAULT_SAFETY_LAG_SECONDS):
+    """
+    Keyset po (updated_at, id) za svaki entitet i (deleted_at, id) za brisanja, samo do
+    now() - lag_seconds. limit je ukupan broj redova u odgovoru (svi feed-ovi + tombstone-i),
+    pa jedna strana ostaje u query budget-u; feed koji ne stane nastavlja na sledecoj strani.
+    Vraca (rows_by_feed, deleted_by_feed, next_cursor, has_more).
+    """
+    horizon = _horizon(lag_seconds)
+    next_cursor = dict(cursor)
+    rows_by_feed = {feed: [] for feed in FEED_ENTITIES}
+    has_more = False
+    remaining = limit
+
+    for feed, model in FEED_ENTITIES.items():
+        if remaining == 0:
+            has_more = True
+            break
+        q = model.query.options(*FEED_OPTIONS.get(feed, ())).filter(model.updated_at <= horizon)
+        if feed in cursor:
+            ts, last_id = cursor[feed]
+            q = q.filter(tuple_(model.updated_at, model.id) > tuple_(ts, last_id))
+        rows = q.order_by(model.updated_at, model.id).limit(remaining + 1).all()
+
+        if len(rows) > remaining:
+            rows = rows[:remaining]
+            has_more = True
+        if rows:
+            next_cursor[feed] = (rows[-1].updated_at, rows[-1].id)
+        rows_by_feed[feed] = rows
+        remaining -= len(rows)
+
+    tombstones = []
+    if remaining == 0:
+        has_more = True
+    else:
+        q = CatalogTombstone.query.filter(CatalogTombstone.deleted_at <= horizon)
+        since = cursor.get("tombstone", 0)
+        if isinstance(since, tuple):
+            q = q.filter(tuple_(CatalogTombstone.deleted_at, CatalogTombstone.id) > tuple_(*since))
+        else:
+            q = q.filter(CatalogTombstone.id > since)
+        tombstones = q.order_by(CatalogTombstone.deleted_at, CatalogTombstone.id).limit(remaining + 1).all()
+        if len(tombstones) > remaining:
+            tombstones = tombstones[:remaining]
+            has_more = True
+        if tombstones:
+            next_cursor["tombstone"] = (tombstones[-1].deleted_at, tombstones[-1].id)
+
+    deleted_by_feed = {feed: [] for feed in FEED_ENTITIES}
+    for t in tombstones:
+        feed = TOMBSTONE_FEED.get(t.entity)
+        if feed:
+            deleted_by_feed[feed].append(t.entity_id)
+
+    return rows_by_feed, deleted_by_feed, _cursor_out(next_cursor), has_more
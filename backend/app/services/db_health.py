@@ -0,0 +1,139 @@
+import threading
+import time
+
+from sqlalchemy import text
+
+from app.extensions import db
+from app.services.db_routing import replica_health
+
+DEFAULT_PROBE_INTERVAL_SECONDS = 5
+DEFAULT_LATENCY_THRESHOLD_MS = 1000
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN_SECONDS = 10
+
+
+class CircuitBreaker:
+    """
+    closed: zahtevi idu u bazu. open: baza je pala ili spora (probe ili uzastopne greske),
+    kataloski GET-ovi se sluze iz stale sloja. Probe koji prodje zatvara prekidac; bez probe
+    posle cooldown-a jedan zahtev po prozoru ide u bazu kao proba.
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown=DEFAULT_COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.reason = None
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.time()
+            if now - self.opened_at >= self.cooldown:
+                self.opened_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.reason = None
+            self.failures = 0
+
+    def record_failure(self, reason):
+        with self._lock:
+            self.failures += 1
+            if self.state == "open" or self.failures >= self.failure_threshold:
+                self._open(reason)
+
+    def trip(self, reason):
+        with self._lock:
+            self._open(reason)
+
+    def _open(self, reason):
+        if self.state != "open":
+            self.opened_at = time.time()
+        self.state = "open"
+        self.reason = reason
+
+    @property
+    def is_open(self):
+        return self.state == "open"
+
+
+breaker = CircuitBreaker()
+last_probe = None
+_probe_started = False
+_probe_lock = threading.Lock()
+
+
+def probe(app):
+    """
+    SELECT 1 kroz pool (bez nove konekcije po proveri) + stanje replika; rezultat puni prekidac.
+    """
+    threshold = app.config.get("DB_LATENCY_THRESHOLD_MS", DEFAULT_LATENCY_THRESHOLD_MS)
+    started = time.perf_counter()
+    result = {"checked_at": time.time()}
+    try:
+        with db.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        latency_ms = (time.perf_counter() - started) * 1000
+        result["latency_ms"] = round(latency_ms, 3)
+        if latency_ms > threshold:
+            result["status"] = "slow"
+            breaker.trip(f"latency {latency_ms:.0f} ms > {threshold} ms")
+        else:
+            result["status"] = "ok"
+            breaker.record_success()
+    except Exception as e:
+        result["status"] = "error"
+        result["message"] = str(e)
+        breaker.trip("database unavailable")
+
+    replicas = replica_health(app)
+    if replicas is not None:
+        result["replicas"] = replicas
+    return result
+
+
+def _run_probe(app, interval):
+    global last_probe
+    while True:
+        with app.app_context():
+            try:
+                last_probe = probe(app)
+            finally:
+                db.session.remove()
+        time.sleep(interval)
+
+
+def probe_running():
+    return _probe_started
+
+
+def init_db_health(app):
+    """
+    Sa DB_PROBE_INTERVAL_SECONDS > 0 probe radi u pozadinskoj niti (pokrece se na prvi zahtev),
+    a /health/db vraca njen poslednji rezultat.
+    """
+    breaker.failure_threshold = int(app.config.get("DB_BREAKER_FAILURES", DEFAULT_FAILURE_THRESHOLD))
+    breaker.cooldown = float(app.config.get("DB_BREAKER_COOLDOWN_SECONDS", DEFAULT_COOLDOWN_SECONDS))
+
+    interval = float(app.config.get("DB_PROBE_INTERVAL_SECONDS") or 0)
+    if interval <= 0:
+        return
+
+    @app.before_request
+    def start_db_probe():
+        global _probe_started
+        if _probe_started:
+            return None
+        with _probe_lock:
+            if not _probe_started:
+                threading.Thread(target=_run_probe, args=(app, interval), daemon=True).start()
+                _probe_started = True
+        return None
@@ -0,0 +1,129 @@
+import itertools
+import threading
+import time
+
+import sqlalchemy as sa
+from flask import g, has_request_context, session, request
+from flask_sqlalchemy.session import Session as FlaskSession
+
+DEFAULT_READ_YOUR_WRITES_SECONDS = 5
+DEFAULT_MAX_LAG_SECONDS = 10
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+PG_LAG_SQL = sa.text(
+    "SELECT CASE WHEN pg_is_in_recovery() "
+    "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "ELSE 0 END"
+)
+
+
+class ReplicaRouter:
+    """
+    Round-robin nad replikama (DATABASE_REPLICA_URLS). Replike kojima je /health/db
+    izmerio prevelik lag ili gresku izbacuju se iz rotacije dok se ne oporave.
+    """
+
+    def __init__(self):
+        self.engines = []
+        self.urls = []
+        self._healthy = []
+        self._cycle = itertools.cycle(())
+        self._lock = threading.Lock()
+
+    def configure(self, urls, engine_options=None):
+        self.urls = list(urls)
+        self.engines = [sa.create_engine(url, **(engine_options or {})) for url in self.urls]
+        self._set_healthy(list(range(len(self.engines))))
+
+    def _set_healthy(self, indexes):
+        with self._lock:
+            self._healthy = indexes
+            self._cycle = itertools.cycle(indexes)
+
+    def next_replica(self):
+        with self._lock:
+            if not self._healthy:
+                return None
+            return self.engines[next(self._cycle)]
+
+    def check(self, max_lag_seconds):
+        results = []
+        healthy = []
+        for i, engine in enumerate(self.engines):
+            entry = {"replica": i, "url": engine.url.render_as_string(hide_password=True)}
+            try:
+                with engine.connect() as conn:
+                    if engine.dialect.name == "postgresql":
+                        lag = float(conn.execute(PG_LAG_SQL).scalar() or 0)
+                    else:
+                        conn.execute(sa.text("SELECT 1"))
+                        lag = 0.0
+                entry["lag_seconds"] = round(lag, 3)
+                entry["status"] = "ok" if lag <= max_lag_seconds else "lagging"
+            except Exception as e:
+                entry["status"] = "error"
+                entry["message"] = str(e)
+            if entry["status"] == "ok":
+                healthy.append(i)
+            results.append(entry)
+        self._set_healthy(healthy)
+        return results
+
+
+router = ReplicaRouter()
+
+
+class RoutingSession(FlaskSession):
+    """
+    SELECT-ovi iz zahteva oznacenih sa prefer_replica idu na repliku;
+    sve ostalo (flush, DML, tekst upiti, zahtevi bez oznake) ide na primarnu bazu.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and clause is not None
+            and getattr(clause, "is_select", False)
+            and has_request_context()
+            and g.get("db_route") == "replica"
+        ):
+            engine = router.next_replica()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def prefer_replica():
+    """
+    before_request za blueprint-e sa read-only GET endpoint-ima.
+    Posle sopstvenog upisa klijent jos REPLICA_READ_YOUR_WRITES_SECONDS cita sa primarne baze.
+    """
+    if not router.engines or request.method not in SAFE_METHODS:
+        return None
+    if session.get("_primary_until", 0) > time.time():
+        return None
+    g.db_route = "replica"
+    return None
+
+
+def init_db_routing(app):
+    urls = [u.strip() for u in (app.config.get("DATABASE_REPLICA_URLS") or "").split(",") if u.strip()]
+    if not urls:
+        return
+
+    router.configure(urls, {"pool_pre_ping": True})
+    window = int(app.config.get("REPLICA_READ_YOUR_WRITES_SECONDS", DEFAULT_READ_YOUR_WRITES_SECONDS))
+
+    @app.after_request
+    def remember_write(response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            session["_primary_until"] = time.time() + window
+        return response
+
+
+def replica_health(app):
+    if not router.engines:
+        return None
+    max_lag = float(app.config.get("REPLICA_MAX_LAG_SECONDS", DEFAULT_MAX_LAG_SECONDS))
+    return router.check(max_lag)
@@ -0,0 +1,257 @@
+import json
+import os
+import select
+import threading
+import time
+import uuid
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import Order
+from app.services import catalog_events
+from app.services.catalog_events import CatalogChange
+
+CATALOG_CHANNEL = "catalog_invalidation"
+ORDER_CHANNEL = "order_events"
+# NOTIFY payload je ogranicen na 8000 bajtova
+MAX_PAYLOAD_BYTES = 7500
+CARRIED_VALUES = ("version", "name", "stock")
+POLL_SECONDS = 5
+RECONNECT_MAX_SECONDS = 30
+
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+_installed = False
+
+
+def _chunks(items, encode):
+    """
+    Deli poruku na vise NOTIFY-a kad bi presla MAX_PAYLOAD_BYTES.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(encode(batch)) > MAX_PAYLOAD_BYTES and len(batch) > 1:
+            batch.pop()
+            yield encode(batch)
+            batch = [item]
+    if batch:
+        yield encode(batch)
+
+
+def encode_changes(changes):
+    """
+    Kompaktno: {"w": worker, "c": [[entity, id, op, {version/name/stock}], ...]}.
+    """
+    rows = [
+        [c.entity, c.id, c.op, {k: c.values[k] for k in CARRIED_VALUES if k in c.values}]
+        for c in changes
+    ]
+    return list(_chunks(rows, lambda b: json.dumps({"w": WORKER_ID, "c": b}, separators=(",", ":"), default=str)))
+
+
+def decode_changes(payload):
+    msg = json.loads(payload)
+    return msg.get("w"), [CatalogChange(e, i, op, values or {}) for e, i, op, values in msg.get("c", ())]
+
+
+class InProcessBus:
+    """
+    Fallback za jedan proces (sqlite, testovi): lokalni listeneri su vec dobili promene
+    iz catalog_events, pa nema sta da se prenese.
+    """
+
+    def start(self, app):
+        pass
+
+    def notify(self, channel, payload, connection=None):
+        pass
+
+    def on(self, channel, handler):
+        pass
+
+
+class PostgresBus:
+    """
+    pg_notify na konekciji transakcije koja menja podatke (Postgres ga isporucuje tek na commit,
+    a rollback ga odbacuje) i jedna LISTEN konekcija po worker-u u pozadinskoj niti.
+    Poruke sopstvenog worker-a se preskacu.
+    """
+
+    def __init__(self):
+        self._handlers = {}
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def on(self, channel, handler):
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def notify(self, channel, payload, connection=None):
+        if connection is not None:
+            connection.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+            return
+        with db.engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": channel, "payload": payload})
+            conn.commit()
+
+    def start(self, app):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen_forever, args=(app,), daemon=True)
+                self._thread.start()
+
+    def _listen_forever(self, app):
+        delay = 1
+        while True:
+            try:
+                with app.app_context():
+                    raw = db.engine.raw_connection()
+                raw.detach()
+                conn = raw.dbapi_connection
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    for channel in self._handlers:
+                        cur.execute(f'LISTEN "{channel}"')
+                delay = 1
+                self._consume(app, conn)
+            except Exception as e:
+                app.logger.warning("Invalidation bus listener lost connection: %s", e)
+                time.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+
+    def _consume(self, app, conn):
+        while True:
+            if select.select([conn], [], [], POLL_SECONDS) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                n = conn.notifies.pop(0)
+                for handler in self._handlers.get(n.channel, ()):
+                    try:
+                        with app.app_context():
+                            handler(n.payload)
+                    except Exception as e:
+                        app.logger.warning("Invalidation bus handler failed on %s: %s", n.channel, e)
+
+
+bus = InProcessBus()
+
+
+def record_order_change(session, order_id, version, op="updated"):
+    """
+    Za izmene porudzbina mimo ORM-a (Core UPDATE), da poruka ipak ode sa commitom.
+    """
+    pending = session.info.setdefault("bus_orders", {})
+    prev_op = pending.get(order_id, (op, None))[0]
+    pending[order_id] = (prev_op if op == "updated" else op, version)
+
+
+def _collect_orders(session, flush_context):
+    for objects, op in ((session.new, "created"), (session.dirty, "updated"), (session.deleted, "deleted")):
+        for obj in objects:
+            if isinstance(obj, Order) and obj.id is not None and (op != "updated" or session.is_modified(obj)):
+                record_order_change(session, obj.id, obj.version, op)
+
+
+def _pending_changes(session):
+    changes = [
+        CatalogChange(entity, obj_id, op, values)
+        for (entity, obj_id), (op, values) in session.info.get("catalog_changes", {}).items()
+    ]
+    changes += [
+        CatalogChange("order", order_id, op, {"version": version})
+        for order_id, (op, version) in session.info.get("bus_orders", {}).items()
+    ]
+    return changes
+
+
+def _notify_in_transaction(session):
+    """
+    NOTIFY ide u istu transakciju pre commita: bez druge pool konekcije i bez poruke
+    za izmenu koja nije commitovana.
+    """
+    if isinstance(bus, InProcessBus):
+        return
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    changes = _pending_changes(session)
+    if not changes:
+        return
+    conn = session.connection()
+    for payload in encode_changes(changes):
+        bus.notify(CATALOG_CHANNEL, payload, conn)
+
+
+def _forget_orders(session, *args):
+    session.info.pop("bus_orders", None)
+
+
+def _install_session_hooks():
+    global _installed
+    if _installed:
+        return
+    event.listen(Session, "after_flush", _collect_orders)
+    event.listen(Session, "before_commit", _notify_in_transaction)
+    event.listen(Session, "after_commit", _forget_orders)
+    event.listen(Session, "after_soft_rollback", _forget_orders)
+    _installed = True
+
+
+def _receive_catalog_changes(payload):
+    worker, changes = decode_changes(payload)
+    if worker == WORKER_ID or not changes:
+        return
+    catalog_events.publish(changes)
+
+
+class PgOrderEventsBackend:
+    """
+    order_events backend za vise worker-a: ORDER_EVENTS_BACKEND=app.services.invalidation_bus:PgOrderEventsBackend.
+    Dogadjaj se odmah isporucuje lokalno, a ostalim worker-ima preko NOTIFY.
+    """
+
+    def start(self, dispatch):
+        self._dispatch = dispatch
+        bus.on(ORDER_CHANNEL, self._receive)
+
+    def publish(self, event):
+        self._dispatch(event)
+        bus.notify(ORDER_CHANNEL, json.dumps({"w": WORKER_ID, "e": event}, separators=(",", ":")))
+
+    def _receive(self, payload):
+        msg = json.loads(payload)
+        if msg.get("w") != WORKER_ID:
+            self._dispatch(msg["e"])
+
+
+def _select_bus(app):
+    kind = (app.config.get("INVALIDATION_BUS") or "auto").lower()
+    if kind == "memory":
+        return InProcessBus()
+    if kind == "auto":
+        uri = app.config.get("SQLALCHEMY_DATABASE_URI") or ""
+        return PostgresBus() if uri.startswith("postgres") else InProcessBus()
+    return PostgresBus()
+
+
+def init_invalidation_bus(app):
+    """
+    INVALIDATION_BUS=auto (postgres -> LISTEN/NOTIFY, inace in-process), postgres ili memory.
+    Commit koji menja katalog ili porudzbine salje (entity, id, op, version) ostalim worker-ima.
+    Mora se pozvati pre init_order_events ako se koristi PgOrderEventsBackend.
+    """
+    global bus
+    bus = _select_bus(app)
+    _install_session_hooks()
+    if isinstance(bus, InProcessBus):
+        return
+    bus.on(CATALOG_CHANNEL, _receive_catalog_changes)
+
+    @app.before_request
+    def start_invalidation_listener():
+        bus.start(app)
+        return None
@@ -0,0 +1,30 @@
+from flask import current_app
+
+from app.services import recommendations
+from app.services.jobs import job
+
+# Za sada samo beleze dogadjaj; ovde idu mejlovi, rollup-ovi, zagrevanje kesa...
+
+
+@job("user.registered")
+def user_registered(payload):
+    current_app.logger.info("user.registered user_id=%s", payload.get("user_id"))
+
+
+@job("order.created")
+def order_created(payload):
+    current_app.logger.info("order.created order_id=%s", payload.get("order_id"))
+
+
+@job("order.status_changed")
+def order_status_changed(payload):
+    current_app.logger.info(
+        "order.status_changed order_id=%s %s -> %s",
+        payload.get("order_id"), payload.get("previous_status"), payload.get("status"),
+    )
+
+
+@job(recommendations.REBUILD_JOB)
+def rebuild_recommendations(payload):
+    _, stored = recommendations.rebuild()
+    current_app.logger.info("recommendations.rebuild stored %s lists", stored)
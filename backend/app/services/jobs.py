@@ -0,0 +1,172 @@
+import random
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import bindparam, func, literal_column, or_
+
+from app.extensions import db
+from app.models import Job
+
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 60 * 60
+LOCK_TIMEOUT_SECONDS = 15 * 60
+
+_handlers = {}
+
+jobs_cli = AppGroup("jobs", help="Background job queue.")
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def job(name):
+    """
+    Registruje handler za posao: handler(payload: dict). Exception -> retry sa backoff-om.
+    """
+    def decorator(fn):
+        _handlers[name] = fn
+        return fn
+    return decorator
+
+
+def enqueue(name, payload=None, delay_seconds=0, max_attempts=5):
+    """
+    Dodaje posao u tekucu sesiju: upisuje se u istom commitu kao i promena koja ga je izazvala,
+    a worker ga izvrsava tek posle tog commita.
+    """
+    if name not in _handlers:
+        raise ValueError(f"Unknown job: {name}")
+    j = Job(
+        name=name,
+        payload=payload or {},
+        status="QUEUED",
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=utcnow() + timedelta(seconds=delay_seconds),
+    )
+    db.session.add(j)
+    return j
+
+
+def backoff_seconds(attempts: int) -> float:
+    delay = min(BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), BACKOFF_MAX_SECONDS)
+    return delay + random.uniform(0, delay * 0.1)
+
+
+def claim_batch(limit: int):
+    """
+    SELECT ... FOR UPDATE SKIP LOCKED: vise worker-a uzima razlicite poslove bez cekanja.
+    Poslovi zaglavljeni u RUNNING duze od LOCK_TIMEOUT_SECONDS (pao worker) se ponovo uzimaju.
+    """
+    now = utcnow()
+    stale_before = now - timedelta(seconds=LOCK_TIMEOUT_SECONDS)
+
+    claimed = (
+        Job.query
+        .filter(or_(
+            (Job.status == "QUEUED") & (Job.run_at <= now),
+            (Job.status == "RUNNING") & (Job.locked_at < stale_before),
+        ))
+        .order_by(Job.run_at, Job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+    batch = []
+    for j in claimed:
+        j.status = "RUNNING"
+        j.locked_at = now
+        j.attempts += 1
+        batch.append((j.id, j.name, dict(j.payload or {}), j.attempts, j.max_attempts))
+    db.session.commit()
+    return batch
+
+
+def _finish(job_id, values):
+    Job.query.filter(Job.id == job_id).update(values, synchronize_session=False)
+    db.session.commit()
+
+
+def run_job(job_id, name, payload, attempts, max_attempts):
+    handler = _handlers.get(name)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for job '{name}'")
+        handler(payload)
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc(limit=5)
+        if attempts >= max_attempts:
+            current_app.logger.error("Job %s (%s) failed permanently:\n%s", job_id, name, error)
+            _finish(job_id, {"status": "FAILED", "last_error": error, "locked_at": None})
+        else:
+            retry_at = utcnow() + timedelta(seconds=backoff_seconds(attempts))
+            current_app.logger.warning("Job %s (%s) failed, retry at %s", job_id, name, retry_at)
+            _finish(job_id, {"status": "QUEUED", "last_error": error, "run_at": retry_at, "locked_at": None})
+        return False
+
+    _finish(job_id, {"status": "DONE", "last_error": None, "locked_at": None})
+    return True
+
+
+def work(batch_size=10, poll_interval=1.0, once=False):
+    processed = 0
+    while True:
+        batch = claim_batch(batch_size)
+        for item in batch:
+            run_job(*item)
+            processed += 1
+        if once:
+            return processed
+        if not batch:
+            time.sleep(poll_interval)
+
+
+@jobs_cli.command("work")
+@click.option("--batch", "batch_size", default=10, show_default=True, help="Jobs claimed per round trip.")
+@click.option("--poll", "poll_interval", default=1.0, show_default=True, help="Seconds to sleep when the queue is empty.")
+@click.option("--once", is_flag=True, help="Process one batch and exit.")
+def work_command(batch_size, poll_interval, once):
+    """Run a job worker."""
+    processed = work(batch_size=batch_size, poll_interval=poll_interval, once=once)
+    click.echo(f"Processed {processed} job(s).")
+
+
+@jobs_cli.command("stats")
+def stats_command():
+    """Show job counts per status."""
+    rows = db.session.query(Job.status, db.func.count(Job.id)).group_by(Job.status).all()
+    for status, count in sorted(rows):
+        click.echo(f"{status:<10}{count}")
+
+
+def db_hours_ago(hours, dialect):
+    """
+    now() baze minus sati: updated_at poslova puni baza, pa i granica mora po njenom satu.
+    """
+    hours = int(hours)
+    if dialect == "sqlite":
+        return func.datetime("now", f"-{hours} hours")
+    return func.now() - literal_column("interval '1 hour'") * bindparam("older_than_hours", hours)
+
+
+@jobs_cli.command("purge")
+@click.option("--older-than-hours", default=24, show_default=True)
+def purge_command(older_than_hours):
+    """Delete DONE jobs older than the given age."""
+    cutoff = db_hours_ago(older_than_hours, db.session.get_bind().dialect.name)
+    deleted = Job.query.filter(Job.status == "DONE", Job.updated_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    click.echo(f"Deleted {deleted} job(s).")
+
+
+def init_jobs(app):
+    from app.services import job_handlers  # noqa: F401  (registruje handlere)
+
+    app.cli.add_command(jobs_cli)
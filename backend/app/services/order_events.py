@@ -0,0 +1,120 @@
+import importlib
+import itertools
+import queue
+import threading
+
+ALL_ORDERS = "*"
+SUBSCRIBER_QUEUE_SIZE = 100
+OFFER_ATTEMPTS = 3
+
+
+class Subscription:
+    __slots__ = ("key", "queue")
+
+    def __init__(self, key):
+        self.key = key
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def offer(self, event):
+        """
+        Nikad ne blokira i ne baca izuzetak (dispatch ide posle commita).
+        Spor klijent: najstariji dogadjaj se odbacuje, novi status je bitniji. Ako drugi
+        dispatch u medjuvremenu ponovo napuni red, pokusava se jos par puta pa se odustaje.
+        """
+        for _ in range(OFFER_ATTEMPTS):
+            try:
+                self.queue.put_nowait(event)
+                return True
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+        return False
+
+
+class OrderEventBroker:
+    """
+    Lokalni (po worker-u) pub/sub za promene statusa porudzbina.
+    Pretplatnik je korisnik (user_id) ili admin (ALL_ORDERS); idle konekcija drzi samo jedan Queue.
+    """
+
+    def __init__(self):
+        self._subs = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, key):
+        sub = Subscription(key)
+        with self._lock:
+            self._subs.setdefault(key, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subs.get(sub.key)
+            if subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.key]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subs.values())
+
+    def dispatch(self, event):
+        event = dict(event, event_id=next(self._ids))
+        with self._lock:
+            targets = list(self._subs.get(event["user_id"], ())) + list(self._subs.get(ALL_ORDERS, ()))
+        for sub in targets:
+            sub.offer(event)
+
+
+class InProcessBackend:
+    """
+    Podrazumevani backend: dogadjaj ostaje u istom procesu.
+    Backend za vise worker-a mora da implementira start(dispatch) i publish(event).
+    """
+
+    def start(self, dispatch):
+        self._dispatch = dispatch
+
+    def publish(self, event):
+        self._dispatch(event)
+
+
+broker = OrderEventBroker()
+_backend = None
+
+
+def _load_backend(path):
+    if not path or path == "memory":
+        return InProcessBackend()
+    module_name, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+def init_order_events(app):
+    global _backend
+    _backend = _load_backend(app.config.get("ORDER_EVENTS_BACKEND"))
+    _backend.start(broker.dispatch)
+
+
+def publish_status_change(order, previous_status=None):
+    """
+    Poziva se posle commita promene statusa.
+    """
+    if _backend is None:
+        return
+    _backend.publish({
+        "order_id": order.id,
+        "user_id": order.user_id,
+        "status": order.status,
+        "previous_status": previous_status,
+    })
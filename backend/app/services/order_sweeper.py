@@ -0,0 +1,110 @@
+import random
+import threading
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import bindparam, func, literal_column
+
+from app.extensions import db
+from app.models import Order
+from app.services.order_transitions import transition_orders, publish_transitions
+
+DEFAULT_TTL_MINUTES = 24 * 60
+DEFAULT_BATCH_SIZE = 500
+
+orders_cli = AppGroup("orders", help="Order maintenance.")
+
+_scheduler_started = False
+_scheduler_lock = threading.Lock()
+
+
+def expired_before(ttl_minutes, dialect):
+    """
+    Granica po satu baze: created_at puni now() baze (lokalno vreme sesije u naivnu kolonu),
+    pa se i granica racuna u SQL-u, a ne iz Python utcnow().
+    """
+    minutes = int(ttl_minutes)
+    if dialect == "sqlite":
+        return func.datetime("now", f"-{minutes} minutes")
+    return func.now() - literal_column("interval '1 minute'") * bindparam("ttl_minutes", minutes)
+
+
+def sweep_expired(ttl_minutes=DEFAULT_TTL_MINUTES, batch_size=DEFAULT_BATCH_SIZE, max_batches=None):
+    """
+    Otkazuje PENDING porudzbine starije od TTL-a u ogranicenim serijama:
+    SELECT ... LIMIT n FOR UPDATE SKIP LOCKED + UPDATE ... WHERE id IN (...), commit po seriji.
+    Porudzbine koje checkout/admin upravo drze zakljucane se preskacu do sledeceg prolaza.
+    """
+    cutoff = expired_before(ttl_minutes, db.session.get_bind().dialect.name)
+    criteria = [Order.status == "PENDING", Order.created_at < cutoff]
+
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = transition_orders("CANCELLED", criteria, limit=batch_size, skip_locked=True)
+        db.session.commit()
+        publish_transitions(rows)
+        total += len(rows)
+        batches += 1
+        if len(rows) < batch_size:
+            break
+    return total
+
+
+@orders_cli.command("sweep")
+@click.option("--ttl-minutes", default=None, type=int, help="Cancel PENDING orders older than this (default: ORDER_PENDING_TTL_MINUTES).")
+@click.option("--batch", "batch_size", default=None, type=int, help="Orders per transaction (default: ORDER_SWEEP_BATCH).")
+@click.option("--max-batches", default=None, type=int, help="Stop after this many batches.")
+def sweep_command(ttl_minutes, batch_size, max_batches):
+    """Cancel expired PENDING orders and release their stock."""
+    cancelled = sweep_expired(
+        ttl_minutes=ttl_minutes or current_app.config.get("ORDER_PENDING_TTL_MINUTES", DEFAULT_TTL_MINUTES),
+        batch_size=batch_size or current_app.config.get("ORDER_SWEEP_BATCH", DEFAULT_BATCH_SIZE),
+        max_batches=max_batches,
+    )
+    click.echo(f"Cancelled {cancelled} expired order(s).")
+
+
+def _run_scheduler(app, interval):
+    # jitter da se worker-i ne bude u isto vreme; SKIP LOCKED ionako deli posao medju njima
+    time.sleep(random.uniform(0, interval))
+    while True:
+        with app.app_context():
+            try:
+                cancelled = sweep_expired(
+                    ttl_minutes=app.config["ORDER_PENDING_TTL_MINUTES"],
+                    batch_size=app.config["ORDER_SWEEP_BATCH"],
+                )
+                if cancelled:
+                    app.logger.info("Order sweeper cancelled %s expired order(s).", cancelled)
+            except Exception as e:
+                db.session.rollback()
+                app.logger.warning("Order sweeper failed: %s", e)
+            finally:
+                db.session.remove()
+        time.sleep(interval)
+
+
+def init_order_sweeper(app):
+    """
+    CLI: flask orders sweep. Sa ORDER_SWEEP_INTERVAL_SECONDS > 0 sweeper radi i u pozadinskoj niti
+    svakog web worker-a; nit se pokrece na prvi zahtev, pa je CLI komande (npr. migracije) ne pokrecu.
+    """
+    app.cli.add_command(orders_cli)
+
+    interval = int(app.config.get("ORDER_SWEEP_INTERVAL_SECONDS") or 0)
+    if interval <= 0:
+        return
+
+    @app.before_request
+    def start_order_sweeper():
+        global _scheduler_started
+        if _scheduler_started:
+            return None
+        with _scheduler_lock:
+            if not _scheduler_started:
+                threading.Thread(target=_run_scheduler, args=(app, interval), daemon=True).start()
+                _scheduler_started = True
+        return None
@@ -0,0 +1,72 @@
+from collections import namedtuple
+
+from sqlalchemy import func, select, update
+
+from app.extensions import db
+from app.models import Order, OrderItem
+from app.middlewares.order_rules import FINAL_STATUSES
+from app.services import order_events
+from app.services.invalidation_bus import record_order_change
+from app.services.jobs import enqueue
+from app.services.product_snapshot import release_stock
+
+OrderTransition = namedtuple("OrderTransition", ["id", "user_id", "status", "previous_status"])
+
+
+def transition_orders(status, criteria, limit=None, skip_locked=False):
+    """
+    Set-based prelaz statusa: SELECT ... FOR UPDATE zakljuca kandidate (i da prethodni status
+    za dogadjaje), pa jedan UPDATE ... WHERE id IN (...) AND status NOT IN FINAL_STATUSES RETURNING.
+    Pravilo iz order_rules je deo WHERE uslova; za CANCELLED se stanje vraca po proizvodu.
+    Ne radi commit; posle commita pozvati publish_transitions(rows).
+    Vraca redove (id, user_id, status, previous_status).
+    """
+    candidates = (
+        select(Order.id, Order.status)
+        .where(*criteria, Order.status.notin_(FINAL_STATUSES), Order.status != status)
+        .order_by(Order.id)
+        .with_for_update(skip_locked=skip_locked)
+    )
+    if limit is not None:
+        candidates = candidates.limit(limit)
+    previous = dict(db.session.execute(candidates).all())
+    if not previous:
+        return []
+
+    updated = db.session.execute(
+        update(Order)
+        .where(Order.id.in_(list(previous)), Order.status.notin_(FINAL_STATUSES))
+        .values(status=status, version=Order.version + 1, updated_at=func.now())
+        .returning(Order.id, Order.user_id, Order.status, Order.version)
+        .execution_options(synchronize_session=False)
+    ).all()
+    session = db.session()
+    for r in updated:
+        record_order_change(session, r.id, r.version)
+    rows = [
+        OrderTransition(r.id, r.user_id, r.status, previous[r.id])
+        for r in sorted(updated, key=lambda r: r.id)
+    ]
+    if not rows:
+        return rows
+
+    ids = [r.id for r in rows]
+    if status == "CANCELLED":
+        released = (
+            db.session.query(OrderItem.product_id, func.sum(OrderItem.quantity))
+            .filter(OrderItem.order_id.in_(ids))
+            .group_by(OrderItem.product_id)
+            .order_by(OrderItem.product_id)
+            .all()
+        )
+        for product_id, quantity in released:
+            release_stock(product_id, int(quantity))
+
+    for r in rows:
+        enqueue("order.status_changed", {"order_id": r.id, "status": status, "previous_status": r.previous_status})
+    return rows
+
+
+def publish_transitions(rows):
+    for r in rows:
+        order_events.publish_status_change(r, r.previous_status)
@@ -0,0 +1,237 @@
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+
+from app.extensions import db
+from app.middlewares.query_budget import unbudgeted
+from app.models import Product
+from app.money import format_cents
+
+# granice cenovnih razreda u centima: [0, 1.00), [1.00, 5.00), ..., [100.00, inf)
+PRICE_BUCKETS = (0, 100, 500, 1000, 2500, 5000, 10000)
+
+FacetRow = namedtuple("FacetRow", ["id", "name", "unit", "price_cents", "stock", "created_at"])
+
+
+def _bits(bitmap):
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+
+def _count(bitmap):
+    return bin(bitmap).count("1")
+
+
+def bucket_of(price_cents):
+    return max(bisect_right(PRICE_BUCKETS, price_cents) - 1, 0)
+
+
+def bucket_bounds(i):
+    upper = PRICE_BUCKETS[i + 1] if i + 1 < len(PRICE_BUCKETS) else None
+    return PRICE_BUCKETS[i], upper
+
+
+class FacetIndex:
+    """
+    Svaki proizvod dobija slot; filteri su bitmape (Python int) po jedinici, cenovnom razredu
+    i stanju (stock > 0), pa su filtriranje i brojanje faceta AND/OR nad int-ovima bez upita.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.rows = []
+        self.slot_of = {}
+        self.free = []
+        self.all = 0
+        self.by_unit = {}
+        self.by_bucket = {}
+        self.in_stock = 0
+        self.built = False
+
+    def _set_bits(self, slot, row, on):
+        bit = 1 << slot
+        unit = row.unit or ""
+        bucket = bucket_of(row.price_cents)
+        if on:
+            self.all |= bit
+            self.by_unit[unit] = self.by_unit.get(unit, 0) | bit
+            self.by_bucket[bucket] = self.by_bucket.get(bucket, 0) | bit
+            if row.stock > 0:
+                self.in_stock |= bit
+            return
+        self.all &= ~bit
+        self.in_stock &= ~bit
+        self.by_unit[unit] &= ~bit
+        if not self.by_unit[unit]:
+            del self.by_unit[unit]
+        self.by_bucket[bucket] &= ~bit
+        if not self.by_bucket[bucket]:
+            del self.by_bucket[bucket]
+
+    def upsert(self, row):
+        with self._lock:
+            slot = self.slot_of.get(row.id)
+            if slot is None:
+                slot = self.free.pop() if self.free else len(self.rows)
+                if slot == len(self.rows):
+                    self.rows.append(None)
+                self.slot_of[row.id] = slot
+            else:
+                self._set_bits(slot, self.rows[slot], False)
+            self.rows[slot] = row
+            self._set_bits(slot, row, True)
+
+    def remove(self, product_id):
+        with self._lock:
+            slot = self.slot_of.pop(product_id, None)
+            if slot is None:
+                return
+            self._set_bits(slot, self.rows[slot], False)
+            self.rows[slot] = None
+            self.free.append(slot)
+
+    def set_stock(self, product_id, stock):
+        with self._lock:
+            slot = self.slot_of.get(product_id)
+            if slot is None:
+                return False
+            self.rows[slot] = self.rows[slot]._replace(stock=stock)
+            if stock > 0:
+                self.in_stock |= 1 << slot
+            else:
+                self.in_stock &= ~(1 << slot)
+            return True
+
+    def rebuild(self, rows):
+        with self._lock:
+            self._reset()
+            for row in rows:
+                self.upsert(row)
+            self.built = True
+
+    def _price_bitmap(self, min_cents, max_cents):
+        """
+        Razredi koji su ceo unutar opsega ulaze kao bitmapa, a granicni se proveravaju po slotu.
+        """
+        if min_cents is None and max_cents is None:
+            return self.all
+        lo = min_cents if min_cents is not None else 0
+        result = 0
+        for bucket, bitmap in self.by_bucket.items():
+            b_lo, b_hi = bucket_bounds(bucket)
+            if (b_hi is not None and b_hi <= lo) or (max_cents is not None and b_lo > max_cents):
+                continue
+            inside_hi = max_cents is None or (b_hi is not None and b_hi - 1 <= max_cents)
+            if b_lo >= lo and inside_hi:
+                result |= bitmap
+            else:
+                for slot in _bits(bitmap):
+                    price = self.rows[slot].price_cents
+                    if price >= lo and (max_cents is None or price <= max_cents):
+                        result |= 1 << slot
+        return result
+
+    def query(self, units=None, min_cents=None, max_cents=None, in_stock=False):
+        """
+        Vraca (redovi koji prolaze sve filtere, facet brojaci).
+        Brojac jednog faceta racuna se sa svim ostalim filterima osim njegovog
+        (npr. broj po jedinici ne zavisi od izabrane jedinice).
+        """
+        with self._lock:
+            unit_bm = self.all
+            if units:
+                unit_bm = 0
+                for u in units:
+                    unit_bm |= self.by_unit.get(u, 0)
+            price_bm = self._price_bitmap(min_cents, max_cents)
+            stock_bm = self.in_stock if in_stock else self.all
+
+            matched = unit_bm & price_bm & stock_bm
+            without_unit = price_bm & stock_bm
+            without_price = unit_bm & stock_bm
+            without_stock = unit_bm & price_bm
+
+            facets = {
+                "unit": {u: _count(bm & without_unit) for u, bm in sorted(self.by_unit.items())},
+                "price": [
+                    {
+                        "min": format_cents(bucket_bounds(i)[0]),
+                        "max": format_cents(bucket_bounds(i)[1]),
+                        "count": _count(self.by_bucket.get(i, 0) & without_price),
+                    }
+                    for i in range(len(PRICE_BUCKETS))
+                ],
+                "inStock": {
+                    "true": _count(self.in_stock & without_stock),
+                    "false": _count(~self.in_stock & self.all & without_stock),
+                },
+            }
+            rows = [self.rows[slot] for slot in _bits(matched)]
+        return rows, facets
+
+
+index = FacetIndex()
+_build_lock = threading.Lock()
+_dirty = set()
+_dirty_lock = threading.Lock()
+
+
+def _load(ids=None):
+    q = db.session.query(
+        Product.id, Product.name, Product.unit, Product.price_cents, Product.stock, Product.created_at
+    )
+    if ids is not None:
+        q = q.filter(Product.id.in_(ids))
+    return [FacetRow(*r) for r in q]
+
+
+def ensure_current():
+    """
+    Prvi poziv gradi indeks iz baze; posle toga se ponovo ucitavaju samo proizvodi
+    promenjeni od poslednjeg upita (jedan IN upit). Promene koje stignu tokom gradnje
+    ostaju u _dirty i ucitavaju se odmah posle nje.
+    """
+    if not index.built:
+        with _build_lock:
+            if not index.built:
+                with _dirty_lock:
+                    _dirty.clear()
+                with unbudgeted():
+                    rows = _load()
+                index.rebuild(rows)
+
+    with _dirty_lock:
+        ids = set(_dirty)
+        _dirty.clear()
+    if not ids:
+        return
+    rows = _load(ids)
+    for row in rows:
+        index.upsert(row)
+    for missing in ids - {r.id for r in rows}:
+        index.remove(missing)
+
+
+def on_catalog_change(changes):
+    for change in changes:
+        if change.entity != "product":
+            continue
+        if not index.built:
+            # indeks se gradi (ili jos nije trazen): proizvod se ponovo cita posle gradnje
+            with _dirty_lock:
+                _dirty.add(change.id)
+        elif change.op == "deleted":
+            index.remove(change.id)
+            with _dirty_lock:
+                _dirty.discard(change.id)
+        elif set(change.values) == {"stock"} and index.set_stock(change.id, change.values["stock"]):
+            # rezervacije pri porudzbini menjaju samo stanje
+            continue
+        else:
+            with _dirty_lock:
+                _dirty.add(change.id)
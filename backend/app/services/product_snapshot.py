@@ -0,0 +1,127 @@
+import threading
+from collections import namedtuple
+
+from sqlalchemy import bindparam, select, update
+
+from app.extensions import db
+from app.models import Product
+from app.services.catalog_events import record_change
+
+ProductEntry = namedtuple("ProductEntry", ["name", "price_cents", "stock", "version"])
+
+# sastavljeno jednom; id-jevi idu kroz expanding IN
+LOAD_STMT = (
+    select(Product.id, Product.name, Product.price_cents, Product.stock, Product.version)
+    .where(Product.id.in_(bindparam("ids", expanding=True)))
+)
+RESERVE_STMT = (
+    update(Product)
+    .where(Product.id == bindparam("product_id"), Product.stock >= bindparam("quantity"))
+    .values(stock=Product.stock - bindparam("quantity"))
+    .returning(Product.stock)
+    .execution_options(synchronize_session=False)
+)
+RESERVE_VERSION_STMT = RESERVE_STMT.where(Product.version == bindparam("expected_version"))
+RELEASE_STMT = (
+    update(Product)
+    .where(Product.id == bindparam("product_id"))
+    .values(stock=Product.stock + bindparam("quantity"))
+    .returning(Product.stock)
+    .execution_options(synchronize_session=False)
+)
+
+
+class ProductSnapshot:
+    """
+    Verzionisan snapshot cene (u centima) i stanja po product id-ju, za validaciju porudzbina.
+    Popunjava se lenjo (jedan IN upit za id-jeve kojih nema), a menja se iz catalog events:
+    promena verzije proizvoda (update_product) zamenjuje cenu, rezervacije samo stanje.
+    """
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def _load(self, ids):
+        rows = db.session.execute(LOAD_STMT, {"ids": list(ids)}).all()
+        loaded = {
+            r.id: ProductEntry(r.name, r.price_cents, r.stock, r.version)
+            for r in rows
+        }
+        with self._lock:
+            self._items.update(loaded)
+        return loaded
+
+    def get_many(self, ids):
+        ids = set(ids)
+        with self._lock:
+            found = {i: self._items[i] for i in ids if i in self._items}
+        missing = ids - found.keys()
+        if missing:
+            found.update(self._load(missing))
+        return found
+
+    def refresh(self, ids):
+        ids = set(ids)
+        with self._lock:
+            for i in ids:
+                self._items.pop(i, None)
+        return self._load(ids) if ids else {}
+
+    def apply(self, product_id, values):
+        with self._lock:
+            entry = self._items.get(product_id)
+            if entry is None:
+                return
+            if "version" in values and values["version"] != entry.version:
+                # nova verzija (npr. promenjena cena): ucitava se ponovo na sledeci zahtev
+                del self._items[product_id]
+                return
+            if "stock" in values:
+                self._items[product_id] = entry._replace(stock=values["stock"])
+
+    def discard(self, product_id):
+        with self._lock:
+            self._items.pop(product_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+snapshot = ProductSnapshot()
+
+
+def on_catalog_change(changes):
+    for change in changes:
+        if change.entity != "product":
+            continue
+        if change.op == "deleted":
+            snapshot.discard(change.id)
+        else:
+            snapshot.apply(change.id, change.values)
+
+
+def reserve_stock(product_id, quantity, version=None):
+    """
+    Atomicna rezervacija: UPDATE ... WHERE stock >= qty [AND version = snapshot verzija].
+    Vraca novo stanje ili None ako nema dovoljno ili je verzija u snapshot-u zastarela.
+    """
+    params = {"product_id": product_id, "quantity": quantity}
+    if version is None:
+        stmt = RESERVE_STMT
+    else:
+        stmt = RESERVE_VERSION_STMT
+        params["expected_version"] = version
+
+    new_stock = db.session.execute(stmt, params).scalar()
+    if new_stock is not None:
+        record_change(db.session(), "product", product_id, "updated", {"stock": new_stock})
+    return new_stock
+
+
+def release_stock(product_id, quantity):
+    new_stock = db.session.execute(RELEASE_STMT, {"product_id": product_id, "quantity": quantity}).scalar()
+    if new_stock is not None:
+        record_change(db.session(), "product", product_id, "updated", {"stock": new_stock})
+    return new_stock
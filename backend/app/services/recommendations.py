@@ -0,0 +1,318 @@
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict, namedtuple
+from datetime import timedelta
+from heapq import nlargest
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.extensions import db
+from app.middlewares.query_budget import unbudgeted
+from app.models import Job, Order, OrderItem, Recipe, RecipeIngredient, RecommendationList
+from app.services.jobs import enqueue, utcnow
+
+TOP_K = 20
+MAX_ITEMS_PER_ORDER = 50
+SHARED_INGREDIENT_WEIGHT = 1.0
+DIRECT_INGREDIENT_WEIGHT = 3.0
+DEFAULT_TTL_SECONDS = 60 * 60
+REBUILD_JOB = "recommendations.rebuild"
+DEFAULT_REFRESH_SECONDS = 60
+
+recommendations_cli = AppGroup("recommendations", help="Recipe recommendation model.")
+
+
+class RecommendationModel:
+    """
+    Retka matrica ko-kupovina (dict proizvod -> Counter proizvoda) + proizvod -> recepti.
+    Top-K liste se racunaju jednom pri izgradnji (posao ili CLI) i cuvaju u recommendation_lists.
+    """
+
+    def __init__(self, cooccurrence, recipes_by_product, products_by_recipe, recipe_names):
+        self.cooccurrence = cooccurrence
+        self.recipes_by_product = recipes_by_product
+        self.products_by_recipe = products_by_recipe
+        self.recipe_names = recipe_names
+        self.built_at = time.time()
+        self.related = {rid: self._related_for(rid) for rid in products_by_recipe}
+        self.by_product = {pid: self._recipes_for_product(pid) for pid in self._all_products()}
+
+    def _all_products(self):
+        return set(self.cooccurrence) | set(self.recipes_by_product)
+
+    def _size_norm(self, rid):
+        return math.sqrt(len(self.products_by_recipe.get(rid, ())) or 1)
+
+    def _related_for(self, recipe_id):
+        scores = Counter()
+        for p in self.products_by_recipe[recipe_id]:
+            for other in self.recipes_by_product.get(p, ()):
+                scores[other] += SHARED_INGREDIENT_WEIGHT
+            for q, count in self.cooccurrence.get(p, {}).items():
+                for other in self.recipes_by_product.get(q, ()):
+                    scores[other] += count
+        scores.pop(recipe_id, None)
+        return nlargest(TOP_K, ((rid, s / self._size_norm(rid)) for rid, s in scores.items()), key=lambda x: x[1])
+
+    def _recipes_for_product(self, product_id):
+        scores = Counter()
+        for rid in self.recipes_by_product.get(product_id, ()):
+            scores[rid] += DIRECT_INGREDIENT_WEIGHT
+        for q, count in self.cooccurrence.get(product_id, {}).items():
+            for rid in self.recipes_by_product.get(q, ()):
+                scores[rid] += count
+        return nlargest(TOP_K, ((rid, s / self._size_norm(rid)) for rid, s in scores.items()), key=lambda x: x[1])
+
+    def stats(self):
+        return {
+            "products": len(self.cooccurrence),
+            "product_pairs": sum(len(c) for c in self.cooccurrence.values()) // 2,
+            "recipes": len(self.products_by_recipe),
+            "built_at": self.built_at,
+        }
+
+
+def build_model():
+    """
+    Jedan prolaz kroz order_items (bez otkazanih porudzbina) i jedan kroz recipe_ingredients.
+    """
+    rows = (
+        db.session.query(OrderItem.order_id, OrderItem.product_id)
+        .join(Order, Order.id == OrderItem.order_id)
+        .filter(Order.status != "CANCELLED")
+        .order_by(OrderItem.order_id)
+        .yield_per(5000)
+    )
+
+    cooccurrence = defaultdict(Counter)
+
+    def add_basket(basket):
+        basket = basket[:MAX_ITEMS_PER_ORDER]
+        for i, p in enumerate(basket):
+            for q in basket[i + 1:]:
+                cooccurrence[p][q] += 1
+                cooccurrence[q][p] += 1
+
+    current_order, basket = None, []
+    for order_id, product_id in rows:
+        if order_id != current_order:
+            add_basket(basket)
+            current_order, basket = order_id, []
+        basket.append(product_id)
+    add_basket(basket)
+
+    recipes_by_product = defaultdict(set)
+    products_by_recipe = defaultdict(set)
+    for recipe_id, product_id in db.session.query(RecipeIngredient.recipe_id, RecipeIngredient.product_id):
+        recipes_by_product[product_id].add(recipe_id)
+        products_by_recipe[recipe_id].add(product_id)
+
+    recipe_names = dict(db.session.query(Recipe.id, Recipe.name))
+
+    return RecommendationModel(dict(cooccurrence), dict(recipes_by_product), dict(products_by_recipe), recipe_names)
+
+
+def store_model(model):
+    """
+    Zamenjuje sve liste u jednoj transakciji; citaoci do commita vide prethodni model.
+    Vraca broj sacuvanih lista.
+    """
+    built_at = utcnow()
+    rows = [
+        {"kind": "recipe", "key_id": rid, "items": [[r, round(sc, 4)] for r, sc in ranked], "built_at": built_at}
+        for rid, ranked in model.related.items() if ranked
+    ]
+    rows += [
+        {"kind": "product", "key_id": pid, "items": [[r, round(sc, 4)] for r, sc in ranked], "built_at": built_at}
+        for pid, ranked in model.by_product.items() if ranked
+    ]
+    stored = len(rows)
+    # oznaka da model postoji i kad je izgradjen (i kad je prazan)
+    rows.append({"kind": "model", "key_id": 0, "items": [], "built_at": built_at})
+    RecommendationList.query.delete(synchronize_session=False)
+    db.session.execute(RecommendationList.__table__.insert(), rows)
+    db.session.commit()
+    return stored
+
+
+def rebuild():
+    """
+    Pun prolaz kroz order_items; izvrsava ga posao recommendations.rebuild (flask jobs work)
+    ili flask recommendations build, nikad zahtev.
+    """
+    model = build_model()
+    return model, store_model(model)
+
+
+StoredLists = namedtuple("StoredLists", ["built_at", "related", "by_product", "names"])
+EMPTY = StoredLists(None, {}, {}, {})
+
+_lock = threading.Lock()
+_lists = EMPTY
+_checked_at = None
+_stale = False
+_scheduler_started = False
+
+
+def _marker():
+    return db.session.query(RecommendationList.built_at).filter_by(kind="model", key_id=0).scalar()
+
+
+def load_lists():
+    """
+    Cita sacuvane liste i imena recepata (dva upita) u memoriju; zahtevi posle toga ne idu u bazu.
+    """
+    built_at = _marker()
+    if built_at is None:
+        return EMPTY
+    related, by_product = {}, {}
+    for kind, key_id, items in db.session.query(
+        RecommendationList.kind, RecommendationList.key_id, RecommendationList.items
+    ).filter(RecommendationList.kind.in_(("recipe", "product"))):
+        (related if kind == "recipe" else by_product)[key_id] = [(rid, score) for rid, score in items]
+    names = dict(db.session.query(Recipe.id, Recipe.name))
+    return StoredLists(built_at, related, by_product, names)
+
+
+def refresh(force=False):
+    """
+    Proverava oznaku modela najvise jednom u RECOMMENDATIONS_REFRESH_SECONDS po worker-u (force
+    preskace interval); liste se ponovo ucitavaju samo kad se built_at promeni (ili posle izmene recepata).
+    Samo cita, pa je bezbedno i u GET zahtevu (i na replici).
+    """
+    global _lists, _checked_at
+    interval = current_app.config.get("RECOMMENDATIONS_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS)
+    now = time.monotonic()
+    with _lock:
+        if not force and _checked_at is not None and now - _checked_at < interval:
+            return _lists
+        _checked_at = now
+        current = _lists
+
+    if _marker() != current.built_at:
+        with unbudgeted():
+            current = load_lists()
+        with _lock:
+            _lists = current
+    return current
+
+
+def schedule_rebuild_if_stale():
+    """
+    Zakazuje posao za rebuild kad model ne postoji, stariji je od TTL-a ili su se recepti menjali,
+    osim ako isti posao vec ceka. Poziva je pozadinska nit (ili CLI), nikad GET zahtev.
+    """
+    global _stale
+    ttl = current_app.config.get("RECOMMENDATIONS_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+    built_at = _marker()
+    if not (_stale or built_at is None or built_at < utcnow() - timedelta(seconds=ttl)):
+        return False
+    _stale = False
+    pending = (
+        db.session.query(Job.id)
+        .filter(Job.name == REBUILD_JOB, Job.status.in_(("QUEUED", "RUNNING")))
+        .first()
+    )
+    if pending is not None:
+        return False
+    enqueue(REBUILD_JOB)
+    db.session.commit()
+    return True
+
+
+def tick():
+    schedule_rebuild_if_stale()
+    refresh(force=True)
+
+
+def _items(lists, ranked):
+    return [
+        {"id": rid, "name": lists.names[rid], "score": score}
+        for rid, score in ranked if rid in lists.names
+    ]
+
+
+def related_recipes(recipe_id, limit):
+    """
+    Iz memorije; recept koji jos nije u modelu (ili model jos ne postoji) dobija praznu listu.
+    """
+    lists = refresh()
+    return _items(lists, lists.related.get(recipe_id, ())[:limit])
+
+
+def for_cart(product_ids, limit):
+    lists = refresh()
+    scores = Counter()
+    for pid in product_ids:
+        for rid, score in lists.by_product.get(pid, ()):
+            scores[rid] += score
+    return _items(lists, [(rid, round(score, 4)) for rid, score in nlargest(limit, scores.items(), key=lambda x: x[1])])
+
+
+def mark_stale():
+    global _stale, _checked_at, _lists
+    with _lock:
+        _stale = True
+        # obrisan ili preimenovan recept: sledeci zahtev ponovo cita liste i imena
+        _checked_at = None
+        _lists = _lists._replace(built_at=None)
+
+
+def on_catalog_change(changes):
+    # novi/izmenjeni recepti: pozadinska nit zakazuje rebuild
+    if any(c.entity in ("recipe", "recipe_ingredient") for c in changes):
+        mark_stale()
+
+
+def _run_scheduler(app, interval):
+    time.sleep(random.uniform(0, interval))
+    while True:
+        with app.app_context():
+            try:
+                tick()
+            except Exception as e:
+                db.session.rollback()
+                app.logger.warning("Recommendations refresh failed: %s", e)
+            finally:
+                db.session.remove()
+        time.sleep(interval)
+
+
+@recommendations_cli.command("build")
+def build_command():
+    """Build the model, store it in recommendation_lists and print its size."""
+    started = time.perf_counter()
+    model, stored = rebuild()
+    elapsed = (time.perf_counter() - started) * 1000
+    for key, value in model.stats().items():
+        click.echo(f"{key:<15}{value}")
+    click.echo(f"{'stored_lists':<15}{stored}")
+    click.echo(f"{'build_ms':<15}{elapsed:.1f}")
+
+
+def init_recommendations(app):
+    """
+    Sa RECOMMENDATIONS_SCHEDULER ukljucenim, pozadinska nit svakog web worker-a (pokrece se na prvi
+    zahtev) na svakih RECOMMENDATIONS_REFRESH_SECONDS zakazuje rebuild kad je model zastareo i
+    ucitava nove liste u memoriju.
+    """
+    app.cli.add_command(recommendations_cli)
+
+    interval = int(app.config.get("RECOMMENDATIONS_REFRESH_SECONDS") or 0)
+    if not app.config.get("RECOMMENDATIONS_SCHEDULER") or interval <= 0:
+        return
+
+    @app.before_request
+    def start_recommendations_scheduler():
+        global _scheduler_started
+        if _scheduler_started:
+            return None
+        with _lock:
+            if not _scheduler_started:
+                threading.Thread(target=_run_scheduler, args=(app, interval), daemon=True).start()
+                _scheduler_started = True
+        return None
@@ -0,0 +1,220 @@
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+from app.extensions import db
+from app.middlewares.query_budget import unbudgeted
+from app.models import Product, Recipe
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+INDEXED_ENTITIES = {"product": Product, "recipe": Recipe}
+# za kratke prefikse (prvi tasteri, najvise pogodaka) top-K se pamti i brise tek kad se
+# promeni ime koje pocinje tim prefiksom
+CACHED_PREFIX_LEN = 3
+TOP_K = 50
+
+
+def normalize(text: str) -> str:
+    """
+    casefold + skidanje dijakritika ("Ćevapi" -> "cevapi"), da pretraga ne zavisi od tastature.
+    """
+    decomposed = unicodedata.normalize("NFKD", (text or "").casefold())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).strip()
+
+
+def _keys_for(name: str):
+    norm = normalize(name)
+    keys = {norm}
+    keys.update(_TOKEN_RE.findall(norm))
+    keys.discard("")
+    return keys
+
+
+def _entry(name):
+    # (ime, normalizovano ime, (duzina, casefold)) racunato jednom po imenu, ne po upitu
+    return name, normalize(name), (len(name), name.casefold())
+
+
+class PrefixIndex:
+    """
+    Sortiran niz (kljuc, tip, id) + bisect. Kljucevi su puno ime i svaka rec imena,
+    pa "chick" pogadja i "Chicken soup" i "Grilled chicken".
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._names = {}
+        self._top = {}
+        self._lock = threading.RLock()
+        self.built = False
+
+    def __len__(self):
+        return len(self._names)
+
+    def _invalidate(self, keys):
+        for key in keys:
+            for n in range(1, min(len(key), CACHED_PREFIX_LEN) + 1):
+                self._top.pop(key[:n], None)
+
+    def _add(self, kind, obj_id, name):
+        self._names[(kind, obj_id)] = _entry(name)
+        keys = _keys_for(name)
+        for key in keys:
+            insort(self._keys, (key, kind, obj_id))
+        self._invalidate(keys)
+
+    def _remove(self, kind, obj_id):
+        entry = self._names.pop((kind, obj_id), None)
+        if entry is None:
+            return
+        keys = _keys_for(entry[0])
+        for key in keys:
+            item = (key, kind, obj_id)
+            i = bisect_left(self._keys, item)
+            if i < len(self._keys) and self._keys[i] == item:
+                del self._keys[i]
+        self._invalidate(keys)
+
+    def upsert(self, kind, obj_id, name):
+        with self._lock:
+            current = self._names.get((kind, obj_id))
+            if current is not None and current[0] == name:
+                return
+            self._remove(kind, obj_id)
+            if name:
+                self._add(kind, obj_id, name)
+
+    def remove(self, kind, obj_id):
+        with self._lock:
+            self._remove(kind, obj_id)
+
+    def rebuild(self, rows):
+        """
+        rows: iterabla (kind, id, name). Gradi se nov niz pa se zameni odjednom.
+        """
+        names = {}
+        keys = []
+        for kind, obj_id, name in rows:
+            names[(kind, obj_id)] = _entry(name)
+            keys.extend((key, kind, obj_id) for key in _keys_for(name))
+        keys.sort()
+        with self._lock:
+            self._names = names
+            self._keys = keys
+            self._top = {}
+            self.built = True
+
+    def _scan(self, q, kinds, limit):
+        """
+        Svi kljucevi sa prefiksom q, ali sortira se samo top `limit` (heapq.nsmallest):
+        prvo imena koja pocinju upitom, pa kraca imena, pa abecedno.
+        """
+        keys = self._keys
+        names = self._names
+        seen = set()
+        i = bisect_left(keys, (q,))
+        while i < len(keys) and keys[i][0].startswith(q):
+            _, kind, obj_id = keys[i]
+            i += 1
+            if (kind, obj_id) not in seen and (not kinds or kind in kinds):
+                seen.add((kind, obj_id))
+
+        def rank(item):
+            _, norm, order = names[item]
+            return not norm.startswith(q), order, item
+
+        return [(kind, obj_id, names[(kind, obj_id)][0]) for kind, obj_id in heapq.nsmallest(limit, seen, key=rank)]
+
+    def suggest(self, query: str, limit: int = 10, kinds=None):
+        q = normalize(query)
+        if not q:
+            return []
+
+        with self._lock:
+            if len(q) > CACHED_PREFIX_LEN or limit > TOP_K:
+                matches = self._scan(q, kinds, limit)
+            else:
+                # prefiks -> {tipovi: top-K}, da izmena imena obrise sve varijante prefiksa
+                by_kinds = self._top.setdefault(q, {})
+                kinds_key = frozenset(kinds) if kinds else None
+                matches = by_kinds.get(kinds_key)
+                if matches is None:
+                    matches = by_kinds[kinds_key] = self._scan(q, kinds, TOP_K)
+        return [{"type": kind, "id": obj_id, "name": name} for kind, obj_id, name in matches[:limit]]
+
+
+index = PrefixIndex()
+_build_lock = threading.Lock()
+# promene koje stignu dok rebuild cita bazu se cuvaju i primenjuju posle zamene niza
+_events_lock = threading.Lock()
+_building = False
+_pending = []
+
+
+def _load_rows():
+    for kind, model in INDEXED_ENTITIES.items():
+        for obj_id, name in db.session.query(model.id, model.name):
+            yield kind, obj_id, name
+
+
+def rebuild_index():
+    global _building
+    with _events_lock:
+        _building = True
+        _pending.clear()
+    try:
+        with unbudgeted():
+            rows = list(_load_rows())
+        index.rebuild(rows)
+    finally:
+        with _events_lock:
+            _building = False
+            replay = list(_pending)
+            _pending.clear()
+            if index.built:
+                _apply(replay)
+
+
+def ensure_built():
+    if index.built:
+        return
+    with _build_lock:
+        if not index.built:
+            rebuild_index()
+
+
+def _apply(changes):
+    for change in changes:
+        if change.entity not in INDEXED_ENTITIES:
+            continue
+        if change.op == "deleted":
+            index.remove(change.entity, change.id)
+        elif "name" in change.values:
+            index.upsert(change.entity, change.id, change.values["name"])
+
+
+def on_catalog_change(changes):
+    with _events_lock:
+        if _building:
+            _pending.extend(changes)
+        elif index.built:
+            _apply(changes)
+
+
+def init_search_index(app):
+    """
+    Indeks se gradi pri startu (SEARCH_INDEX_WARM=1, podrazumevano); ako baza tada nije
+    dostupna, gradi se na prvi /api/search/suggest zahtev.
+    """
+    if not app.config.get("SEARCH_INDEX_WARM"):
+        return
+    with app.app_context():
+        try:
+            with _build_lock:
+                rebuild_index()
+        except Exception as e:
+            app.logger.warning("Search index warm-up failed, will build on first request: %s", e)
+            db.session.rollback()
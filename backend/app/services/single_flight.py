@@ -0,0 +1,109 @@
+import threading
+from functools import wraps
+
+from flask import Response, make_response, request
+
+DEFAULT_WAIT_SECONDS = 10
+FLIGHT_HEADER = "X-Single-Flight"
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Istovremeni identicni pozivi (isti kljuc) u jednom worker-u: prvi (leader) izvrsava,
+    ostali cekaju i dobijaju njegov rezultat. Kljuc se brise cim leader zavrsi, pa nema kesiranja.
+    """
+
+    def __init__(self, wait_seconds=DEFAULT_WAIT_SECONDS):
+        self.wait_seconds = wait_seconds
+        self.enabled = True
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "coalesced": 0, "timeouts": 0, "errors": 0}
+
+    def do(self, key, fn):
+        """
+        Vraca (result, shared). Ako leader ne zavrsi za wait_seconds, pratilac izvrsava sam.
+        """
+        if not self.enabled:
+            return fn(), False
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.stats["leaders"] += 1
+                leader = True
+            else:
+                call.waiters += 1
+                self.stats["coalesced"] += 1
+                leader = False
+
+        if not leader:
+            if not call.done.wait(self.wait_seconds):
+                with self._lock:
+                    self.stats["timeouts"] += 1
+                return fn(), False
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def snapshot_stats(self):
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._calls))
+
+
+flights = SingleFlight()
+
+
+def _key(namespace):
+    args = tuple(sorted((k, v.strip()) for k, v in request.args.items(multi=True)))
+    return (namespace, request.path, args)
+
+
+def _freeze(rv):
+    response = make_response(rv)
+    return response.status_code, list(response.headers.items()), response.get_data()
+
+
+def single_flight(namespace):
+    """
+    Dekorator za anonimne kataloske GET-ove. Odgovor leader-a se deli kao (status, zaglavlja, telo),
+    a svaki pratilac dobija sopstveni Response objekat.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            (status, headers, body), shared = flights.do(_key(namespace), lambda: _freeze(fn(*args, **kwargs)))
+            resp = Response(body, status=status, headers=headers)
+            resp.headers[FLIGHT_HEADER] = "coalesced" if shared else "leader"
+            return resp
+        return wrapper
+
+    return decorator
+
+
+def init_single_flight(app):
+    flights.enabled = bool(app.config.get("SINGLE_FLIGHT_ENABLED", True))
+    flights.wait_seconds = float(app.config.get("SINGLE_FLIGHT_WAIT_SECONDS", DEFAULT_WAIT_SECONDS))
@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, jsonify, make_response
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+
+from app.extensions import db
+from app.services.catalog_keys import request_key
+from app.services.db_health import breaker
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+max_bytes = DEFAULT_MAX_BYTES
+STALE_HEADER = "X-Catalog-Stale"
+KEPT_HEADERS = ("ETag",)
+DB_ERRORS = (DBAPIError, PoolTimeoutError)
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_size = 0
+
+
+class StaleEntry:
+    __slots__ = ("status", "mimetype", "body", "headers", "stored_at")
+
+    def __init__(self, response):
+        self.status = response.status_code
+        self.mimetype = response.mimetype
+        self.body = response.get_data()
+        self.headers = {h: response.headers[h] for h in KEPT_HEADERS if h in response.headers}
+        self.stored_at = time.time()
+
+
+def _key(namespace):
+    return (namespace, request_key(namespace))
+
+
+def _remember(key, response):
+    """
+    LRU ograniceno ukupnom velicinom tela (max_bytes po worker-u); telo vece od celog
+    budzeta se ne cuva.
+    """
+    global _size
+    entry = StaleEntry(response)
+    if len(entry.body) > max_bytes:
+        return
+    with _lock:
+        old = _entries.pop(key, None)
+        _size += len(entry.body) - (len(old.body) if old else 0)
+        _entries[key] = entry
+        while _size > max_bytes:
+            _, evicted = _entries.popitem(last=False)
+            _size -= len(evicted.body)
+
+
+def _lookup(key):
+    with _lock:
+        return _entries.get(key)
+
+
+def _serve_stale(entry, reason):
+    resp = Response(entry.body, status=entry.status, mimetype=entry.mimetype)
+    resp.headers.update(entry.headers)
+    resp.headers["Age"] = str(int(time.time() - entry.stored_at))
+    resp.headers["Warning"] = '110 - "Response is Stale", 111 - "Revalidation Failed"'
+    resp.headers[STALE_HEADER] = reason
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
+
+
+def _unavailable():
+    return jsonify({"error": "Catalog is temporarily unavailable."}), 503, {"Retry-After": "5"}
+
+
+def stale_if_error(namespace):
+    """
+    Dekorator za anonimne kataloske GET-ove: pamti poslednji uspesan odgovor po putanji i parametrima.
+    Dok je prekidac otvoren (baza pala ili spora) ili upit padne na gresci baze, vraca taj odgovor
+    sa Warning/Age zaglavljima umesto 500; bez sacuvanog odgovora vraca 503.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = _key(namespace)
+
+            if not breaker.allow():
+                entry = _lookup(key)
+                return _serve_stale(entry, breaker.reason or "circuit open") if entry else _unavailable()
+
+            try:
+                response = make_response(fn(*args, **kwargs))
+            except DB_ERRORS as e:
+                db.session.rollback()
+                breaker.record_failure("database error")
+                current_app.logger.warning("Catalog read failed, serving stale copy if any: %s", e)
+                entry = _lookup(key)
+                return _serve_stale(entry, type(e).__name__) if entry else _unavailable()
+
+            breaker.record_success()
+            if response.status_code == 200 and not response.is_streamed:
+                _remember(key, response)
+            return response
+        return wrapper
+
+    return decorator
+
+
+def cached_bytes():
+    with _lock:
+        return _size
+
+
+def init_stale_catalog(app):
+    global max_bytes
+    max_bytes = int(app.config.get("STALE_CATALOG_MAX_BYTES", DEFAULT_MAX_BYTES))
@@ -0,0 +1,20 @@
+import threading
+
+_lock = threading.Lock()
+_statements = {}
+
+
+def cached_statement(key, build):
+    """
+    Vraca jednom sastavljen SQL izraz za dati oblik upita (key), a vrednosti idu kao bindparam-i.
+    Isti objekat izraza pri svakom zahtevu: nema ponovnog sastavljanja upita ni racunanja
+    cache kljuca, pa SQLAlchemy odmah nalazi kompajlirani SQL u svom kesu.
+    key mora da pokrije sve sto menja strukturu upita (polja, sort, koji filteri postoje).
+    lambda_stmt se ne koristi jer ne prati opcije (load_only) iz closure-a.
+    """
+    stmt = _statements.get(key)
+    if stmt is None:
+        stmt = build()
+        with _lock:
+            stmt = _statements.setdefault(key, stmt)
+    return stmt
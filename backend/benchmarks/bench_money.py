@@ -0,0 +1,68 @@
+"""
+Micro-benchmark: racunanje ukupne cene porudzbine.
+
+Poredi stari _calc_total (Decimal(str(...)) po stavci) sa integer-cents putanjom
+iz app.money na velikim skupovima stavki.
+
+    python benchmarks/bench_money.py [--sizes 100 1000 10000 100000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from decimal import Decimal
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.money import sum_line_totals, format_cents, from_cents  # noqa: E402
+
+
+def make_items(n, seed=42):
+    rnd = random.Random(seed)
+    items = []
+    for _ in range(n):
+        cents = rnd.randint(1, 500_000)
+        items.append(SimpleNamespace(
+            price_at_purchase=from_cents(cents),
+            price_at_purchase_cents=cents,
+            quantity=rnd.randint(1, 20),
+        ))
+    return items
+
+
+def total_decimal(items):
+    total = Decimal("0.00")
+    for it in items:
+        total += Decimal(str(it.price_at_purchase)) * it.quantity
+    return str(total)
+
+
+def total_cents(items):
+    return format_cents(sum_line_totals((it.price_at_purchase_cents, it.quantity) for it in items))
+
+
+def bench(fn, items, repeat):
+    timer = timeit.Timer(lambda: fn(items))
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=loops)) / loops
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'items':>8}{'decimal ms':>14}{'cents ms':>12}{'speed-up':>10}")
+    for n in args.sizes:
+        items = make_items(n)
+        assert total_decimal(items) == total_cents(items)
+        t_dec = bench(total_decimal, items, args.repeat)
+        t_int = bench(total_cents, items, args.repeat)
+        print(f"{n:>8}{t_dec * 1000:>14.3f}{t_int * 1000:>12.3f}{t_dec / t_int:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
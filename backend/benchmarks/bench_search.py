@@ -0,0 +1,50 @@
+"""
+Micro-benchmark: PrefixIndex.suggest na sinteticnom katalogu (podrazumevano 50k imena).
+
+Za svaki upit meri prvi poziv (hladan: skeniranje prefiksa + heapq.nsmallest) i prosek
+ponovljenih poziva (kratki prefiksi se tada citaju iz top-K kesa). Baza nije potrebna.
+
+    python benchmarks/bench_search.py [--names 50000] [--number 1000] [--limit 10]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.search_index import PrefixIndex  # noqa: E402
+
+QUERIES = ("a", "ch", "chi", "chick", "zzz")
+
+
+def catalog(size, seed=1):
+    rnd = random.Random(seed)
+    words = ["".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(3, 9))) for _ in range(5000)]
+    words += ["chicken", "chili", "cheese", "chard"]
+    return [
+        ("product" if i % 3 else "recipe", i, " ".join(rnd.choices(words, k=rnd.randint(1, 3))).title())
+        for i in range(size)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=50_000)
+    parser.add_argument("--number", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    index = PrefixIndex()
+    index.rebuild(catalog(args.names))
+    print(f"{'query':<10}{'cold us':>12}{'warm us':>12}")
+    for q in QUERIES:
+        cold = timeit.timeit(lambda: index.suggest(q, args.limit), number=1) * 1e6
+        warm = timeit.timeit(lambda: index.suggest(q, args.limit), number=args.number) / args.number * 1e6
+        print(f"{q:<10}{cold:>12.1f}{warm:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Load test: thundering herd na GET /api/recipes/<id> sa i bez single-flight sloja.
+
+N niti istovremeno (barrier) trazi isti recept; svaki SQL upit dobija vestacko kasnjenje
+(--latency-ms) kao spora baza. Meri broj SQL upita, broj coalesced zahteva i trajanje talasa.
+Koristi privremenu sqlite bazu, osim ako je zadat DATABASE_URL.
+
+    python benchmarks/bench_single_flight.py [--clients 50 200] [--waves 3] [--latency-ms 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+os.environ.setdefault("DB_PROBE_INTERVAL_SECONDS", "0")
+os.environ.setdefault("QUERY_BUDGET_ENABLED", "0")
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import User, Product, Recipe, RecipeIngredient  # noqa: E402
+from app.services.single_flight import flights  # noqa: E402
+
+
+def seed(app):
+    with app.app_context():
+        db.create_all()
+        if Recipe.query.first():
+            return Recipe.query.first().id
+        user = User(name="bench", email="bench@shop.io", password_hash="x", role="admin")
+        db.session.add(user)
+        products = [Product(name=f"Product {i}", unit="kg", price_cents=100 + i, stock=100) for i in range(10)]
+        db.session.add_all(products)
+        db.session.flush()
+        recipe = Recipe(name="Bench recipe", description="x" * 2000, creator_id=user.id)
+        recipe.ingredients = [RecipeIngredient(product_id=p.id, quantity=1, unit="kg") for p in products]
+        db.session.add(recipe)
+        db.session.commit()
+        return recipe.id
+
+
+def wave(app, url, clients):
+    barrier = threading.Barrier(clients)
+    statuses = []
+
+    def hit():
+        client = app.test_client()
+        barrier.wait()
+        statuses.append(client.get(url).status_code)
+
+    threads = [threading.Thread(target=hit) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return (time.perf_counter() - started) * 1000, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--waves", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    app = create_app()
+    recipe_id = seed(app)
+    url = f"/api/recipes/{recipe_id}"
+
+    queries = {"n": 0}
+    lock = threading.Lock()
+    with app.app_context():
+        @event.listens_for(db.engine, "before_cursor_execute")
+        def slow_db(*_):
+            with lock:
+                queries["n"] += 1
+            time.sleep(args.latency_ms / 1000)
+
+    print(f"{'clients':>8}{'mode':>10}{'queries':>10}{'coalesced':>11}{'wave ms':>10}{'errors':>8}")
+    for clients in args.clients:
+        for enabled in (False, True):
+            flights.enabled = enabled
+            before = flights.snapshot_stats()["coalesced"]
+            queries["n"] = 0
+            total_ms = 0.0
+            errors = 0
+            for _ in range(args.waves):
+                ms, statuses = wave(app, url, clients)
+                total_ms += ms
+                errors += sum(1 for s in statuses if s != 200)
+            coalesced = flights.snapshot_stats()["coalesced"] - before
+            mode = "single" if enabled else "off"
+            print(f"{clients:>8}{mode:>10}{queries['n'] / args.waves:>10.1f}"
+                  f"{coalesced / args.waves:>11.1f}{total_ms / args.waves:>10.1f}{errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Time-to-first-request benchmark.
+
+Svaki uzorak je novi Python proces: import app -> create_app() -> prvi GET /api/products
+(ukljucuje lazy import kontrolera i otvaranje konekcije). Skripta pada (exit 1) ako
+medijana predje ciljano vreme.
+
+    python benchmarks/bench_startup.py [--runs 7] [--target-ms 900]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TARGET_MS = float(os.getenv("STARTUP_TARGET_MS", "900"))
+
+CHILD_CODE = """
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+resp = app.test_client().get("/api/products")
+t3 = time.perf_counter()
+print(json.dumps({
+    "status": resp.status_code,
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "total_ms": (t3 - t0) * 1000,
+}))
+"""
+
+SETUP_CODE = """
+from app import create_app
+from app.extensions import db
+app = create_app()
+with app.app_context():
+    db.create_all()
+"""
+
+
+def run_child(code, env):
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(proc.returncode)
+    return proc.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--target-ms", type=float, default=DEFAULT_TARGET_MS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        run_child(SETUP_CODE, env)
+
+        samples = []
+        for _ in range(args.runs):
+            sample = json.loads(run_child(CHILD_CODE, env).strip().splitlines()[-1])
+            if sample["status"] != 200:
+                raise SystemExit(f"first request returned {sample['status']}")
+            samples.append(sample)
+
+    print(f"{'phase':<18}{'median':>10}{'min':>10}{'max':>10}  (ms, {args.runs} runs)")
+    for phase in ("import_ms", "create_app_ms", "first_request_ms", "total_ms"):
+        values = [s[phase] for s in samples]
+        print(f"{phase:<18}{statistics.median(values):>10.1f}{min(values):>10.1f}{max(values):>10.1f}")
+
+    median_total = statistics.median(s["total_ms"] for s in samples)
+    if median_total > args.target_ms:
+        print(f"\nFAIL: time-to-first-request {median_total:.1f} ms > target {args.target_ms:.0f} ms")
+        raise SystemExit(1)
+    print(f"\nOK: time-to-first-request {median_total:.1f} ms <= target {args.target_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Micro-benchmark: Python overhead vrucih upita po zahtevu, pre i posle kesiranih izraza.
+
+"before" sastavlja upit pri svakom pozivu (kao ranije u kontrolerima), "after" koristi
+izraze sastavljene jednom (bindparam, expanding IN) iz app.services.statement_cache i
+modulskih konstanti. Baza je mala sqlite u memoriji, pa razlika je uglavnom Python
+(sastavljanje izraza + cache kljuc), a ne SQL.
+
+    python benchmarks/bench_statements.py [--number 2000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("DB_PROBE_INTERVAL_SECONDS", "0")
+os.environ.setdefault("QUERY_BUDGET_ENABLED", "0")
+
+from sqlalchemy import asc, desc, select, update, func  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import User, Product, Recipe, RecipeIngredient, Order  # noqa: E402
+from app.middlewares.fieldsets import load_only_for  # noqa: E402
+from app.services.statement_cache import cached_statement  # noqa: E402
+from app.services.product_snapshot import LOAD_STMT, RELEASE_STMT  # noqa: E402
+from app.controllers import order_controller, recipe_controller  # noqa: E402
+
+PRODUCT_IDS = [1, 2, 3, 4, 5]
+
+
+def seed():
+    db.create_all()
+    user = User(name="bench", email="bench@shop.io", password_hash="x", role="user")
+    db.session.add(user)
+    products = [Product(name=f"Product {i}", unit="kg", price_cents=100 + i, stock=10**6) for i in range(10)]
+    db.session.add_all(products)
+    db.session.flush()
+    recipe = Recipe(name="Bench recipe", description="tomato soup", creator_id=user.id)
+    recipe.ingredients = [RecipeIngredient(product_id=p.id, quantity=1, unit="kg") for p in products]
+    db.session.add(recipe)
+    db.session.add_all(Order(user_id=user.id, status="PENDING", total_price_cents=100) for _ in range(5))
+    db.session.commit()
+    return user.id, recipe.id
+
+
+def cases(user_id, recipe_id):
+    fields = list(order_controller.LIST_FIELDS)
+    recipe_fields = list(recipe_controller.DEFAULT_LIST_FIELDS)
+
+    def snapshot_before():
+        db.session.query(Product.id, Product.name, Product.price_cents, Product.stock, Product.version) \
+            .filter(Product.id.in_(PRODUCT_IDS)).all()
+
+    def snapshot_after():
+        db.session.execute(LOAD_STMT, {"ids": PRODUCT_IDS}).all()
+
+    def release_before():
+        stmt = (
+            update(Product)
+            .where(Product.id == 1)
+            .values(stock=Product.stock + 1)
+            .returning(Product.stock)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(stmt).scalar()
+
+    def release_after():
+        db.session.execute(RELEASE_STMT, {"product_id": 1, "quantity": 1}).scalar()
+
+    def orders_before():
+        q = Order.query.options(load_only_for(fields, order_controller.LIST_FIELDS))
+        q = q.filter(Order.user_id == user_id).order_by(desc(Order.created_at))
+        q.all()
+
+    def orders_after():
+        params = {"user_id": user_id}
+        key = ("orders.list", tuple(fields), True, False, "created_at", "desc")
+        stmt = cached_statement(key, lambda: order_controller._list_orders_stmt(fields, params, "created_at", "desc"))
+        db.session.execute(stmt, params).scalars().all()
+
+    def recipes_before():
+        q = Recipe.query.options(load_only_for(recipe_fields, recipe_controller.LIST_FIELDS, Recipe.name))
+        q = (
+            q.outerjoin(RecipeIngredient)
+             .outerjoin(Product, Product.id == RecipeIngredient.product_id)
+             .filter(db.or_(Recipe.name.ilike("%toma%"), Recipe.description.ilike("%toma%"),
+                            Product.name.ilike("%toma%")))
+        )
+        q.distinct().order_by(asc(Recipe.name)).all()
+
+    def recipes_after():
+        params = {"pattern": "%toma%"}
+        key = ("recipes.list", tuple(recipe_fields), False, True, "name", "asc")
+        stmt = cached_statement(key, lambda: recipe_controller._list_recipes_stmt(recipe_fields, params, "name", "asc"))
+        db.session.execute(stmt, params).scalars().all()
+
+    def full_before():
+        stmt = (
+            select(Recipe.id, Recipe.name, Recipe.description, Recipe.creator_id, Recipe.version,
+                   User.name.label("creator_name"), RecipeIngredient.id.label("ri_id"), RecipeIngredient.quantity,
+                   RecipeIngredient.unit, Product.id.label("product_id"), Product.name.label("product_name"),
+                   Product.unit.label("product_unit"), Product.price_cents, Product.stock)
+            .join(User, User.id == Recipe.creator_id)
+            .outerjoin(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.id)
+            .outerjoin(Product, Product.id == RecipeIngredient.product_id)
+            .where(Recipe.id == recipe_id)
+            .order_by(RecipeIngredient.id)
+        )
+        db.session.execute(stmt).all()
+
+    def full_after():
+        db.session.execute(recipe_controller.RECIPE_FULL_JOINED_STMT, {"recipe_id": recipe_id}).all()
+
+    def count_before():
+        db.session.query(func.count(Product.id)).filter(Product.id.in_(PRODUCT_IDS)).scalar()
+
+    def count_after():
+        db.session.execute(recipe_controller.COUNT_PRODUCTS_STMT, {"ids": PRODUCT_IDS}).scalar()
+
+    return [
+        ("orders: snapshot load (IN)", snapshot_before, snapshot_after),
+        ("orders: release stock", release_before, release_after),
+        ("orders: list (user)", orders_before, orders_after),
+        ("recipes: list search", recipes_before, recipes_after),
+        ("recipes: full view", full_before, full_after),
+        ("recipes: product check", count_before, count_after),
+    ]
+
+
+def best_us(fn, number, repeat):
+    fn()
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        user_id, recipe_id = seed()
+        print(f"{'query':<28}{'before us':>12}{'after us':>12}{'speedup':>10}")
+        for name, before, after in cases(user_id, recipe_id):
+            b = best_us(before, args.number, args.repeat)
+            a = best_us(after, args.number, args.repeat)
+            print(f"{name:<28}{b:>12.1f}{a:>12.1f}{b / a:>9.2f}x")
+        db.session.rollback()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""add version to products, recipes and orders
+
+Revision ID: 3f1c9a7d2b64
+Revises: e53c004119a2
+Create Date: 2026-10-19 09:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9a7d2b64'
+down_revision = 'e53c004119a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_column('version')
+
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_column('version')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('version')
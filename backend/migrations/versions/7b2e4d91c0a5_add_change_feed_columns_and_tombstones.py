@@ -0,0 +1,52 @@
+"""add change feed columns and catalog tombstones
+
+Revision ID: 7b2e4d91c0a5
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-19 11:02:17.604512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2e4d91c0a5'
+down_revision = '3f1c9a7d2b64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('catalog_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=30), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    with op.batch_alter_table('recipe_ingredients', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+        batch_op.create_index('ix_recipe_ingredients_updated_at_id', ['updated_at', 'id'], unique=False)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_updated_at_id', ['updated_at', 'id'], unique=False)
+
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.create_index('ix_recipes_updated_at_id', ['updated_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_index('ix_recipes_updated_at_id')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_updated_at_id')
+
+    with op.batch_alter_table('recipe_ingredients', schema=None) as batch_op:
+        batch_op.drop_index('ix_recipe_ingredients_updated_at_id')
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('created_at')
+
+    op.drop_table('catalog_tombstones')
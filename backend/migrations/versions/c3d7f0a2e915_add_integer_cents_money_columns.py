@@ -0,0 +1,42 @@
+"""add integer cents money columns
+
+Revision ID: c3d7f0a2e915
+Revises: a94c1e6f3d28
+Create Date: 2026-10-19 15:21:48.730264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d7f0a2e915'
+down_revision = 'a94c1e6f3d28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('price_cents', sa.BigInteger(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_price_cents', sa.BigInteger(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('price_at_purchase_cents', sa.BigInteger(), server_default='0', nullable=False))
+
+    op.execute("UPDATE products SET price_cents = ROUND(price * 100)")
+    op.execute("UPDATE orders SET total_price_cents = ROUND(total_price * 100)")
+    op.execute("UPDATE order_items SET price_at_purchase_cents = ROUND(price_at_purchase * 100)")
+
+
+def downgrade():
+    with op.batch_alter_table('order_items', schema=None) as batch_op:
+        batch_op.drop_column('price_at_purchase_cents')
+
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_column('total_price_cents')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('price_cents')
@@ -0,0 +1,26 @@
+"""index catalog tombstones by deleted_at
+
+Revision ID: d41e8b7c2f90
+Revises: c3d7f0a2e915
+Create Date: 2026-10-20 09:12:41.227310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41e8b7c2f90'
+down_revision = 'c3d7f0a2e915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('catalog_tombstones', schema=None) as batch_op:
+        batch_op.create_index('ix_catalog_tombstones_deleted_at_id', ['deleted_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('catalog_tombstones', schema=None) as batch_op:
+        batch_op.drop_index('ix_catalog_tombstones_deleted_at_id')
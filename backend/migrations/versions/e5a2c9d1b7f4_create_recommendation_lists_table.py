@@ -0,0 +1,30 @@
+"""create recommendation lists table
+
+Revision ID: e5a2c9d1b7f4
+Revises: d41e8b7c2f90
+Create Date: 2026-10-20 10:03:55.918402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a2c9d1b7f4'
+down_revision = 'd41e8b7c2f90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('recommendation_lists',
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('key_id', sa.Integer(), nullable=False),
+    sa.Column('items', sa.JSON(), nullable=False),
+    sa.Column('built_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'key_id')
+    )
+
+
+def downgrade():
+    op.drop_table('recommendation_lists')
@@ -0,0 +1,33 @@
+"""create cart lines table
+
+Revision ID: f8b3d6a4e021
+Revises: e5a2c9d1b7f4
+Create Date: 2026-10-20 10:41:19.506733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8b3d6a4e021'
+down_revision = 'e5a2c9d1b7f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cart_lines',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('added_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'product_id')
+    )
+
+
+def downgrade():
+    op.drop_table('cart_lines')
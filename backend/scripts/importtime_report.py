@@ -0,0 +1,81 @@
+"""
+Startup profil: pokrece `python -X importtime` nad create_app() i sumira najskuplje importe.
+
+    python scripts/importtime_report.py [--top 25] [--min-ms 5]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_CODE = "from app import create_app; create_app()"
+
+
+def run_importtime():
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise SystemExit(proc.returncode)
+    return proc.stderr
+
+
+def parse(output):
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append({
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "name": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return rows
+
+
+def top_level_package(name):
+    return name.split(".")[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--min-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    rows = parse(run_importtime())
+    total_ms = sum(r["self_ms"] for r in rows)
+
+    by_package = {}
+    for r in rows:
+        pkg = top_level_package(r["name"])
+        by_package[pkg] = by_package.get(pkg, 0) + r["self_ms"]
+
+    print(f"Total import time: {total_ms:.1f} ms ({len(rows)} modules)\n")
+
+    print("Top packages by self time:")
+    for pkg, ms in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        if ms < args.min_ms:
+            break
+        print(f"  {ms:8.1f} ms  {pkg}")
+
+    print("\nTop modules by cumulative time (direct imports of app code):")
+    app_rows = [r for r in rows if r["name"].startswith("app") or r["depth"] <= 1]
+    for r in sorted(app_rows, key=lambda r: r["cumulative_ms"], reverse=True)[:args.top]:
+        if r["cumulative_ms"] < args.min_ms:
+            break
+        print(f"  {r['cumulative_ms']:8.1f} ms  {r['name']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+
+import email_validator
+import pytest
+
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["DB_PROBE_INTERVAL_SECONDS"] = "0"
+os.environ["SEARCH_INDEX_WARM"] = "0"
+os.environ["CHANGE_FEED_SAFETY_LAG_SECONDS"] = "0"
+os.environ["INVALIDATION_BUS"] = "memory"
+os.environ["RECOMMENDATIONS_SCHEDULER"] = "0"
+
+# testovi ne smeju da zavise od DNS-a
+email_validator.CHECK_DELIVERABILITY = False
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.services import (  # noqa: E402
+    catalog_snapshot, stale_catalog, product_snapshot, search_index, product_facets, recommendations, db_health,
+)
+
+
+def _reset_state(app):
+    """
+    Kesevi i indeksi su po procesu (modulski), pa se izmedju testova vracaju na pocetno stanje.
+    """
+    with catalog_snapshot._lock:
+        catalog_snapshot._snapshots.clear()
+        catalog_snapshot._sizes.clear()
+    with stale_catalog._lock:
+        stale_catalog._entries.clear()
+        stale_catalog._size = 0
+    product_snapshot.snapshot.clear()
+    search_index.index.rebuild([])
+    search_index.index.built = False
+    with product_facets.index._lock:
+        product_facets.index._reset()
+    with product_facets._dirty_lock:
+        product_facets._dirty.clear()
+    with recommendations._lock:
+        recommendations._stale = False
+        recommendations._lists = recommendations.EMPTY
+        recommendations._checked_at = None
+    db_health.breaker.record_success()
+
+
+@pytest.fixture(scope="session")
+def _app():
+    app = create_app()
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def app(_app):
+    with _app.app_context():
+        db.drop_all()
+        db.create_all()
+    _reset_state(_app)
+    yield _app
+
+
+def _register(app, name, role):
+    client = app.test_client()
+    rv = client.post("/api/auth/register", json={
+        "name": name, "email": f"{name}@shop.io", "password": "secret123", "role": role,
+    })
+    assert rv.status_code == 201, rv.get_json()
+    return client
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin(app):
+    return _register(app, "admin", "admin")
+
+
+@pytest.fixture
+def user(app):
+    return _register(app, "user", "user")
+
+
+@pytest.fixture
+def other_user(app):
+    return _register(app, "other", "user")
+
+
+@pytest.fixture
+def make_product(admin):
+    def make(name, price="2.50", stock=10, unit="kg"):
+        rv = admin.post("/api/products", json={"name": name, "price": price, "stock": stock, "unit": unit})
+        assert rv.status_code == 201, rv.get_json()
+        return rv.get_json()["product"]
+    return make
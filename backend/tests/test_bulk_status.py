@@ -0,0 +1,28 @@
+def _order(client, qty=1):
+    rv = client.post("/api/orders", json={"items": [{"product_id": 1, "quantity": qty}]})
+    assert rv.status_code == 201
+    return rv.get_json()["order"]["id"]
+
+
+def test_bulk_cancel_releases_stock_and_skips_final(admin, user, make_product):
+    make_product("Tomato", stock=10)
+    first, second, third = _order(user, 2), _order(user, 3), _order(user, 1)
+    assert admin.put(f"/api/orders/{third}/status", json={"status": "COMPLETED"}).status_code == 200
+
+    rv = admin.put("/api/orders/status", json={"status": "CANCELLED", "ids": [first, second, third, 99]})
+    body = rv.get_json()
+
+    assert rv.status_code == 200
+    assert sorted(body["updated"]) == [first, second]
+    assert {s["id"]: s["reason"] for s in body["skipped"]} == {third: "final", 99: "not_found"}
+    assert admin.get("/api/products/1").get_json()["product"]["stock"] == 9
+
+
+def test_bulk_by_filter(admin, user, other_user, make_product):
+    make_product("Tomato", stock=10)
+    _order(user)
+    _order(other_user)
+
+    rv = admin.put("/api/orders/status", json={"status": "PAID", "filter": {"status": "PENDING"}})
+    assert rv.get_json()["count"] == 2
+    assert rv.get_json()["has_more"] is False
@@ -0,0 +1,63 @@
+import pytest
+
+from app.extensions import db
+from app.models import Order, Product, User
+from app.services import cart_store
+
+
+def test_checkout_removes_only_ordered_quantities(app, user, make_product, monkeypatch):
+    make_product("Tomato", stock=10)
+    make_product("Basil", stock=10)
+    user.post("/api/cart/items", json={"product_id": 1, "quantity": 2})
+
+    real_get = cart_store.store.get
+
+    def get_then_add(user_id):
+        lines = real_get(user_id)
+        # druga kartica doda stavku dok checkout pravi porudzbinu
+        cart_store.store.add(user_id, 2, 1)
+        cart_store.store.add(user_id, 1, 1)
+        return lines
+
+    monkeypatch.setattr(cart_store.store, "get", get_then_add)
+    rv = user.post("/api/cart/checkout")
+    monkeypatch.undo()
+
+    assert rv.status_code == 201
+    cart = user.get("/api/cart").get_json()["cart"]
+    assert {i["product_id"]: i["quantity"] for i in cart["items"]} == {1: 1, 2: 1}
+
+
+def test_checkout_commits_order_and_cart_together(app, user, make_product, monkeypatch):
+    make_product("Tomato", stock=10)
+    user.post("/api/cart/items", json={"product_id": 1, "quantity": 2})
+
+    real_subtract = cart_store.store.subtract
+
+    def subtract_then_fail(user_id, ordered, commit=True):
+        real_subtract(user_id, ordered, commit=commit)
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(cart_store.store, "subtract", subtract_then_fail)
+    with pytest.raises(RuntimeError):
+        user.post("/api/cart/checkout")
+    monkeypatch.undo()
+
+    with app.app_context():
+        assert Order.query.count() == 0
+        assert db.session.get(Product, 1).stock == 10
+    cart = user.get("/api/cart").get_json()["cart"]
+    assert {i["product_id"]: i["quantity"] for i in cart["items"]} == {1: 2}
+
+    assert user.post("/api/cart/checkout").status_code == 201
+    assert user.get("/api/cart").get_json()["cart"]["items"] == []
+
+
+def test_cart_is_shared_between_store_instances(app, user, make_product):
+    make_product("Tomato")
+    user.post("/api/cart/items", json={"product_id": 1, "quantity": 3})
+    assert isinstance(cart_store.store, cart_store.DatabaseCartStore)
+    with app.app_context():
+        user_id = User.query.filter_by(email="user@shop.io").one().id
+        other_worker = cart_store.DatabaseCartStore(ttl=3600)
+        assert other_worker.get(user_id) == {1: 3}
@@ -0,0 +1,38 @@
+from app.services import catalog_snapshot
+
+
+def test_snapshot_hit_and_invalidation_on_product_change(admin, make_product):
+    make_product("Tomato")
+    first = admin.get("/api/products")
+    assert first.headers["X-Catalog-Snapshot"] == "miss"
+    assert admin.get("/api/products").headers["X-Catalog-Snapshot"] == "hit"
+
+    admin.put("/api/products/1", json={"name": "Cherry tomato"})
+    rv = admin.get("/api/products")
+    assert rv.headers["X-Catalog-Snapshot"] == "miss"
+    assert rv.get_json()["items"][0]["name"] == "Cherry tomato"
+
+
+def test_gzip_body_is_served_from_snapshot(admin, make_product):
+    for i in range(30):
+        make_product(f"Product {i}")
+    rv = admin.get("/api/products", headers={"Accept-Encoding": "gzip"})
+    assert rv.headers["Content-Encoding"] == "gzip"
+
+
+def test_unknown_query_params_share_one_entry(admin, make_product):
+    make_product("Tomato")
+    admin.get("/api/products?search=tom")
+    size = catalog_snapshot.cached_bytes("products")
+    for i in range(20):
+        rv = admin.get(f"/api/products?search=tom&junk={i}")
+        assert rv.headers["X-Catalog-Snapshot"] == "hit"
+    assert catalog_snapshot.cached_bytes("products") == size
+
+
+def test_cache_is_bounded_by_bytes(admin, make_product, monkeypatch):
+    make_product("Tomato")
+    monkeypatch.setattr(catalog_snapshot, "max_bytes_per_namespace", 2000)
+    for i in range(40):
+        admin.get(f"/api/products?search={i}")
+    assert 0 < catalog_snapshot.cached_bytes("products") <= 2000
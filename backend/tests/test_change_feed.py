@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models import Product, Recipe, RecipeIngredient
+from app.services import change_feed
+
+
+def _spread_timestamps(app):
+    # sqlite cuva server now() sa sekundnom preciznoscu; razmakni redove kao u pravoj bazi
+    base = datetime(2024, 1, 1)
+    with app.app_context():
+        for model in (Product, Recipe, RecipeIngredient):
+            for i, obj in enumerate(model.query.order_by(model.id)):
+                ts = base + timedelta(seconds=i)
+                db.session.execute(
+                    db.update(model).where(model.id == obj.id).values(created_at=ts, updated_at=ts)
+                )
+        db.session.commit()
+
+
+def _sync(client, limit, token=""):
+    seen, deleted, pages = {}, set(), 0
+    while True:
+        rv = client.get(f"/api/changes?since={token}&limit={limit}")
+        assert rv.status_code == 200, rv.get_json()
+        body = rv.get_json()
+        pages += 1
+        for item in body["changes"]["products"]["created"] + body["changes"]["products"]["updated"]:
+            seen[item["id"]] = item
+        deleted.update(body["changes"]["products"]["deleted"])
+        token = body["next"]
+        if not body["has_more"]:
+            return seen, deleted, token, pages
+
+
+def test_pagination_does_not_lose_rows(app, admin, make_product):
+    for i in range(7):
+        make_product(f"Product {i}")
+    admin.post("/api/recipes", json={"name": "Salad", "ingredients": [{"product_id": 1, "quantity": 1}]})
+    _spread_timestamps(app)
+
+    seen, deleted, token, pages = _sync(admin, limit=2)
+    assert sorted(seen) == list(range(1, 8))
+    assert deleted == set()
+    assert pages == 5
+
+    admin.delete("/api/products/5")
+    seen, deleted, _, _ = _sync(admin, limit=2, token=token)
+    assert deleted == {5}
+
+
+def test_limit_caps_total_rows_across_feeds(app, admin, make_product):
+    for i in range(3):
+        make_product(f"Product {i}")
+    admin.post("/api/recipes", json={"name": "Salad", "ingredients": [{"product_id": 1, "quantity": 1}]})
+    _spread_timestamps(app)
+
+    body = admin.get("/api/changes?limit=3").get_json()
+    total = sum(len(f["created"]) + len(f["updated"]) + len(f["deleted"]) for f in body["changes"].values())
+    assert total == 3
+    assert body["has_more"] is True
+
+
+def test_cursor_stays_behind_safety_lag(app, admin, make_product):
+    make_product("Tomato")
+    with app.app_context():
+        rows, _, cursor, has_more = change_feed.fetch_changes({}, 100, lag_seconds=3600)
+    # red mladji od lag-a se ne vraca i kursor ga ne preskace
+    assert rows["products"] == []
+    assert "products" not in cursor
+    with app.app_context():
+        rows, _, _, _ = change_feed.fetch_changes(change_feed.decode_token(change_feed.encode_token(cursor)), 100, 0)
+    assert [p.name for p in rows["products"]] == ["Tomato"]
@@ -0,0 +1,72 @@
+from sqlalchemy import update
+
+from app.controllers import order_controller, order_item_controller
+from app.extensions import db
+from app.models import Order, OrderItem, Product
+
+
+def test_if_match_mismatch_returns_412(admin, make_product):
+    make_product("Tomato")
+    rv = admin.get("/api/products/1")
+    etag = rv.headers["ETag"]
+
+    assert admin.put("/api/products/1", json={"stock": 5}, headers={"If-Match": etag}).status_code == 200
+
+    stale = admin.put("/api/products/1", json={"stock": 7}, headers={"If-Match": etag})
+    assert stale.status_code == 412
+    assert stale.headers["ETag"] != etag
+    assert admin.get("/api/products/1").get_json()["product"]["stock"] == 5
+
+
+def test_update_without_if_match_still_allowed(admin, make_product):
+    make_product("Tomato")
+    assert admin.put("/api/products/1", json={"stock": 3}).status_code == 200
+
+
+def _concurrent_admin_change(app, order_id):
+    # drugi pisac (admin/sweeper) commituje izmenu porudzbine dok prvi zahtev jos radi
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(Order).where(Order.id == order_id)
+                .values(status="PROCESSING", version=Order.version + 1)
+            )
+
+
+def test_cancel_racing_admin_change_returns_412(app, user, make_product, monkeypatch):
+    make_product("Tomato", stock=10)
+    order_id = user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 2}]}).get_json()["order"]["id"]
+
+    real_release = order_controller.release_order_stock
+
+    def release(order):
+        _concurrent_admin_change(app, order_id)
+        return real_release(order)
+
+    monkeypatch.setattr(order_controller, "release_order_stock", release)
+    rv = user.post(f"/api/orders/{order_id}/cancel")
+
+    assert rv.status_code == 412
+    with app.app_context():
+        assert db.session.get(Order, order_id).status == "PROCESSING"
+        assert db.session.get(Product, 1).stock == 8
+
+
+def test_item_update_racing_admin_change_returns_412(app, user, make_product, monkeypatch):
+    make_product("Tomato", stock=10)
+    order_id = user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 2}]}).get_json()["order"]["id"]
+    item_id = user.get(f"/api/order-items?orderId={order_id}").get_json()["items"][0]["id"]
+
+    real_reserve = order_item_controller.reserve_stock
+
+    def reserve(product_id, quantity, version=None):
+        _concurrent_admin_change(app, order_id)
+        return real_reserve(product_id, quantity, version)
+
+    monkeypatch.setattr(order_item_controller, "reserve_stock", reserve)
+    rv = user.put(f"/api/order-items/{item_id}", json={"quantity": 5})
+
+    assert rv.status_code == 412
+    with app.app_context():
+        assert db.session.get(OrderItem, item_id).quantity == 2
+        assert db.session.get(Product, 1).stock == 8
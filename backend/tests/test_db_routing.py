@@ -0,0 +1,21 @@
+import os
+
+from app.services.db_routing import ReplicaRouter
+
+
+def test_unhealthy_replica_leaves_rotation(tmp_path):
+    good = f"sqlite:///{tmp_path / 'replica.db'}"
+    bad = f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+    router = ReplicaRouter()
+    router.configure([good, bad])
+
+    results = router.check(max_lag_seconds=10)
+
+    assert [r["status"] for r in results] == ["ok", "error"]
+    picked = {router.next_replica().url.database for _ in range(4)}
+    assert picked == {os.fspath(tmp_path / "replica.db")}
+
+
+def test_reads_stay_on_primary_without_replicas(admin, make_product):
+    make_product("Tomato")
+    assert admin.get("/api/products").get_json()["count"] == 1
@@ -0,0 +1,34 @@
+from app.services import product_facets
+
+
+def test_filters_and_counts(admin, make_product):
+    make_product("Tomato", price="2.50", stock=10, unit="kg")
+    make_product("Milk", price="1.20", stock=0, unit="l")
+    make_product("Beef", price="30.00", stock=3, unit="kg")
+
+    body = admin.get("/api/products?unit=kg&in_stock=1&max_price=10").get_json()
+    assert [i["name"] for i in body["items"]] == ["Tomato"]
+    assert body["facets"]["unit"] == {"kg": 1, "l": 0}
+    assert body["facets"]["inStock"] == {"true": 1, "false": 0}
+
+    admin.put("/api/products/3", json={"price": "9.00"})
+    body = admin.get("/api/products?unit=kg&in_stock=1&max_price=10").get_json()
+    assert [i["name"] for i in body["items"]] == ["Beef", "Tomato"]
+
+
+def test_changes_during_build_are_reloaded(app, admin, make_product, monkeypatch):
+    make_product("Tomato", stock=10)
+    real_load = product_facets._load
+
+    def load(ids=None):
+        rows = real_load(ids)
+        if ids is None:
+            # promena commitovana posle citanja, pre nego sto je indeks oznacen kao izgradjen
+            admin.put("/api/products/1", json={"stock": 0})
+        return rows
+
+    monkeypatch.setattr(product_facets, "_load", load)
+    with app.app_context():
+        product_facets.ensure_current()
+        rows, _ = product_facets.index.query([], None, None, True)
+    assert rows == []
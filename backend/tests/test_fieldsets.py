@@ -0,0 +1,17 @@
+def test_fields_param_limits_payload(admin, make_product):
+    make_product("Tomato")
+    item = admin.get("/api/products?fields=name").get_json()["items"][0]
+    assert item == {"id": 1, "name": "Tomato"}
+
+
+def test_unknown_field_is_rejected(admin):
+    rv = admin.get("/api/products?fields=name,secret")
+    assert rv.status_code == 400
+    assert "Unknown fields" in rv.get_json()["error"]
+
+
+def test_order_list_fields(user, make_product):
+    make_product("Tomato")
+    user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 1}]})
+    order = user.get("/api/orders?fields=status").get_json()["items"][0]
+    assert set(order) == {"id", "status"}
@@ -0,0 +1,78 @@
+import hashlib
+import json
+from datetime import datetime
+
+from app.extensions import db
+from app.middlewares.idempotency import DatabaseIdempotencyStore
+from app.models import IdempotencyKey, Order, User
+
+
+def test_replayed_key_returns_same_response_once(app, user, make_product):
+    make_product("Tomato", stock=10)
+    body = {"items": [{"product_id": 1, "quantity": 2}]}
+    headers = {"Idempotency-Key": "order-1"}
+
+    first = user.post("/api/orders", json=body, headers=headers)
+    second = user.post("/api/orders", json=body, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert first.get_json() == second.get_json()
+    with app.app_context():
+        assert db.session.query(Order).count() == 1
+
+
+def test_same_key_with_different_body_is_rejected(user, make_product):
+    make_product("Tomato", stock=10)
+    headers = {"Idempotency-Key": "order-2"}
+    user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 1}]}, headers=headers)
+    rv = user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 3}]}, headers=headers)
+    assert rv.status_code == 422
+
+
+def test_replay_on_another_worker_does_not_create_second_order(app, user, make_product, monkeypatch):
+    make_product("Tomato", stock=10)
+    body = {"items": [{"product_id": 1, "quantity": 2}]}
+    headers = {"Idempotency-Key": "mobile-retry"}
+
+    first = user.post("/api/orders", json=body, headers=headers)
+    # drugi worker: nov store bez ikakvog stanja u memoriji
+    monkeypatch.setitem(app.extensions, "idempotency_store", DatabaseIdempotencyStore())
+    second = user.post("/api/orders", json=body, headers=headers)
+
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.get_json() == first.get_json()
+    with app.app_context():
+        assert db.session.query(Order).count() == 1
+
+
+def test_in_flight_key_is_rejected_until_its_lease_expires(app, user, make_product):
+    make_product("Tomato", stock=10)
+    body = {"items": [{"product_id": 1, "quantity": 1}]}
+    with app.app_context():
+        user_id = User.query.filter_by(email="user@shop.io").one().id
+        store = app.extensions["idempotency_store"]
+        key = (str(user_id), "POST", "/api/orders", "crashed")
+        fingerprint = hashlib.sha256(json.dumps(body).encode()).digest()
+        assert store.begin(key, fingerprint) == ("new", None)
+
+    rv = user.post("/api/orders", data=json.dumps(body), content_type="application/json",
+                   headers={"Idempotency-Key": "crashed"})
+    assert rv.status_code == 409
+
+    with app.app_context():
+        db.session.execute(db.update(IdempotencyKey).values(expires_at=datetime(2000, 1, 1)))
+        db.session.commit()
+    rv = user.post("/api/orders", data=json.dumps(body), content_type="application/json",
+                   headers={"Idempotency-Key": "crashed"})
+    assert rv.status_code == 201
+
+
+def test_purge_removes_expired_keys(app, user, make_product):
+    make_product("Tomato", stock=10)
+    for i in range(3):
+        user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 1}]}, headers={"Idempotency-Key": f"k{i}"})
+    with app.app_context():
+        db.session.execute(db.update(IdempotencyKey).where(IdempotencyKey.key == "k0").values(expires_at=datetime(2000, 1, 1)))
+        db.session.commit()
+        assert app.extensions["idempotency_store"].purge_expired() == 1
+        assert sorted(k for (k,) in db.session.query(IdempotencyKey.key)) == ["k1", "k2"]
@@ -0,0 +1,70 @@
+import json
+
+from app.services import catalog_snapshot, invalidation_bus, product_snapshot
+from app.services.catalog_events import CatalogChange
+
+
+def _remote(changes):
+    payloads = invalidation_bus.encode_changes(changes)
+    return [json.dumps({**json.loads(p), "w": "other-worker"}) for p in payloads]
+
+
+def test_notify_from_other_worker_invalidates_local_caches(app, admin, make_product):
+    make_product("Tomato", stock=5)
+    admin.get("/api/products")
+    with app.app_context():
+        version = product_snapshot.snapshot.get_many([1])[1].version
+
+        for payload in _remote([CatalogChange("product", 1, "updated", {"name": "Cherry", "version": version + 1})]):
+            invalidation_bus._receive_catalog_changes(payload)
+
+        assert 1 not in product_snapshot.snapshot._items
+    assert admin.get("/api/products").headers["X-Catalog-Snapshot"] == "miss"
+
+
+def test_own_notifications_are_ignored(app, admin, make_product):
+    make_product("Tomato")
+    admin.get("/api/products")
+    own = invalidation_bus.encode_changes([CatalogChange("product", 1, "deleted", {})])
+    for payload in own:
+        invalidation_bus._receive_catalog_changes(payload)
+    assert admin.get("/api/products").headers["X-Catalog-Snapshot"] == "hit"
+
+
+def test_large_batches_are_split_under_payload_limit():
+    changes = [CatalogChange("product", i, "updated", {"name": "x" * 50, "stock": i}) for i in range(500)]
+    payloads = invalidation_bus.encode_changes(changes)
+    assert len(payloads) > 1
+    assert all(len(p.encode()) <= invalidation_bus.MAX_PAYLOAD_BYTES for p in payloads)
+    assert sum(len(invalidation_bus.decode_changes(p)[1]) for p in payloads) == 500
+
+
+class _RecordingBus:
+    def __init__(self):
+        self.sent = []
+
+    def notify(self, channel, payload, connection=None):
+        # poruka mora da ide kroz konekciju transakcije koja menja podatke
+        assert connection is not None and connection.in_transaction()
+        self.sent.extend(invalidation_bus.decode_changes(payload)[1])
+
+
+def test_order_commits_are_sent_in_the_same_transaction(app, admin, user, make_product, monkeypatch):
+    make_product("Tomato", stock=5)
+    recording = _RecordingBus()
+    monkeypatch.setattr(invalidation_bus, "bus", recording)
+
+    assert user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 9}]}).status_code == 400
+    assert recording.sent == []
+
+    order_id = user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 2}]}).get_json()["order"]["id"]
+    assert CatalogChange("order", order_id, "created", {"version": 1}) in recording.sent
+    assert CatalogChange("product", 1, "updated", {"stock": 3}) in recording.sent
+
+    recording.sent.clear()
+    assert admin.put(f"/api/orders/{order_id}/status", json={"status": "PROCESSING"}).status_code == 200
+    assert [c for c in recording.sent if c.entity == "order"] == [CatalogChange("order", order_id, "updated", {"version": 2})]
+
+    recording.sent.clear()
+    assert admin.put("/api/orders/status", json={"status": "CANCELLED", "ids": [order_id]}).status_code == 200
+    assert CatalogChange("order", order_id, "updated", {"version": 3}) in recording.sent
@@ -0,0 +1,67 @@
+from sqlalchemy.dialects import postgresql
+
+from app.extensions import db
+from app.models import Job
+from app.services import jobs
+
+
+def test_order_creation_enqueues_job_in_same_commit(app, user, make_product):
+    make_product("Tomato")
+    assert user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 1}]}).status_code == 201
+    with app.app_context():
+        names = [j.name for j in Job.query.order_by(Job.id)]
+        assert "order.created" in names
+        assert jobs.work(once=True) >= 1
+        assert {j.status for j in Job.query} == {"DONE"}
+
+
+def test_failing_job_is_retried_then_failed(app, monkeypatch):
+    calls = []
+
+    def boom(payload):
+        calls.append(payload)
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs._handlers, "test.boom", boom)
+    monkeypatch.setattr(jobs, "backoff_seconds", lambda attempts: -1)
+    with app.app_context():
+        jobs.enqueue("test.boom", {"n": 1}, max_attempts=2)
+        db.session.commit()
+        jobs.work(once=True)
+        assert Job.query.one().status == "QUEUED"
+        jobs.work(once=True)
+        job = Job.query.one()
+        assert job.status == "FAILED"
+        assert "boom" in job.last_error
+    assert len(calls) == 2
+
+
+def test_user_cancel_enqueues_status_change(app, user, make_product):
+    make_product("Tomato")
+    order_id = user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 1}]}).get_json()["order"]["id"]
+    assert user.post(f"/api/orders/{order_id}/cancel").status_code == 200
+    with app.app_context():
+        payloads = [j.payload for j in Job.query.filter_by(name="order.status_changed")]
+    assert payloads == [{"order_id": order_id, "status": "CANCELLED", "previous_status": "PENDING"}]
+
+
+def test_purge_uses_database_clock(app):
+    with app.app_context():
+        old, recent = jobs.enqueue("order.created", {"order_id": 1}), jobs.enqueue("order.created", {"order_id": 2})
+        db.session.commit()
+        db.session.execute(db.update(Job).values(status="DONE"))
+        db.session.execute(
+            db.update(Job).where(Job.id == old.id).values(updated_at=db.func.datetime("now", "-3 hours"))
+        )
+        db.session.commit()
+        recent_id = recent.id
+
+    result = app.test_cli_runner().invoke(args=["jobs", "purge", "--older-than-hours", "2"])
+    assert "Deleted 1 job(s)." in result.output
+    with app.app_context():
+        assert [j.id for j in Job.query] == [recent_id]
+
+
+def test_purge_cutoff_compiles_to_database_now():
+    sql = str(jobs.db_hours_ago(24, "postgresql").compile(dialect=postgresql.dialect()))
+    assert "now()" in sql
@@ -0,0 +1,28 @@
+from decimal import Decimal, InvalidOperation
+
+import pytest
+
+from app.money import format_cents, sum_line_totals, to_cents
+
+
+@pytest.mark.parametrize("value, cents", [("12.5", 1250), (12.5, 1250), (Decimal("0.005"), 1), (3, 300), ("0.1", 10)])
+def test_to_cents(value, cents):
+    assert to_cents(value) == cents
+
+
+def test_to_cents_rejects_garbage():
+    with pytest.raises(InvalidOperation):
+        to_cents("abc")
+
+
+def test_format_and_sum_are_exact():
+    assert format_cents(1250) == "12.50"
+    assert format_cents(-5) == "-0.05"
+    assert format_cents(None) is None
+    assert format_cents(sum_line_totals([(10, 3)] * 10)) == "3.00"
+
+
+def test_order_total_is_exact(user, make_product):
+    make_product("Tomato", price="0.10", stock=100)
+    rv = user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 3}]})
+    assert rv.get_json()["order"]["total_price"] == "0.30"
@@ -0,0 +1,40 @@
+import queue
+
+from app.services.order_events import OrderEventBroker, SUBSCRIBER_QUEUE_SIZE
+
+
+def test_slow_subscriber_drops_oldest_event():
+    broker = OrderEventBroker()
+    sub = broker.subscribe(7)
+    for i in range(SUBSCRIBER_QUEUE_SIZE + 5):
+        broker.dispatch({"order_id": i, "user_id": 7, "status": "PAID"})
+    events = [sub.queue.get_nowait()["order_id"] for _ in range(sub.queue.qsize())]
+    assert len(events) == SUBSCRIBER_QUEUE_SIZE
+    assert events[-1] == SUBSCRIBER_QUEUE_SIZE + 4
+
+
+def test_dispatch_never_raises_when_queue_refills_concurrently():
+    broker = OrderEventBroker()
+    sub = broker.subscribe(7)
+    for i in range(SUBSCRIBER_QUEUE_SIZE):
+        sub.queue.put_nowait({"order_id": i})
+
+    real_get = sub.queue.get_nowait
+
+    def racing_get():
+        # drugi dispatch popuni oslobodjeno mesto pre nego sto ovaj stigne da upise
+        item = real_get()
+        sub.queue.put_nowait({"order_id": "other"})
+        return item
+
+    sub.queue.get_nowait = racing_get
+    broker.dispatch({"order_id": 1, "user_id": 7, "status": "PAID"})
+    assert sub.queue.full()
+
+
+def test_admin_subscription_receives_every_user():
+    broker = OrderEventBroker()
+    admin = broker.subscribe("*")
+    broker.dispatch({"order_id": 1, "user_id": 3, "status": "PAID"})
+    assert admin.get(timeout=0)["order_id"] == 1
+    assert isinstance(admin.queue, queue.Queue)
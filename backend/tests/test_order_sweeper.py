@@ -0,0 +1,39 @@
+from sqlalchemy.dialects import postgresql
+
+from app.extensions import db
+from app.models import Order
+from app.services.order_sweeper import expired_before, sweep_expired
+
+
+def _order(client):
+    rv = client.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 2}]})
+    return rv.get_json()["order"]["id"]
+
+
+def test_sweeper_respects_ttl(app, admin, user, make_product):
+    make_product("Tomato", stock=10)
+    old, fresh = _order(user), _order(user)
+    with app.app_context():
+        # created_at upisuje baza, pa se i "staro" pravi na strani baze
+        db.session.execute(
+            db.update(Order).where(Order.id == old).values(created_at=db.func.datetime("now", "-90 minutes"))
+        )
+        db.session.commit()
+
+        assert sweep_expired(ttl_minutes=60) == 1
+        statuses = dict(db.session.query(Order.id, Order.status))
+    assert statuses == {old: "CANCELLED", fresh: "PENDING"}
+    assert admin.get("/api/products/1").get_json()["product"]["stock"] == 8
+
+
+def test_fresh_orders_are_not_swept(app, user, make_product):
+    make_product("Tomato", stock=10)
+    _order(user)
+    with app.app_context():
+        assert sweep_expired(ttl_minutes=1) == 0
+
+
+def test_cutoff_uses_database_clock():
+    sql = str(expired_before(30, "postgresql").compile(dialect=postgresql.dialect()))
+    assert "now()" in sql
+    assert "interval '1 minute'" in sql
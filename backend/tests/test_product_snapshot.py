@@ -0,0 +1,85 @@
+import threading
+
+from app.extensions import db
+from app.services import catalog_snapshot, product_snapshot
+
+
+def test_reserve_with_stale_version_is_refused(app, make_product):
+    make_product("Tomato", stock=5)
+    with app.app_context():
+        entry = product_snapshot.snapshot.get_many([1])[1]
+        assert product_snapshot.reserve_stock(1, 2, entry.version + 1) is None
+        assert product_snapshot.reserve_stock(1, 2, entry.version) == 3
+        assert product_snapshot.reserve_stock(1, 4) is None
+        db.session.commit()
+
+
+def test_order_patches_stock_without_flushing_recipes(admin, user, make_product):
+    make_product("Tomato", stock=5)
+    admin.post("/api/recipes", json={"name": "Salad", "ingredients": [{"product_id": 1, "quantity": 1}]})
+    admin.get("/api/products")
+    admin.get("/api/recipes")
+
+    assert user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 2}]}).status_code == 201
+
+    recipes = admin.get("/api/recipes")
+    assert recipes.headers["X-Catalog-Snapshot"] == "hit"
+    products = admin.get("/api/products")
+    assert products.headers["X-Catalog-Snapshot"] == "hit"
+    assert products.get_json()["items"][0]["stock"] == 3
+
+
+def test_stock_change_drops_stock_filtered_snapshot(admin, user, make_product):
+    make_product("Tomato", stock=2)
+    assert admin.get("/api/products?in_stock=1").get_json()["count"] == 1
+
+    user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 2}]})
+
+    rv = admin.get("/api/products?in_stock=1")
+    assert rv.headers["X-Catalog-Snapshot"] == "miss"
+    assert rv.get_json()["count"] == 0
+    assert catalog_snapshot.cached_bytes("recipes") == 0
+
+
+def test_order_committed_during_build_is_not_lost(admin, user, make_product, monkeypatch):
+    make_product("Tomato", stock=5)
+    real_slots = catalog_snapshot._stock_slots
+    ordered = []
+
+    def order_mid_build(namespace, raw):
+        # lista je vec procitana iz baze (stock 5), porudzbina commituje pre put()
+        if not ordered:
+            worker = threading.Thread(target=lambda: ordered.append(
+                user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 2}]}).status_code
+            ))
+            worker.start()
+            worker.join()
+        return real_slots(namespace, raw)
+
+    monkeypatch.setattr(catalog_snapshot, "_stock_slots", order_mid_build)
+    first = admin.get("/api/products")
+    assert ordered == [201]
+    assert first.get_json()["items"][0]["stock"] == 5
+
+    rv = admin.get("/api/products")
+    assert rv.headers["X-Catalog-Snapshot"] == "hit"
+    assert rv.get_json()["items"][0]["stock"] == 3
+
+
+def test_stock_dependent_build_racing_order_is_not_cached(admin, user, make_product, monkeypatch):
+    make_product("Tomato", stock=2)
+    real_slots = catalog_snapshot._stock_slots
+
+    def order_mid_build(namespace, raw):
+        worker = threading.Thread(target=lambda: user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 2}]}))
+        worker.start()
+        worker.join()
+        return real_slots(namespace, raw)
+
+    monkeypatch.setattr(catalog_snapshot, "_stock_slots", order_mid_build)
+    admin.get("/api/products?in_stock=1")
+    monkeypatch.undo()
+
+    rv = admin.get("/api/products?in_stock=1")
+    assert rv.headers["X-Catalog-Snapshot"] == "miss"
+    assert rv.get_json()["count"] == 0
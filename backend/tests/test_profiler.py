@@ -0,0 +1,64 @@
+import threading
+import time
+
+from app import create_app
+from app.middlewares.profiler import StackSampler
+
+
+def test_profile_param_is_ignored_when_disabled(admin, make_product):
+    make_product("Tomato")
+    rv = admin.get("/api/products?__profile=1")
+    assert rv.status_code == 200
+    assert "items" in rv.get_json()
+
+
+def _login(app, name, role):
+    client = app.test_client()
+    rv = client.post("/api/auth/register", json={
+        "name": name, "email": f"{name}@shop.io", "password": "secret123", "role": role,
+    })
+    assert rv.status_code == 201, rv.get_json()
+    return client
+
+
+def test_profile_is_returned_only_to_admin(app, monkeypatch):
+    monkeypatch.setenv("PROFILER_ENABLED", "1")
+    profiled = create_app()
+    profiled.config["TESTING"] = True
+    admin = _login(profiled, "admin", "admin")
+    user = _login(profiled, "user", "user")
+    assert admin.post("/api/products", json={"name": "Tomato", "price": "2.50", "stock": 10, "unit": "kg"}).status_code == 201
+
+    report = admin.get("/api/products?__profile=1").get_json()
+    assert report["mode"] == "cprofile"
+    assert report["status"] == 200
+    assert report["functions"]
+    assert "items" not in report
+
+    sampled = admin.get("/api/products", headers={"X-Profile": "sample"}).get_json()
+    assert sampled["mode"] == "sample"
+
+    rv = user.get("/api/products?__profile=1")
+    assert rv.status_code == 200
+    assert [p["name"] for p in rv.get_json()["items"]] == ["Tomato"]
+    assert "functions" not in rv.get_json()
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_stack_sampler_records_target_thread():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,))
+    worker.start()
+    sampler = StackSampler(worker.ident, interval=0.001)
+    sampler.start()
+    time.sleep(0.05)
+    sampler.stop()
+    stop.set()
+    worker.join()
+
+    assert any("busy_loop" in line for line in sampler.folded().splitlines())
+    assert sampler.hot_functions(3)[0]["samples"] > 0
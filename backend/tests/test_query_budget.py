@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+import pytest
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db
+from app.middlewares import query_budget
+
+
+def test_request_over_query_budget_returns_503(app, admin, make_product):
+    make_product("Tomato")
+    budgets = app.config["QUERY_BUDGETS"]
+    app.config["QUERY_BUDGETS"] = {"orders": {"max_queries": 1}}
+    try:
+        rv = admin.get("/api/orders")
+    finally:
+        app.config["QUERY_BUDGETS"] = budgets
+    assert rv.status_code == 503
+    assert "Query budget exceeded" in rv.get_json()["error"]
+
+    assert admin.get("/api/products").status_code == 200
+
+
+class _Cursor:
+    description = (("id",),)
+
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+
+
+class _Conn:
+    def __init__(self):
+        self.info = {}
+
+
+def test_row_cap_raises_413(app):
+    with app.test_request_context("/api/orders"):
+        g.query_budget = query_budget.RequestBudget({"max_rows": 10})
+        conn = _Conn()
+        query_budget._after_cursor_execute(conn, _Cursor(6), "SELECT", {}, None, False)
+        with pytest.raises(query_budget.QueryBudgetExceeded) as e:
+            query_budget._after_cursor_execute(conn, _Cursor(6), "SELECT", {}, None, False)
+    assert e.value.status == 413
+
+
+def test_row_cap_error_response(app, admin):
+    def too_many_rows(conn, cursor, statement, parameters, context, executemany):
+        if "FROM orders" in statement:
+            raise query_budget.QueryBudgetExceeded("Result too large: more than 1 rows.", 413)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", too_many_rows)
+    try:
+        rv = admin.get("/api/orders")
+    finally:
+        event.remove(engine, "before_cursor_execute", too_many_rows)
+    assert rv.status_code == 413
+    assert "Retry-After" not in rv.headers
+    assert admin.get("/api/orders").status_code == 200
+
+
+def test_catalog_and_index_loads_have_no_row_cap(app):
+    assert query_budget.budget_for(app, "products")["max_rows"] is None
+    assert query_budget.budget_for(app, "recipes")["max_rows"] is None
+    assert query_budget.budget_for(app, "orders")["max_rows"] == 10_000
+
+
+def test_index_build_is_not_charged_to_the_request(app, admin, make_product):
+    for name in ("Tomato", "Basil", "Pasta"):
+        make_product(name)
+    budgets = app.config["QUERY_BUDGETS"]
+    app.config["QUERY_BUDGETS"] = {"search": {"max_queries": 1}}
+    try:
+        rv = admin.get("/api/search/suggest?q=bas")
+    finally:
+        app.config["QUERY_BUDGETS"] = budgets
+    assert rv.status_code == 200
+    assert [i["name"] for i in rv.get_json()["items"]] == ["Basil"]
+
+
+class _PgCursor:
+    def __init__(self, executed):
+        self.executed = executed
+
+    def execute(self, sql):
+        self.executed.append(sql)
+
+    def close(self):
+        pass
+
+
+def test_statement_timeout_is_set_per_transaction_on_postgres(app):
+    executed = []
+    conn = SimpleNamespace(
+        dialect=SimpleNamespace(name="postgresql"),
+        connection=SimpleNamespace(dbapi_connection=SimpleNamespace(cursor=lambda: _PgCursor(executed))),
+    )
+    with app.test_request_context("/api/orders"):
+        g.query_budget = query_budget.RequestBudget({"statement_timeout_ms": 250})
+        query_budget._on_begin(conn)
+        g.query_budget = None
+        query_budget._on_begin(conn)
+    assert executed == ["SET LOCAL statement_timeout = 250"]
+
+
+def test_statement_timeout_returns_503(app, admin):
+    class QueryCanceled(Exception):
+        pgcode = query_budget.PG_QUERY_CANCELED
+
+    def cancel(conn, cursor, statement, parameters, context, executemany):
+        if "FROM orders" in statement:
+            raise OperationalError(statement, parameters, QueryCanceled("canceling statement due to statement timeout"))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", cancel)
+    try:
+        rv = admin.get("/api/orders")
+    finally:
+        event.remove(engine, "before_cursor_execute", cancel)
+    assert rv.status_code == 503
+    assert rv.headers["Retry-After"] == "5"
+    assert "statement timeout" in rv.get_json()["error"]
@@ -0,0 +1,38 @@
+from sqlalchemy import event
+
+from app.extensions import db
+
+
+def test_full_view_assembles_recipe_in_one_query(app, admin, make_product):
+    make_product("Tomato", price="2.50")
+    make_product("Basil", price="1.00")
+    rv = admin.post("/api/recipes", json={
+        "name": "Salad",
+        "ingredients": [{"product_id": 1, "quantity": 2, "unit": "kg"}, {"product_id": 2, "quantity": 1}],
+    })
+    assert rv.status_code == 201
+
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def count(conn, cursor, statement, *args):
+        if "FROM recipes" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        rv = admin.get("/api/recipes/1/full")
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    recipe = rv.get_json()["recipe"]
+    assert rv.status_code == 200
+    assert [i["product_name"] for i in recipe["ingredients"]] == ["Tomato", "Basil"]
+    assert recipe["total_cost"] == "6.00"
+    assert recipe["creator_name"] == "admin"
+    assert len(statements) == 1
+
+
+def test_full_view_missing_recipe_is_404(admin):
+    assert admin.get("/api/recipes/99/full").status_code == 404
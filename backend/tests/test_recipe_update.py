@@ -0,0 +1,28 @@
+def test_ingredient_update_applies_diff(admin, make_product):
+    for name in ("Tomato", "Basil", "Garlic"):
+        make_product(name)
+    admin.post("/api/recipes", json={"name": "Sauce", "ingredients": [
+        {"product_id": 1, "quantity": 2, "unit": "kg"}, {"product_id": 2, "quantity": 1},
+    ]})
+
+    rv = admin.put("/api/recipes/1", json={"ingredients": [
+        {"product_id": 1, "quantity": 3, "unit": "kg"}, {"product_id": 3, "quantity": 1},
+    ]})
+    diff = rv.get_json()["ingredients"]
+    assert rv.status_code == 200
+    assert [d["product_id"] for d in diff["created"]] == [3]
+    assert [d["product_id"] for d in diff["updated"]] == [1]
+    assert [d["product_id"] for d in diff["deleted"]] == [2]
+
+    full = admin.get("/api/recipes/1/full").get_json()["recipe"]
+    assert {i["product_name"]: i["quantity"] for i in full["ingredients"]} == {"Tomato": 3, "Garlic": 1}
+
+
+def test_unchanged_ingredients_produce_empty_diff(admin, make_product):
+    make_product("Tomato")
+    admin.post("/api/recipes", json={"name": "Sauce", "ingredients": [{"product_id": 1, "quantity": 2, "unit": "kg"}]})
+    etag = admin.get("/api/recipes/1").headers["ETag"]
+
+    rv = admin.put("/api/recipes/1", json={"ingredients": [{"product_id": 1, "quantity": 2, "unit": "kg"}]})
+    assert rv.get_json()["ingredients"] == {"created": [], "updated": [], "deleted": []}
+    assert rv.headers["ETag"] == etag
@@ -0,0 +1,76 @@
+from sqlalchemy import event
+
+from app.extensions import db
+from app.models import Job
+from app.services import jobs, recommendations
+
+
+def _seed(admin, user, make_product):
+    for name in ("Tomato", "Basil", "Pasta"):
+        make_product(name, stock=100)
+    admin.post("/api/recipes", json={"name": "Caprese", "ingredients": [{"product_id": 1, "quantity": 1}, {"product_id": 2, "quantity": 1}]})
+    admin.post("/api/recipes", json={"name": "Pasta al pomodoro", "ingredients": [{"product_id": 1, "quantity": 1}, {"product_id": 3, "quantity": 1}]})
+    user.post("/api/orders", json={"items": [{"product_id": 2, "quantity": 1}, {"product_id": 3, "quantity": 1}]})
+
+
+def test_get_never_schedules_rebuild(app, admin, user, make_product):
+    _seed(admin, user, make_product)
+
+    cold = user.get("/api/recommendations?cart=3")
+    assert cold.status_code == 200
+    assert cold.get_json()["items"] == []
+    with app.app_context():
+        assert Job.query.filter_by(name=recommendations.REBUILD_JOB).count() == 0
+
+        recommendations.tick()
+        recommendations.tick()
+        assert Job.query.filter_by(name=recommendations.REBUILD_JOB).count() == 1
+        jobs.work(once=True)
+        recommendations.tick()
+        assert Job.query.filter_by(name=recommendations.REBUILD_JOB).count() == 1
+
+    items = user.get("/api/recommendations?cart=3").get_json()["items"]
+    assert [i["name"] for i in items] == ["Pasta al pomodoro", "Caprese"]
+    related = user.get("/api/recipes/1/related").get_json()["items"]
+    assert [i["name"] for i in related] == ["Pasta al pomodoro"]
+
+
+def test_fresh_lists_are_served_from_memory(app, admin, user, make_product):
+    _seed(admin, user, make_product)
+    with app.app_context():
+        recommendations.rebuild()
+        recommendations.refresh(force=True)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "recommendation_lists" in statement or "FROM recipes" in statement:
+            statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        for _ in range(3):
+            assert user.get("/api/recommendations?cart=3").get_json()["items"]
+            assert user.get("/api/recipes/1/related").get_json()["items"]
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert statements == []
+
+
+def test_recipe_change_reloads_names(app, admin, user, make_product):
+    _seed(admin, user, make_product)
+    with app.app_context():
+        recommendations.rebuild()
+        recommendations.refresh(force=True)
+
+    assert admin.put("/api/recipes/2", json={"name": "Pomodoro"}).status_code == 200
+    related = user.get("/api/recipes/1/related").get_json()["items"]
+    assert [i["name"] for i in related] == ["Pomodoro"]
+
+
+def test_unknown_recipe_gets_empty_list(user):
+    rv = user.get("/api/recipes/42/related")
+    assert rv.status_code == 200
+    assert rv.get_json()["items"] == []
@@ -0,0 +1,71 @@
+from app.services import search_index
+from app.services.catalog_events import CatalogChange
+
+
+def test_suggest_matches_word_prefix_and_follows_writes(admin, make_product):
+    make_product("Chicken breast")
+    make_product("Ćevapi")
+
+    rv = admin.get("/api/search/suggest?q=brea")
+    assert [i["name"] for i in rv.get_json()["items"]] == ["Chicken breast"]
+    assert admin.get("/api/search/suggest?q=cev").get_json()["items"][0]["name"] == "Ćevapi"
+
+    admin.put("/api/products/1", json={"name": "Turkey breast"})
+    assert [i["name"] for i in admin.get("/api/search/suggest?q=brea").get_json()["items"]] == ["Turkey breast"]
+
+
+def test_changes_during_rebuild_are_replayed(app, monkeypatch):
+    rows = [("product", 1, "Tomato")]
+
+    def load_rows():
+        # promena commitovana dok rebuild cita bazu
+        search_index.on_catalog_change([CatalogChange("product", 2, "created", {"name": "Basil"})])
+        return iter(rows)
+
+    monkeypatch.setattr(search_index, "_load_rows", load_rows)
+    with app.app_context():
+        search_index.rebuild_index()
+
+    assert [i["name"] for i in search_index.index.suggest("bas")] == ["Basil"]
+    assert [i["name"] for i in search_index.index.suggest("tom")] == ["Tomato"]
+
+
+def test_changes_before_first_build_are_not_lost(app, admin, make_product):
+    make_product("Tomato")
+    assert not search_index.index.built
+    with app.app_context():
+        search_index.ensure_built()
+    assert search_index.index.suggest("tom")
+
+
+def test_suggest_respects_limit_and_ranking():
+    index = search_index.PrefixIndex()
+    index.rebuild([
+        ("product", 1, "Grilled chicken"),
+        ("product", 2, "Chicken breast"),
+        ("recipe", 3, "Chicken"),
+        ("product", 4, "Chickpeas"),
+        ("recipe", 5, "Curry with chickpeas"),
+    ] + [("product", 100 + i, f"Chili {i:03d}") for i in range(80)])
+
+    names = [i["name"] for i in index.suggest("chick", limit=4)]
+    # prvo imena koja pocinju upitom (kraca pa abecedno), pa ostala
+    assert names == ["Chicken", "Chickpeas", "Chicken breast", "Grilled chicken"]
+
+    short = index.suggest("c", limit=3)
+    assert [i["name"] for i in short] == ["Chicken", "Chickpeas", "Chili 000"]
+    assert len(index.suggest("c", limit=60)) == 60
+    assert [i["id"] for i in index.suggest("chick", limit=10, kinds={"recipe"})] == [3, 5]
+
+
+def test_cached_short_prefix_follows_renames():
+    index = search_index.PrefixIndex()
+    index.rebuild([("product", 1, "Apple"), ("product", 2, "Apricot")])
+    assert [i["name"] for i in index.suggest("a", limit=1)] == ["Apple"]
+
+    index.upsert("product", 3, "Ai")
+    index.upsert("product", 1, "Banana")
+    assert [i["name"] for i in index.suggest("a", limit=5)] == ["Ai", "Apricot"]
+    assert [i["name"] for i in index.suggest("b", limit=5)] == ["Banana"]
+    index.remove("product", 3)
+    assert [i["name"] for i in index.suggest("a", limit=5)] == ["Apricot"]
@@ -0,0 +1,46 @@
+import threading
+
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight(wait_seconds=5)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "rows"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flights.do("k", slow))) for _ in range(3)]
+    for t in followers:
+        t.start()
+    while flights.snapshot_stats()["coalesced"] < 3:
+        pass
+    release.set()
+    for t in [leader, *followers]:
+        t.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [("rows", False)] + [("rows", True)] * 3
+    assert flights.snapshot_stats()["in_flight"] == 0
+
+
+def test_leader_error_is_shared_then_forgotten():
+    flights = SingleFlight()
+
+    def boom():
+        raise RuntimeError("db down")
+
+    try:
+        flights.do("k", boom)
+    except RuntimeError:
+        pass
+    assert flights.do("k", lambda: 1) == (1, False)
@@ -0,0 +1,32 @@
+from app.services import stale_catalog
+from app.services.db_health import breaker
+
+
+def test_stale_copy_served_while_breaker_open(client, make_product):
+    make_product("Tomato")
+    assert client.get("/api/products/1").status_code == 200
+
+    breaker.trip("database down")
+    rv = client.get("/api/products/1")
+    assert rv.status_code == 200
+    assert rv.headers["X-Catalog-Stale"] == "database down"
+    assert rv.get_json()["product"]["name"] == "Tomato"
+
+    missing = client.get("/api/products/2")
+    assert missing.status_code == 503
+
+
+def test_unknown_params_share_entry_and_cache_is_bounded(app, client, make_product, monkeypatch):
+    for i in range(5):
+        make_product(f"Product {i}")
+    client.get("/api/products/1")
+    size = stale_catalog.cached_bytes()
+    for i in range(10):
+        client.get(f"/api/products/1?junk={i}")
+    assert stale_catalog.cached_bytes() == size
+
+    monkeypatch.setattr(stale_catalog, "max_bytes", size * 2)
+    for pid in range(1, 6):
+        client.get(f"/api/products/{pid}")
+    assert stale_catalog.cached_bytes() <= size * 2
+    assert len(stale_catalog._entries) == 2
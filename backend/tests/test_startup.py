@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_create_app_does_not_import_controllers():
+    code = (
+        "import sys; from app import create_app; create_app(); "
+        "print(sorted(m for m in sys.modules if m.startswith('app.controllers.')))"
+    )
+    env = dict(os.environ, SEARCH_INDEX_WARM="0")
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,23 @@
+from app.controllers import order_controller
+from app.services.statement_cache import cached_statement
+
+
+def test_same_key_returns_same_statement():
+    built = []
+
+    def build():
+        built.append(1)
+        return object()
+
+    assert cached_statement(("test", 1), build) is cached_statement(("test", 1), build)
+    assert len(built) == 1
+
+
+def test_cached_list_statements_respect_fields(user, make_product):
+    make_product("Tomato")
+    user.post("/api/orders", json={"items": [{"product_id": 1, "quantity": 1}]})
+    user.get("/api/orders?fields=status")
+    full = user.get("/api/orders").get_json()["items"][0]
+    narrow = user.get("/api/orders?fields=status").get_json()["items"][0]
+    assert set(narrow) == {"id", "status"}
+    assert set(order_controller.LIST_FIELDS) <= set(full)